@@ -1,18 +1,52 @@
+import functools
 from datetime import date
+from swarmintelligence.modules.lazy_value import LazyValue
+from swarmintelligence.modules.tool_registry import ToolRegistry
 
 class Config:
     def __init__(self, version='v5', sample=None):
-        # TOOL SETUP
-        from eigenlib.utils.notion_io import NotionIO
-        from swarmintelligence.modules.notion_tool import NotionTool
-        notion_token = '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'
-        database_id = "2262a599-e985-8017-9faf-dd11b3b8df8b"
-        notion_tool = NotionTool(auth_token=notion_token, database_id=database_id)
-        tools_dict = [notion_tool]
+        # TOOL SETUP (la tool y el cliente de Notion se crean en su primer uso)
+        self.notion_token = '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'
+        self.database_id = "2262a599-e985-8017-9faf-dd11b3b8df8b"
+        self.tool_registry = ToolRegistry()
+        notion_tool = self.tool_registry.register('notion_tool', 'swarmintelligence.modules.notion_tool.NotionTool', auth_token=self.notion_token, database_id=self.database_id)
+        self.agent_tools = [notion_tool]
 
-        database_df = NotionIO(auth_token=notion_token).get_database_pages(database_id=database_id)
-        active_projects = list(set(database_df['Project'].sum()))
+        if True:
+            # DATASET
+            self.dataset_size = 3
+
+            # LABELING
+            self.env_config_dataset = './data/processed/notion_assistant_dataset'
+            self.env_config_train_dataset = './data/processed/notion_assistant_train_dataset'
+            self.env_config_train_history = './data/processed/notion_assistant_train_history'
+            self.env_config_test_dataset = './data/processed/notion_assistant_test_dataset'
+            self.env_config_test_history = './data/processed/notion_assistant_test_history'
+            self.dataset_format = 'parquet'  # 'parquet' | 'feather' | 'xlsx'
+            self.eval_checkpoint_path = './data/processed/notion_assistant_eval_checkpoint'
 
+            #FINE TUNING
+            self.ft_dataset = './data/processed/ft_dataset'
+            self.ft_model = 'gpt-4.1'
+            self.tools_register = ''
+            self.channel = 'NOTION_AGENT'
+
+            # GENERAL
+            self.version = version
+            self.sample = sample
+            self.experiment_id = 'swarmintelligence'
+
+    # Los objetos pesados se construyen en su primer uso: etapas como validation_split o train no los necesitan,
+    # y en los dicts de las etapas el agente y el usuario van como LazyValue, que Main resuelve al usarlos
+    @functools.cached_property
+    def gen(self):
+        from swarmintelligence.modules.general_dataset_generator import EnvConfigGeneralDatasetGenerator
+        return EnvConfigGeneralDatasetGenerator()
+
+    @functools.cached_property
+    def agent(self):
+        # Construir el agente no consulta Notion: los proyectos activos los obtiene el agente con
+        # get_database_pages, y la tool solo se materializa (y llama a la API) en su primer uso
         system_prompt = f"""
 # CONTEXTO:
 Eres un asistente cuya misión es la de gestionar mi notion personal.
@@ -21,7 +55,7 @@ Tienes la capacidad de realizar las operaciones necesarias para gestionar mis ta
 # ESTRUCTURA TIPICA DE UN PROYECTO
 
 Las paginas se organizan con atributos que son:
-    * Project -> Proyecto al que petenece la pagina/epica # {active_projects}
+    * Project -> Proyecto al que petenece la pagina/epica. Consulta los proyectos activos con get_database_pages.
     * Status -> Estado de la epica. ['Active', 'Fixed', 'Stand By', 'Done']
     * Target Date -> Fecha en la que se propone el cierre de la tarea. Por defecto se pone la fecha de hoy. {date.today().strftime("%Y-%m-%d")}
 
@@ -58,40 +92,19 @@ Si es necesario, ejecuta este metodo siempre primero para tener un overview del
 
 """
 
-        # AGENT
         from swarmintelligence.modules.general_agent import GeneralAgent
-        self.agent = GeneralAgent(system_prompt=system_prompt, model='o3', temperature=1, tools=tools_dict)
+        from swarmintelligence.modules.context_window_manager import ContextWindowManager
+        context_manager = ContextWindowManager(token_budget=40000, keep_last_turns=4, summary_model='gpt-4.1', summary_temperature=0)
+        return GeneralAgent(system_prompt=system_prompt, model='o3', temperature=1, tools=self.agent_tools, context_manager=context_manager)
 
-
-        if True:
-            # DATASET
-            from swarmintelligence.modules.general_dataset_generator import EnvConfigGeneralDatasetGenerator
-            self.gen = EnvConfigGeneralDatasetGenerator()
-            self.dataset_size = 3
-
-            # LABELING
-            from swarmintelligence.modules.general_synth_user import GeneralSynthUser
-            self.user = GeneralSynthUser()
-            self.env_config_dataset = './data/processed/notion_assistant_dataset'
-            self.env_config_train_dataset = './data/processed/notion_assistant_train_dataset'
-            self.env_config_train_history = './data/processed/notion_assistant_train_history'
-            self.env_config_test_dataset = './data/processed/notion_assistant_test_dataset'
-            self.env_config_test_history = './data/processed/notion_assistant_test_history'
-
-            #FINE TUNING
-            self.ft_dataset = './data/processed/ft_dataset'
-            self.ft_model = 'gpt-4.1'
-            self.tools_register = ''
-            self.channel = 'NOTION_AGENT'
-
-            # GENERAL
-            self.version = version
-            self.sample = sample
-            self.experiment_id = 'swarmintelligence'
+    @functools.cached_property
+    def user(self):
+        from swarmintelligence.modules.general_synth_user import GeneralSynthUser
+        return GeneralSynthUser()
 
     def initialize(self, update=None):
         cfg = {
-            'agent': self.agent,
+            'agent': LazyValue(lambda: self.agent),
         }
         return cfg | (update or {})
 
@@ -100,6 +113,7 @@ Si es necesario, ejecuta este metodo siempre primero para tener un overview del
             'gen': self.gen,
             'dataset_size': self.dataset_size,
             'output_dataset_path': self.env_config_dataset,
+            'dataset_format': self.dataset_format,
         }
         return cfg | (update or {})
 
@@ -109,6 +123,7 @@ Si es necesario, ejecuta este metodo siempre primero para tener un overview del
             'perc_split': 0.2,
             'env_config_train_dataset': self.env_config_train_dataset,
             'env_config_test_dataset': self.env_config_test_dataset,
+            'dataset_format': self.dataset_format,
         }
         return cfg | (update or {})
 
@@ -119,14 +134,17 @@ Si es necesario, ejecuta este metodo siempre primero para tener un overview del
             'env_config_input_train_history': self.env_config_train_history,
             'env_config_input_test_dataset': self.env_config_test_dataset,
             'env_config_input_test_history': self.env_config_test_history,
-            'user': self.user,
-            'agent': self.agent,
+            'user': LazyValue(lambda: self.user),
+            'agent': LazyValue(lambda: self.agent),
             'env_config_output_train_dataset': self.env_config_train_dataset,
             'env_config_output_train_history': self.env_config_train_history,
             'env_config_output_test_dataset': self.env_config_test_dataset,
             'env_config_output_test_history': self.env_config_test_history,
             'run_train_inference': True,
             'run_val_inference': True,
+            'n_workers': 8,
+            'dataset_format': self.dataset_format,
+            'checkpoint_path': self.eval_checkpoint_path,
         }
         return cfg | (update or {})
 
@@ -152,14 +170,17 @@ Si es necesario, ejecuta este metodo siempre primero para tener un overview del
             'env_config_input_train_history': self.env_config_train_history,
             'env_config_input_test_dataset': self.env_config_test_dataset,
             'env_config_input_test_history': self.env_config_test_history,
-            'user': self.user,
-            'agent': self.agent,
+            'user': LazyValue(lambda: self.user),
+            'agent': LazyValue(lambda: self.agent),
             'env_config_output_train_dataset': self.env_config_train_dataset,
             'env_config_output_train_history': self.env_config_train_history,
             'env_config_output_test_dataset': self.env_config_test_dataset,
             'env_config_output_test_history': self.env_config_test_history,
             'run_train_inference': False,
             'run_val_inference': True,
+            'n_workers': 8,
+            'dataset_format': self.dataset_format,
+            'checkpoint_path': self.eval_checkpoint_path,
         }
         return cfg | (update or {})
 
@@ -175,6 +196,11 @@ Si es necesario, ejecuta este metodo siempre primero para tener un overview del
         return cfg | (update or {})
 
     def telegram_chatbot_run(self, update=None):
-        cfg = {}
+        cfg = {
+            'agent_pool_size': 4,
+            'max_sessions': 100,
+            'session_ttl': 3600,
+            'max_history': 200,
+        }
         return cfg | (update or {})
 
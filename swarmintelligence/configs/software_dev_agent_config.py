@@ -1,15 +1,18 @@
-from swarmintelligence.modules.server_tool import ServerTool
+import functools
+from swarmintelligence.modules.lazy_value import LazyValue
+from swarmintelligence.modules.tool_registry import ToolRegistry
+
+# Las tools se declaran con la ruta de la clase: el módulo solo se importa al materializarlas
+SERVER_TOOL = 'swarmintelligence.modules.server_tool.ServerTool'
 
 class Config:
     def __init__(self, version='v5', sample=None):
         # DATASET
-        from swarmintelligence.modules.general_dataset_generator import EnvConfigGeneralDatasetGenerator
-        self.gen = EnvConfigGeneralDatasetGenerator()
         self.dataset_size = 3
 
         # AGENT
-        from swarmintelligence.modules.general_agent import GeneralAgent
         """Tools Setup"""
+        self.tool_registry = ToolRegistry()
         if True:
             environments = ["jedipoc", "swarmintelligence", "swarmautomations", 'swarmml', 'swarmcompute', 'eigenlib']
             # CODE INTERPRETER TOOL SETUP
@@ -36,7 +39,7 @@ class Config:
                                 "required": True,
                             },
                         ] + environ_arg
-            ci_tool = ServerTool('code_interpreter', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
+            ci_tool = self.tool_registry.register(tool_name, SERVER_TOOL, 'code_interpreter', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
 
             # SOURCE PARSE TOOL
             tool_name = 'sources_parser_and_summarizer'
@@ -73,7 +76,7 @@ class Config:
                                 "required": True,
                             },
                         ] + environ_arg
-            sp_tool = ServerTool('sources_parser_and_summarizer', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
+            sp_tool = self.tool_registry.register(tool_name, SERVER_TOOL, 'sources_parser_and_summarizer', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
 
             # LOCAL FILE OPERATIONS TOOL
             tool_name = 'file_operations_tools'
@@ -137,7 +140,7 @@ class Config:
                             },
 
                         ] + environ_arg
-            fo_tool = ServerTool('local_file_operations_tools', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
+            fo_tool = self.tool_registry.register(tool_name, SERVER_TOOL, 'local_file_operations_tools', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
 
             # GET FILES MAP TOOL
             tool_name = 'get_files_map'
@@ -155,7 +158,8 @@ class Config:
                                 "required": True,
                             },
                         ] + environ_arg
-            pm_tool = ServerTool('get_files_map', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
+            # Sin caché: file_operations y el intérprete de código modifican el proyecto entre llamadas
+            pm_tool = self.tool_registry.register(tool_name, SERVER_TOOL, 'get_files_map', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
 
             # GOOGLE SEARCH TOOL ADAPTER
             tool_name = 'web_search'
@@ -177,7 +181,7 @@ class Config:
                                 "required": False,
                             },
                         ] + environ_arg
-            ws_tool = ServerTool('web_search', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
+            ws_tool = self.tool_registry.register(tool_name, SERVER_TOOL, 'web_search', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args, cache_policy={'ttl': 3600, 'key_args': ['query', 'num_results']})
 
             # BROWSE URL TOOL ADAPTER
             tool_name = 'browse_url'
@@ -208,7 +212,7 @@ class Config:
                                 "required": False,
                             },
                         ] + environ_arg
-            br_tool = ServerTool('browse_url', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
+            br_tool = self.tool_registry.register(tool_name, SERVER_TOOL, 'browse_url', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args, cache_policy={'ttl': 3600, 'key_args': ['urls', 'query', 'summarize_search']})
 
             # VECTOR DATABASE
             tool_name = 'rag_vector_database'
@@ -232,11 +236,11 @@ class Config:
                                 "required": True,
                             },
                         ] + environ_arg
-            vdb_tool = ServerTool('vector_database', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args)
+            vdb_tool = self.tool_registry.register(tool_name, SERVER_TOOL, 'vector_database', tool_name=tool_name, tool_description=tool_description, default_config=default_config, tool_args=tool_args, cache_policy={'ttl': 600, 'key_args': ['vdb_name', 'vdb_query']})
 
-            tools_dict = [ci_tool, sp_tool, fo_tool, pm_tool, ws_tool, br_tool]
+            self.agent_tools = [ci_tool, sp_tool, fo_tool, pm_tool, ws_tool, br_tool]
 
-        system_prompt = """
+        self.system_prompt = """
 # CONTEXTO:
 Eres un desarrollador de software experto, capaz de operar una serie de herramientas que te permiten desarrollar software de forma autónoma en el contexto de proyectos de Python. 
 
@@ -289,16 +293,15 @@ Petición -> Escritura de un código -> Ejecución de prueba -> Identificacion d
 Siempre que desarrolles un modulo nuevo experimental, metelo en development.
 Siempre que necesites desarrollar codigo que usa modulos externos, abrelos (en la carpeta modules o en el proyecto al que pertenecen) y analiza su contenido para poder desarrollar bien las nuevas features.
         """
-        self.agent = GeneralAgent(system_prompt=system_prompt, model='o3', temperature=1, tools=tools_dict)
 
         # LABELING
-        from swarmintelligence.modules.general_synth_user import GeneralSynthUser
-        self.user = GeneralSynthUser()
         self.env_config_dataset = './data/processed/personal_assistant_dataset'
         self.env_config_train_dataset = './data/processed/personal_assistant_train_dataset'
         self.env_config_train_history = './data/processed/personal_assistant_train_history'
         self.env_config_test_dataset = './data/processed/personal_assistant_test_dataset'
         self.env_config_test_history = './data/processed/personal_assistant_test_history'
+        self.dataset_format = 'parquet'  # 'parquet' | 'feather' | 'xlsx'
+        self.eval_checkpoint_path = './data/processed/personal_assistant_eval_checkpoint'
 
         #FINE TUNING
         self.ft_dataset = './data/processed/ft_dataset'
@@ -311,9 +314,28 @@ Siempre que necesites desarrollar codigo que usa modulos externos, abrelos (en l
         self.sample = sample
         self.experiment_id = 'swarmintelligence'
 
+    # Los objetos pesados se construyen en su primer uso: etapas como validation_split o train no los necesitan,
+    # y en los dicts de las etapas el agente y el usuario van como LazyValue, que Main resuelve al usarlos
+    @functools.cached_property
+    def gen(self):
+        from swarmintelligence.modules.general_dataset_generator import EnvConfigGeneralDatasetGenerator
+        return EnvConfigGeneralDatasetGenerator()
+
+    @functools.cached_property
+    def agent(self):
+        from swarmintelligence.modules.general_agent import GeneralAgent
+        from swarmintelligence.modules.context_window_manager import ContextWindowManager
+        context_manager = ContextWindowManager(token_budget=100000, keep_last_turns=4, summary_model='gpt-4.1', summary_temperature=0)
+        return GeneralAgent(system_prompt=self.system_prompt, model='o3', temperature=1, tools=self.agent_tools, context_manager=context_manager)
+
+    @functools.cached_property
+    def user(self):
+        from swarmintelligence.modules.general_synth_user import GeneralSynthUser
+        return GeneralSynthUser()
+
     def initialize(self, update=None):
         cfg = {
-            'agent': self.agent,
+            'agent': LazyValue(lambda: self.agent),
         }
         return cfg | (update or {})
 
@@ -322,6 +344,7 @@ Siempre que necesites desarrollar codigo que usa modulos externos, abrelos (en l
             'gen': self.gen,
             'dataset_size': self.dataset_size,
             'output_dataset_path': self.env_config_dataset,
+            'dataset_format': self.dataset_format,
         }
         return cfg | (update or {})
 
@@ -331,6 +354,7 @@ Siempre que necesites desarrollar codigo que usa modulos externos, abrelos (en l
             'perc_split': 0.2,
             'env_config_train_dataset': self.env_config_train_dataset,
             'env_config_test_dataset': self.env_config_test_dataset,
+            'dataset_format': self.dataset_format,
         }
         return cfg | (update or {})
 
@@ -341,14 +365,17 @@ Siempre que necesites desarrollar codigo que usa modulos externos, abrelos (en l
             'env_config_input_train_history': self.env_config_train_history,
             'env_config_input_test_dataset': self.env_config_test_dataset,
             'env_config_input_test_history': self.env_config_test_history,
-            'user': self.user,
-            'agent': self.agent,
+            'user': LazyValue(lambda: self.user),
+            'agent': LazyValue(lambda: self.agent),
             'env_config_output_train_dataset': self.env_config_train_dataset,
             'env_config_output_train_history': self.env_config_train_history,
             'env_config_output_test_dataset': self.env_config_test_dataset,
             'env_config_output_test_history': self.env_config_test_history,
             'run_train_inference': True,
             'run_val_inference': True,
+            'n_workers': 8,
+            'dataset_format': self.dataset_format,
+            'checkpoint_path': self.eval_checkpoint_path,
         }
         return cfg | (update or {})
 
@@ -374,14 +401,17 @@ Siempre que necesites desarrollar codigo que usa modulos externos, abrelos (en l
             'env_config_input_train_history': self.env_config_train_history,
             'env_config_input_test_dataset': self.env_config_test_dataset,
             'env_config_input_test_history': self.env_config_test_history,
-            'user': self.user,
-            'agent': self.agent,
+            'user': LazyValue(lambda: self.user),
+            'agent': LazyValue(lambda: self.agent),
             'env_config_output_train_dataset': self.env_config_train_dataset,
             'env_config_output_train_history': self.env_config_train_history,
             'env_config_output_test_dataset': self.env_config_test_dataset,
             'env_config_output_test_history': self.env_config_test_history,
             'run_train_inference': False,
             'run_val_inference': True,
+            'n_workers': 8,
+            'dataset_format': self.dataset_format,
+            'checkpoint_path': self.eval_checkpoint_path,
         }
         return cfg | (update or {})
 
@@ -1,14 +1,15 @@
-import pandas as pd
 import os
-from eigenlib.utils.setup import Setup
 
 class Main:
     def __init__(self):
+        # Import diferido: las etapas que no lo necesitan no pagan su coste al importar el módulo
+        from eigenlib.utils.setup import Setup
         Setup().init()
 
     def initialize(self, config):
+        from swarmintelligence.modules.lazy_value import resolve
         ################################################################################################################
-        agent = config['agent']
+        agent = resolve(config['agent'])
         ################################################################################################################
         self.agent = agent
         memory = self.agent.initialize()
@@ -17,37 +18,40 @@ class Main:
         return config
 
     def dataset_generation(self, config):
-        from eigenlib.utils.dataset_io import DatasetIO
+        from swarmintelligence.modules.dataset_store import DatasetStore
         ################################################################################################################
         gen = config['gen']
         dataset_size = config['dataset_size']
         output_dataset_path = config['output_dataset_path']
+        dataset_format = config['dataset_format']
         ################################################################################################################
         dataset_df = gen.run(dataset_size=dataset_size, n_turns=1, max_turns=1)
-        DatasetIO().create(path=output_dataset_path, dataframe=dataset_df, partition_format='xlsx', overwrite=True)
+        DatasetStore().create(path=output_dataset_path, dataframe=dataset_df, partition_format=dataset_format, overwrite=True)
         ################################################################################################################
         return config
 
     def validation_split(self, config):
         from eigenlib.LLM.llm_validation_split import LLMValidationSplitClass
-        from eigenlib.utils.dataset_io import DatasetIO
+        from swarmintelligence.modules.dataset_store import DatasetStore
         ################################################################################################################
         env_config_dataset = config['env_config_dataset']
         perc_split = config['perc_split']
         env_config_train_dataset = config['env_config_train_dataset']
         env_config_test_dataset = config['env_config_test_dataset']
+        dataset_format = config['dataset_format']
         ################################################################################################################
-        env_config = DatasetIO().read(path=env_config_dataset)
+        env_config = DatasetStore().read(path=env_config_dataset)
         env_config_train, env_config_test = LLMValidationSplitClass().run(env_config, test_size=perc_split, random_seed=42)
 
-        DatasetIO().create(path=env_config_train_dataset, dataframe=env_config_train, partition_format='xlsx', overwrite=True)
-        DatasetIO().create(path=env_config_test_dataset, dataframe=env_config_test, partition_format='xlsx', overwrite=True)
+        DatasetStore().create(path=env_config_train_dataset, dataframe=env_config_train, partition_format=dataset_format, overwrite=True)
+        DatasetStore().create(path=env_config_test_dataset, dataframe=env_config_test, partition_format=dataset_format, overwrite=True)
         return config
 
     def evaluation(self, config):
-        from eigenlib.genai.base_simulator import BaseSimulator
-        from eigenlib.genai.base_environment import BaseEnvironment
-        from eigenlib.utils.dataset_io import DatasetIO
+        from swarmintelligence.modules.parallel_simulator import ParallelSimulator
+        from swarmintelligence.modules.evaluation_checkpoint import EvaluationCheckpoint
+        from swarmintelligence.modules.dataset_store import DatasetStore
+        from swarmintelligence.modules.lazy_value import resolve
         ################################################################################################################
         experiment_id = config['experiment_id']
         env_config_input_train_dataset = config['env_config_input_train_dataset']
@@ -62,26 +66,40 @@ class Main:
         env_config_output_train_history = config['env_config_output_train_history']
         env_config_output_test_dataset = config['env_config_output_test_dataset']
         env_config_output_test_history = config['env_config_output_test_history']
+        n_workers = config['n_workers']
+        dataset_format = config['dataset_format']
+        checkpoint_path = config['checkpoint_path']
         ################################################################################################################
         # TRAIN LABELING
         if run_train_inference:
-            env_train_config = DatasetIO().read(path=env_config_input_train_dataset)
-            env_train_history = DatasetIO().read(path=env_config_input_train_history)
-            env_train_history, env_train_config = BaseSimulator(env=BaseEnvironment(), user=user, agent=agent, experiment_id=experiment_id).generate(env_config=env_train_config, env_history=env_train_history)
-            DatasetIO().create(path=env_config_output_train_dataset, dataframe=env_train_config, partition_format='xlsx', overwrite=True)
-            DatasetIO().create(path=env_config_output_train_history, dataframe=env_train_history, partition_format='xlsx', overwrite=True)
+            # El agente y el usuario solo se construyen si hay que simular
+            user, agent = resolve(user), resolve(agent)
+            env_train_config = DatasetStore().read(path=env_config_input_train_dataset)
+            env_train_history = DatasetStore().read(path=env_config_input_train_history)
+            fingerprint = EvaluationCheckpoint.fingerprint(env_train_config, env_train_history, user, agent)
+            checkpoint = EvaluationCheckpoint(os.path.join(checkpoint_path, str(experiment_id), 'train'), fingerprint=fingerprint) if checkpoint_path else None
+            env_train_history, env_train_config = ParallelSimulator(user=user, agent=agent, experiment_id=experiment_id, n_workers=n_workers, checkpoint=checkpoint).generate(env_config=env_train_config, env_history=env_train_history)
+            DatasetStore().create(path=env_config_output_train_dataset, dataframe=env_train_config, partition_format=dataset_format, overwrite=True)
+            DatasetStore().create(path=env_config_output_train_history, dataframe=env_train_history, partition_format=dataset_format, overwrite=True)
+            if checkpoint is not None:
+                checkpoint.clear()
 
         # TEST LABELING
         if run_test_inference:
-            env_test_config = DatasetIO().read(path=env_config_input_test_dataset)
-            env_test_history = DatasetIO().read(path=env_config_input_test_history)
-            env_test_history, env_test_config = BaseSimulator(env=BaseEnvironment(), user=user, agent=agent, experiment_id=experiment_id).generate(env_config=env_test_config, env_history=env_test_history)
-            DatasetIO().create(path=env_config_output_test_dataset, dataframe=env_test_config, partition_format='xlsx', overwrite=True)
-            DatasetIO().create(path=env_config_output_test_history, dataframe=env_test_history, partition_format='xlsx', overwrite=True)
+            user, agent = resolve(user), resolve(agent)
+            env_test_config = DatasetStore().read(path=env_config_input_test_dataset)
+            env_test_history = DatasetStore().read(path=env_config_input_test_history)
+            fingerprint = EvaluationCheckpoint.fingerprint(env_test_config, env_test_history, user, agent)
+            checkpoint = EvaluationCheckpoint(os.path.join(checkpoint_path, str(experiment_id), 'test'), fingerprint=fingerprint) if checkpoint_path else None
+            env_test_history, env_test_config = ParallelSimulator(user=user, agent=agent, experiment_id=experiment_id, n_workers=n_workers, checkpoint=checkpoint).generate(env_config=env_test_config, env_history=env_test_history)
+            DatasetStore().create(path=env_config_output_test_dataset, dataframe=env_test_config, partition_format=dataset_format, overwrite=True)
+            DatasetStore().create(path=env_config_output_test_history, dataframe=env_test_history, partition_format=dataset_format, overwrite=True)
+            if checkpoint is not None:
+                checkpoint.clear()
         return config
 
     def train(self, config):
-        from eigenlib.utils.dataset_io import DatasetIO
+        from swarmintelligence.modules.dataset_store import DatasetStore
         from eigenlib.LLM.llm_client import LLMClientClass
         ################################################################################################################
         env_config_train_history = config['env_config_train_history']
@@ -93,25 +111,51 @@ class Main:
         tools = config['tools']
         channel = config['channel']
         ################################################################################################################
-        X_train = DatasetIO().read(path=env_config_train_history)
-        X_test = DatasetIO().read(path=env_config_test_history)
+        X_train = DatasetStore().read(path=env_config_train_history)
+        X_test = DatasetStore().read(path=env_config_test_history)
         LLMClientClass(model=ft_model).train(X_train=X_train, X_test=X_test, output_FT_dataset_name=ft_dataset_name, channel=channel, run_ft=run_ft, n_epoch=n_epochs, tools=tools)
         return config
 
     def predict(self, config):
-        from eigenlib.genai.memory import Memory
+        from swarmintelligence.modules.columnar_memory import ColumnarMemory
         history = config['history']
         user_message = config['user_message']
         ################################################################################################################
-        memory = Memory()
-        memory.history = pd.DataFrame(history)
+        memory = ColumnarMemory(history=history)
         memory, answer = self.agent.call(memory=memory, user_message=user_message)
         print('AGENT: ', answer)
         ################################################################################################################
         config['agent_message'] = answer
-        config['history'] = memory.history.to_dict(orient='records')
+        config['history'] = memory.to_records()
+        return config
+
+    async def apredict(self, config):
+        from swarmintelligence.modules.columnar_memory import ColumnarMemory
+        history = config['history']
+        user_message = config['user_message']
+        ################################################################################################################
+        memory = ColumnarMemory(history=history)
+        memory, answer = await self.agent.acall(memory=memory, user_message=user_message)
+        print('AGENT: ', answer)
+        ################################################################################################################
+        config['agent_message'] = answer
+        config['history'] = memory.to_records()
         return config
 
+    def predict_stream(self, config):
+        from swarmintelligence.modules.columnar_memory import ColumnarMemory
+        history = config['history']
+        user_message = config['user_message']
+        ################################################################################################################
+        memory = ColumnarMemory(history=history)
+        for event in self.agent.stream(memory=memory, user_message=user_message):
+            if event['type'] == 'final':
+                print('AGENT: ', event['answer'])
+                ########################################################################################################
+                config['agent_message'] = event['answer']
+                config['history'] = event['memory'].to_records()
+            yield event
+
     def launch_frontend(self, config):
         import os
         from eigenlib.utils.console_io import Console
@@ -126,17 +170,22 @@ class Main:
         from dotenv import load_dotenv
         load_dotenv()
         from swarmintelligence.modules.telegram_chatbot import TelegramChatbotClass
+        from swarmintelligence.modules.chat_session_manager import ChatSessionManager
         from swarmintelligence.configs.notion_agent_config import Config
+        ################################################################################################################
+        agent_pool_size = config['agent_pool_size']
+        max_sessions = config['max_sessions']
+        session_ttl = config['session_ttl']
+        max_history = config['max_history']
+        ################################################################################################################
         cfg = Config()
-        self.initialize(cfg.initialize())
-        self.predict_cfg = cfg.predict()
-        def mi_chat_function(mensaje: str, contexto: dict) -> str:
-            self.predict_cfg['user_message'] = mensaje
-            self.predict_cfg = self.predict(self.predict_cfg)
-            print(self.predict_cfg)
-            return self.predict_cfg['agent_message']
+        initialized_cfg = self.initialize(cfg.initialize())
+        sessions = ChatSessionManager(agent=self.agent, base_history=initialized_cfg['history'], pool_size=agent_pool_size, max_sessions=max_sessions, session_ttl=session_ttl, max_history=max_history)
+        def mi_chat_function(mensaje: str, contexto: dict):
+            # Devuelve un generador de fragmentos: el bot edita el mensaje según avanza la respuesta
+            return sessions.stream(contexto['chat_id'], mensaje)
         TOKEN = os.environ['TELEGRAM_BOT_TOKEN_2']
-        bot = TelegramChatbotClass(token=TOKEN, chat_function=mi_chat_function)
+        bot = TelegramChatbotClass(token=TOKEN, chat_function=mi_chat_function, max_workers=agent_pool_size, max_concurrent_total=agent_pool_size)
         bot.run(polling=True)  # Esto arranca el bot en modo polling
 
         import time
@@ -0,0 +1,147 @@
+import copy
+import queue
+import threading
+import time
+from collections import OrderedDict
+from swarmintelligence.modules.columnar_memory import ColumnarMemory
+
+_DONE = object()
+
+
+def clone_agent(agent):
+    """
+    Copia de un agente (o usuario sintético) que se puede usar a la vez que el original en otro hilo.
+
+    La copia es superficial, pero el estado mutable por agente se duplica: el ContextWindowManager
+    y la memoria, si el agente la guarda. `initialize` crea además un cliente LLM propio. La caché
+    de resúmenes del ContextWindowManager, protegida con lock, sigue compartida.
+    """
+    clone = copy.copy(agent)
+    context_manager = getattr(agent, 'context_manager', None)
+    if context_manager is not None:
+        clone.context_manager = copy.copy(context_manager)
+    if getattr(agent, 'memory', None) is not None:
+        clone.memory = copy.deepcopy(agent.memory)
+    if hasattr(clone, 'initialize'):
+        clone.initialize()
+    return clone
+
+
+class ChatSessionManager:
+    """
+    Gestiona una conversación aislada por chat_id sobre un pool de agentes.
+
+    - Cada chat tiene su propia memoria, creada a partir del historial base (system prompt).
+    - Las sesiones inactivas más de `session_ttl` segundos se eliminan, y si se supera
+      `max_sessions` se expulsa la menos usada recientemente (LRU).
+    - El historial de cada sesión se recorta a `max_history` filas, conservando el system prompt
+      y cortando siempre en un mensaje de usuario para no separar tool calls de sus resultados.
+    - Las llamadas se sirven con `pool_size` copias del agente, de modo que varios chats
+      pueden procesarse a la vez sin compartir estado.
+    """
+
+    def __init__(self, agent, base_history=None, pool_size=4, max_sessions=100, session_ttl=3600, max_history=200):
+        self.base_history = base_history or []
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.max_history = max_history
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._agents = queue.Queue()
+        for _ in range(pool_size):
+            self._agents.put(clone_agent(agent))
+
+    def chat(self, chat_id, user_message):
+        """Procesa `user_message` en la sesión de `chat_id` y devuelve la respuesta del agente."""
+        session = self._get_session(chat_id)
+        with session['lock']:
+            agent = self._agents.get()
+            try:
+                memory, answer = agent.call(memory=session['memory'], user_message=user_message)
+            finally:
+                self._agents.put(agent)
+            session['memory'] = self._trim(memory)
+            session['last_used'] = time.monotonic()
+        return answer
+
+    def stream(self, chat_id, user_message):
+        """
+        Versión en streaming de `chat`: genera los fragmentos de texto de la respuesta según llegan y,
+        para las tools, un evento {'type': 'status', 'text'} con una línea de progreso.
+
+        El turno se ejecuta completo en un hilo propio que reserva la sesión y el agente del pool y
+        los libera al terminar, aunque el consumidor deje de iterar a mitad de respuesta.
+        """
+        events = queue.Queue()
+        threading.Thread(target=self._stream_worker, args=(chat_id, user_message, events), daemon=True).start()
+        while True:
+            event = events.get()
+            if event is _DONE:
+                return
+            if isinstance(event, BaseException):
+                raise event
+            yield event
+
+    def _stream_worker(self, chat_id, user_message, events):
+        try:
+            session = self._get_session(chat_id)
+            with session['lock']:
+                agent = self._agents.get()
+                try:
+                    for event in agent.stream(memory=session['memory'], user_message=user_message):
+                        if event['type'] == 'text_delta':
+                            events.put(event['delta'])
+                        elif event['type'] == 'tool_call_start':
+                            events.put({'type': 'status', 'text': f"🔧 {event['tool_call']['function']['name']}..."})
+                finally:
+                    self._agents.put(agent)
+                session['memory'] = self._trim(event['memory'])
+                session['last_used'] = time.monotonic()
+        except Exception as e:
+            events.put(e)
+        else:
+            events.put(_DONE)
+
+    def reset(self, chat_id):
+        """Elimina la sesión de `chat_id`."""
+        with self._lock:
+            self._sessions.pop(chat_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _get_session(self, chat_id):
+        now = time.monotonic()
+        with self._lock:
+            # Expulsión por TTL (las sesiones están ordenadas de menos a más recientes)
+            while self._sessions:
+                oldest_id, oldest = next(iter(self._sessions.items()))
+                if now - oldest['last_used'] <= self.session_ttl:
+                    break
+                del self._sessions[oldest_id]
+            session = self._sessions.get(chat_id)
+            if session is None:
+                session = {'memory': ColumnarMemory(history=self.base_history), 'last_used': now, 'lock': threading.Lock()}
+                self._sessions[chat_id] = session
+                # Expulsión LRU
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                session['last_used'] = now
+                self._sessions.move_to_end(chat_id)
+            return session
+
+    def _trim(self, memory):
+        if len(memory) <= self.max_history:
+            return memory
+        records = memory.to_records()
+        n_head = 0
+        while n_head < len(records) and records[n_head]['role'] == 'system' and not records[n_head]['steering']:
+            n_head += 1
+        start = max(n_head, len(records) - (self.max_history - n_head))
+        user_positions = [i for i in range(start, len(records)) if records[i]['role'] == 'user']
+        if not user_positions:
+            # Un solo turno más largo que el límite: se conserva completo desde su mensaje de usuario
+            user_positions = [i for i in range(n_head, len(records)) if records[i]['role'] == 'user'][-1:] or [start]
+        memory.history = records[:n_head] + records[user_positions[0]:]
+        return memory
@@ -0,0 +1,157 @@
+import datetime
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ChatStore:
+    """
+    Persistencia de chats append-only: un fichero JSONL por chat y un índice con sus metadatos.
+
+    - `save` solo escribe las filas nuevas del historial (las ya persistidas se cuentan en el índice);
+      si el historial ha encogido, el fichero del chat se reescribe entero.
+    - `list_chats` lee únicamente `index.json` (título, última actualización, nº de mensajes y tamaño),
+      sin recorrer el directorio.
+    - Los chats antiguos en `.pkl` se registran en el índice al crearlo y se migran a JSONL al cargarlos.
+    - Las fechas (p.ej. el `timestamp` de cada fila) se guardan en ISO 8601 con una etiqueta de tipo y se
+      restauran como datetime/date; los escalares de numpy se guardan como su valor de Python. Cualquier
+      otro tipo no serializable en JSON hace fallar `save` (TypeError) sin escribir nada, en lugar de
+      guardarse como texto y volver distinto al cargarlo.
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.root / self.INDEX_FILE
+        self._index = None
+        self._index_mtime = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_chat_id():
+        """Identificador único para un chat nuevo (ordenable por fecha de creación)."""
+        return f"chat_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    def list_chats(self):
+        """Devuelve [(chat_id, metadatos)] ordenados del más reciente al más antiguo."""
+        with self._lock:
+            index = self._read_index()
+        return sorted(index.items(), key=lambda item: item[1]['updated'], reverse=True)
+
+    def save(self, chat_id, history):
+        """Añade al chat las filas de `history` que aún no están guardadas (TypeError si alguna no es serializable)."""
+        with self._lock:
+            index = self._read_index()
+            meta = index.get(chat_id)
+            path = self._chat_path(chat_id)
+            persisted = meta['n_messages'] if meta is not None and not meta.get('legacy') and path.exists() else 0
+            mode = 'a'
+            if persisted > len(history):
+                persisted, mode = 0, 'w'
+            elif persisted == 0:
+                mode = 'w'
+            # Se serializa todo antes de abrir el fichero: un valor no soportado no deja el chat a medias
+            lines = [json.dumps(row, ensure_ascii=False, default=_encode) + '\n' for row in history[persisted:]]
+            if lines or mode == 'w':
+                with open(path, mode, encoding='utf-8') as f:
+                    f.writelines(lines)
+            title = meta['title'] if meta is not None and not meta.get('legacy') else self._title(history, chat_id)
+            legacy_path = self.root / f'{chat_id}.pkl'
+            if legacy_path.exists():
+                legacy_path.unlink()
+            index[chat_id] = {'title': title, 'updated': time.time(), 'n_messages': len(history), 'size': path.stat().st_size}
+            self._write_index(index)
+
+    def load(self, chat_id):
+        """Carga el historial completo de un chat (migrando los `.pkl` antiguos)."""
+        path = self._chat_path(chat_id)
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                return [json.loads(line, object_hook=_decode) for line in f if line.strip()]
+        legacy_path = self.root / f'{chat_id}.pkl'
+        if legacy_path.exists():
+            with open(legacy_path, 'rb') as f:
+                history = pickle.load(f)
+            try:
+                self.save(chat_id, history)
+            except TypeError as e:
+                # Se conserva el .pkl: el chat se sigue pudiendo abrir aunque no se pueda migrar
+                logger.warning(f"No se puede migrar el chat {chat_id} a JSONL: {e}")
+            return history
+        return []
+
+    def delete(self, chat_id):
+        with self._lock:
+            index = self._read_index()
+            index.pop(chat_id, None)
+            for path in (self._chat_path(chat_id), self.root / f'{chat_id}.pkl'):
+                if path.exists():
+                    path.unlink()
+            self._write_index(index)
+
+    def _chat_path(self, chat_id):
+        return self.root / f'{chat_id}.jsonl'
+
+    def _read_index(self):
+        if not self._index_path.exists():
+            self._index = self._build_legacy_index()
+            self._write_index(self._index)
+            return self._index
+        mtime = self._index_path.stat().st_mtime_ns
+        if self._index is None or mtime != self._index_mtime:
+            with open(self._index_path, encoding='utf-8') as f:
+                self._index = json.load(f)
+            self._index_mtime = mtime
+        return self._index
+
+    def _write_index(self, index):
+        tmp_path = self._index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self._index_path)
+        self._index = index
+        self._index_mtime = self._index_path.stat().st_mtime_ns
+
+    def _build_legacy_index(self):
+        # Sin abrir los pickles: el título definitivo se calcula al migrarlos
+        index = {}
+        for path in self.root.glob('*.pkl'):
+            stat = path.stat()
+            index[path.stem] = {'title': path.stem, 'updated': stat.st_mtime, 'n_messages': None, 'size': stat.st_size, 'legacy': True}
+        return index
+
+    @staticmethod
+    def _title(history, default):
+        for row in history:
+            if row.get('role') == 'user' and isinstance(row.get('content'), str) and row['content'].strip():
+                text = row['content'].strip().splitlines()[0]
+                return text[:60] + ('...' if len(text) > 60 else '')
+        return default
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Valor no serializable en el historial: {type(value).__name__}")
+
+
+def _decode(obj):
+    if len(obj) == 1 and '$datetime' in obj:
+        return datetime.datetime.fromisoformat(obj['$datetime'])
+    if len(obj) == 1 and '$date' in obj:
+        return datetime.date.fromisoformat(obj['$date'])
+    return obj
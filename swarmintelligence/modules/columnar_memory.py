@@ -0,0 +1,123 @@
+import datetime
+import numpy as np
+import pandas as pd
+from eigenlib.genai.memory import Memory
+
+
+class ColumnarMemory(Memory):
+    """
+    Memoria de conversación con almacenamiento columnar y appends O(1) amortizados.
+
+    Cada columna es una lista de Python y se mantiene un índice de posiciones por canal,
+    de modo que construir el prompt de un agente solo recorre las filas de su canal.
+    `.history` sigue disponible como DataFrame (se materializa bajo demanda y se cachea
+    hasta el siguiente `log`) y admite asignación para mantener la compatibilidad con
+    `Main.predict` y el frontend.
+    """
+
+    BASE_COLUMNS = ['timestamp', 'channel', 'role', 'modality', 'content', 'steering']
+
+    def __init__(self, history=None):
+        self._reset()
+        super().__init__()
+        if history is not None:
+            self.history = history
+
+    def log(self, role=None, modality=None, content=None, channel=None, steering=False, **kwargs):
+        """Añade una entrada. Como en Memory, las entradas sin contenido (p.ej. un turno del asistente solo con tool calls) se guardan con content=None."""
+        record = {'timestamp': datetime.datetime.now(), 'channel': channel, 'role': role, 'modality': modality, 'content': content, 'steering': steering}
+        record.update(kwargs)
+        self._append(record)
+
+    def channel_history(self, channel, use_steering=True):
+        """
+        Devuelve como DataFrame solo las filas de `channel`, sin filtrar el historial completo.
+
+        Cada vista (channel, use_steering) se construye una vez a partir del índice y después
+        se mantiene de forma incremental en `log`, sobre arrays con capacidad de reserva. El
+        DataFrame se crea sin copiar esos arrays (coste por número de columnas, no de filas) y se
+        cachea hasta que llega una nueva entrada a esa vista; las columnas de la vista son de tipo object.
+
+        El DataFrame devuelto es compartido y de solo lectura: quien necesite modificarlo debe
+        trabajar sobre una copia (`.copy()`), o alteraría las siguientes lecturas de la vista.
+        """
+        key = (channel, use_steering)
+        view = self._views.get(key)
+        if view is None:
+            positions = self._channel_index.get(channel, [])
+            if not use_steering:
+                steering = self._columns['steering']
+                positions = [i for i in positions if not steering[i]]
+            capacity = max(16, 2 * len(positions))
+            view = {'arrays': {col: _object_array([values[i] for i in positions], capacity) for col, values in self._columns.items()},
+                    'size': len(positions), 'frame': None}
+            self._views[key] = view
+        if view['frame'] is None:
+            size = view['size']
+            view['frame'] = pd.DataFrame({col: pd.Series(array[:size], dtype=object, copy=False) for col, array in view['arrays'].items()}, copy=False)
+        return view['frame']
+
+    def to_records(self):
+        """Equivalente a `history.to_dict(orient='records')` sin construir el DataFrame."""
+        columns = list(self._columns.items())
+        return [{col: values[i] for col, values in columns} for i in range(self._n_rows)]
+
+    def __len__(self):
+        return self._n_rows
+
+    @property
+    def history(self):
+        """DataFrame completo, cacheado hasta el siguiente `log` (de solo lectura, como las vistas de canal)."""
+        if self._history_cache is None:
+            self._history_cache = pd.DataFrame(self._columns)
+        return self._history_cache
+
+    @history.setter
+    def history(self, value):
+        records = value.to_dict(orient='records') if isinstance(value, pd.DataFrame) else list(value or [])
+        self._reset()
+        if isinstance(value, pd.DataFrame):
+            for col in value.columns:
+                self._add_column(col)
+        for record in records:
+            self._append(record)
+
+    def _reset(self):
+        self._columns = {col: [] for col in self.BASE_COLUMNS}
+        self._channel_index = {}
+        self._views = {}
+        self._n_rows = 0
+        self._history_cache = None
+
+    def _add_column(self, col):
+        if col not in self._columns:
+            self._columns[col] = [None] * self._n_rows
+            for view in self._views.values():
+                view['arrays'][col] = np.empty(len(view['arrays']['channel']), dtype=object)
+
+    def _append(self, record):
+        for col in record:
+            self._add_column(col)
+        for col, values in self._columns.items():
+            values.append(record.get(col, False if col == 'steering' else None))
+        self._channel_index.setdefault(record.get('channel'), []).append(self._n_rows)
+        for (channel, use_steering), view in self._views.items():
+            if channel == record.get('channel') and (use_steering or not record.get('steering')):
+                size = view['size']
+                if size == len(view['arrays']['channel']):
+                    # Capacidad agotada: se duplica (append O(1) amortizado)
+                    view['arrays'] = {col: _object_array(array, 2 * size) for col, array in view['arrays'].items()}
+                for col, array in view['arrays'].items():
+                    array[size] = self._columns[col][-1]
+                view['size'] = size + 1
+                view['frame'] = None
+        self._n_rows += 1
+        self._history_cache = None
+
+
+def _object_array(values, capacity):
+    # Asignación elemento a elemento: numpy no debe interpretar listas o dicts como dimensiones
+    array = np.empty(capacity, dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
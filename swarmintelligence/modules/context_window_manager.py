@@ -0,0 +1,130 @@
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+import pandas as pd
+from swarmintelligence.modules.columnar_memory import ColumnarMemory
+
+
+class ContextWindowManager:
+    """
+    Limita el historial que se envía al LLM a un presupuesto de tokens.
+
+    Se aplica por niveles, deteniéndose en cuanto el historial cabe en `token_budget`:
+    1. El system prompt inicial y los últimos `keep_last_turns` turnos se conservan literales.
+    2. Los resultados de tools anteriores a esos turnos se sustituyen por un stub corto.
+    3. El tramo antiguo se resume con el LLM en un resumen acumulado. Los resúmenes se cachean
+       por prefijo de conversación, de modo que cada turno solo resume las filas nuevas.
+    """
+
+    SUMMARY_PROMPT = ("Resume de forma concisa la conversación entre un usuario y un asistente que se te proporciona. "
+                      "Conserva hechos, decisiones, datos concretos, identificadores y tareas pendientes. "
+                      "Si se incluye un resumen previo, intégralo en el nuevo resumen.")
+
+    def __init__(self, token_budget=60000, keep_last_turns=4, tool_stub_length=200, summary_model=None, encoding='o200k_base', max_cached_summaries=256, summary_temperature=0):
+        self.token_budget = token_budget
+        self.keep_last_turns = keep_last_turns
+        self.tool_stub_length = tool_stub_length
+        self.summary_model = summary_model
+        # Temperatura baja: los resúmenes se cachean y deben ser reproducibles
+        self.summary_temperature = summary_temperature
+        self.encoding = encoding
+        self.max_cached_summaries = max_cached_summaries
+        self.LLM = None
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+        self._count_tokens = functools.lru_cache(maxsize=8192)(self._count_tokens)
+
+    def initialize(self, llm=None, model=None):
+        """Asigna el cliente LLM (y el modelo por defecto) con el que se generan los resúmenes."""
+        self.LLM = llm
+        self.summary_model = self.summary_model or model
+        return self
+
+    def run(self, history):
+        """Devuelve una versión de `history` (DataFrame) que cabe en el presupuesto de tokens."""
+        records = history.to_dict(orient='records')
+        if self._total_tokens(records) <= self.token_budget:
+            return history
+        head, middle, recent = self._split(records)
+        if not middle:
+            return history
+
+        # Nivel 2: stubs para resultados de tools antiguos, aprovechando el mayor resumen cacheado
+        stubbed = [self._stub(r) for r in middle]
+        fingerprints = self._fingerprints(middle)
+        n_summarized, summary = self._cached_summary(fingerprints)
+        candidate = head + self._summary_rows(summary, middle) + stubbed[n_summarized:] + recent
+        if self._total_tokens(candidate) <= self.token_budget or self.LLM is None:
+            return pd.DataFrame(candidate)
+
+        # Nivel 3: resumen acumulado de todo el tramo antiguo
+        summary = self._summarize(summary, stubbed[n_summarized:])
+        with self._lock:
+            self._summaries[fingerprints[-1]] = (len(middle), summary)
+            while len(self._summaries) > self.max_cached_summaries:
+                self._summaries.popitem(last=False)
+        return pd.DataFrame(head + self._summary_rows(summary, middle) + recent)
+
+    def _split(self, records):
+        n_head = 0
+        while n_head < len(records) and records[n_head]['role'] == 'system' and not records[n_head].get('steering'):
+            n_head += 1
+        user_positions = [i for i in range(n_head, len(records)) if records[i]['role'] == 'user']
+        if len(user_positions) <= self.keep_last_turns:
+            return records[:n_head], [], records[n_head:]
+        start = user_positions[-self.keep_last_turns] if self.keep_last_turns > 0 else len(records)
+        return records[:n_head], records[n_head:start], records[start:]
+
+    def _stub(self, record):
+        content = record['content']
+        if record['role'] != 'tool' or not isinstance(content, dict):
+            return record
+        result = str(content.get('tool_call_result', ''))
+        if len(result) <= self.tool_stub_length:
+            return record
+        stub = f"[RESULTADO OMITIDO: {len(result)} caracteres] " + result[:self.tool_stub_length]
+        return dict(record, content=dict(content, tool_call_result=stub))
+
+    def _fingerprints(self, records):
+        # Hash encadenado: fingerprints[i] identifica el prefijo records[:i + 1]
+        fingerprints = []
+        digest = hashlib.sha1()
+        for record in records:
+            digest.update(json.dumps([record['role'], record['content']], default=str, ensure_ascii=False).encode('utf-8'))
+            fingerprints.append(digest.copy().hexdigest())
+        return fingerprints
+
+    def _cached_summary(self, fingerprints):
+        with self._lock:
+            for fingerprint in reversed(fingerprints):
+                if fingerprint in self._summaries:
+                    self._summaries.move_to_end(fingerprint)
+                    return self._summaries[fingerprint]
+        return 0, None
+
+    def _summary_rows(self, summary, middle):
+        if summary is None:
+            return []
+        return [dict(middle[0], role='system', modality='text', steering=False, content='Resumen de la conversación anterior: ' + summary)]
+
+    def _summarize(self, previous_summary, records):
+        transcript = '\n'.join(f"{r['role'].upper()}: {r['content']}" for r in records)
+        if previous_summary is not None:
+            transcript = f"RESUMEN PREVIO: {previous_summary}\n\n{transcript}"
+        memory = ColumnarMemory()
+        memory.log(role='system', modality='text', content=self.SUMMARY_PROMPT, channel='CONTEXT_SUMMARY')
+        memory.log(role='user', modality='text', content=transcript, channel='CONTEXT_SUMMARY')
+        return self.LLM.run(memory.history, model=self.summary_model, temperature=self.summary_temperature, tools_dict=None, response_format=None, tool_choice=None)
+
+    def _total_tokens(self, records):
+        return sum(self._count_tokens(str(r['content'])) for r in records)
+
+    def _count_tokens(self, text):
+        try:
+            import tiktoken
+            return len(tiktoken.get_encoding(self.encoding).encode(text, disallowed_special=()))
+        except Exception:
+            # Sin tiktoken (o sin acceso a la codificación) se usa la aproximación de 4 caracteres por token
+            return len(text) // 4 + 1
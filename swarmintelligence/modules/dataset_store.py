@@ -0,0 +1,79 @@
+import json
+import os
+import pandas as pd
+
+
+class DatasetStore:
+    """
+    Lectura/escritura de datasets del pipeline en formatos columnares (Parquet o Arrow/Feather).
+
+    Mantiene la interfaz de DatasetIO (`create(path, dataframe, partition_format, overwrite)` y
+    `read(path)`) y la misma convención de rutas: cada dataset es un directorio. Las columnas con
+    valores anidados (dicts/listas de los historiales) o con tipos mezclados se guardan como JSON y
+    se marcan en los metadatos del esquema, de modo que se restauran sin pérdida al leer.
+    Las lecturas usan memory-map para evitar copias. `partition_format='xlsx'` y los datasets
+    antiguos que no tienen fichero columnar se delegan en DatasetIO.
+    """
+
+    FILE_NAMES = {'parquet': 'data.parquet', 'feather': 'data.feather'}
+    JSON_COLUMNS_KEY = b'swarmintelligence.json_columns'
+
+    def create(self, path, dataframe, partition_format='parquet', overwrite=True):
+        # `read` prioriza los ficheros columnares: se eliminan siempre, también al cambiar a un formato de DatasetIO
+        existing = [os.path.join(path, f) for f in self.FILE_NAMES.values() if os.path.exists(os.path.join(path, f))]
+        if existing and not overwrite:
+            raise FileExistsError(f"El dataset {path} ya existe y overwrite=False")
+        for file in existing:
+            os.remove(file)
+        if partition_format not in self.FILE_NAMES:
+            from eigenlib.utils.dataset_io import DatasetIO
+            return DatasetIO().create(path=path, dataframe=dataframe, partition_format=partition_format, overwrite=overwrite)
+        import pyarrow as pa
+        os.makedirs(path, exist_ok=True)
+
+        dataframe, json_columns = self._encode(dataframe)
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[self.JSON_COLUMNS_KEY] = json.dumps(json_columns).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+
+        file = os.path.join(path, self.FILE_NAMES[partition_format])
+        if partition_format == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, file)
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, file)
+
+    def read(self, path):
+        file_parquet = os.path.join(path, self.FILE_NAMES['parquet'])
+        file_feather = os.path.join(path, self.FILE_NAMES['feather'])
+        if os.path.exists(file_parquet):
+            import pyarrow.parquet as pq
+            table = pq.read_table(file_parquet, memory_map=True)
+        elif os.path.exists(file_feather):
+            import pyarrow.feather as feather
+            table = feather.read_table(file_feather, memory_map=True)
+        else:
+            from eigenlib.utils.dataset_io import DatasetIO
+            return DatasetIO().read(path=path)
+        json_columns = json.loads((table.schema.metadata or {}).get(self.JSON_COLUMNS_KEY, b'[]'))
+        return self._decode(table.to_pandas(), json_columns)
+
+    def _encode(self, dataframe):
+        dataframe = dataframe.copy()
+        json_columns = []
+        for col in dataframe.columns:
+            if dataframe[col].dtype != object:
+                continue
+            types = {type(v) for v in dataframe[col] if v is not None and not (isinstance(v, float) and pd.isna(v))}
+            if len(types) <= 1 and not types & {dict, list, tuple}:
+                continue
+            json_columns.append(str(col))
+            dataframe[col] = [None if v is None else json.dumps(v, default=str, ensure_ascii=False) for v in dataframe[col]]
+        return dataframe, json_columns
+
+    def _decode(self, dataframe, json_columns):
+        for col in json_columns:
+            dataframe[col] = pd.Series([json.loads(v) if isinstance(v, str) else None for v in dataframe[col]], index=dataframe.index, dtype=object)
+        return dataframe
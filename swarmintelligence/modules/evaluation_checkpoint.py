@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import pandas as pd
+from swarmintelligence.modules.dataset_store import DatasetStore
+
+
+class EvaluationCheckpoint:
+    """
+    Almacén append-only de episodios ya simulados para reanudar evaluaciones interrumpidas.
+
+    Los episodios terminados se acumulan en memoria y se vuelcan como una nueva parte
+    (`part-XXXXX/history` y `part-XXXXX/config`, en Parquet) cada `flush_every` episodios o cada
+    `flush_interval` segundos. Las partes existentes nunca se reescriben. La parte de config se
+    escribe al final y actúa como marca de parte completa, así que un volcado interrumpido se ignora.
+
+    Con `fingerprint` (ver `EvaluationCheckpoint.fingerprint`) la huella de los datos de entrada y de
+    la configuración se guarda junto a las partes, y no se reanuda un checkpoint con otra huella:
+    las partes de una ejecución anterior con otros datos no deben mezclarse con los resultados nuevos.
+    """
+
+    FINGERPRINT_FILE = 'fingerprint.json'
+
+    def __init__(self, path, flush_every=10, flush_interval=60, partition_format='parquet', fingerprint=None):
+        self.path = path
+        self.fingerprint_value = fingerprint
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.partition_format = partition_format
+        self._histories = []
+        self._configs = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(*objects):
+        """
+        Huella estable de los datos de entrada (DataFrames) y de la configuración de agentes/usuarios
+        (sus atributos escalares: modelo, prompt, temperatura...).
+        """
+        digest = hashlib.sha256()
+        for obj in objects:
+            if isinstance(obj, pd.DataFrame):
+                description = {'columns': [str(c) for c in obj.columns], 'records': obj.to_dict(orient='records')}
+            else:
+                attributes = vars(obj) if hasattr(obj, '__dict__') else {}
+                description = {'class': type(obj).__name__,
+                               'attributes': {k: v for k, v in attributes.items() if isinstance(v, (str, int, float, bool, type(None)))}}
+            digest.update(json.dumps(description, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+
+    def completed_ids(self):
+        """episode_id de los episodios ya guardados en el checkpoint."""
+        self._check_fingerprint()
+        return {episode_id for config in self._read_parts('config') for episode_id in config['episode_id']}
+
+    def add(self, history, config):
+        """Registra un episodio terminado y vuelca si se alcanza el tamaño o el intervalo."""
+        with self._lock:
+            self._histories.append(history)
+            self._configs.append(config)
+            if len(self._configs) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def load(self):
+        """Devuelve (history, config) con todos los episodios guardados."""
+        self._check_fingerprint()
+        histories = self._read_parts('history')
+        configs = self._read_parts('config')
+        history = pd.concat(histories, ignore_index=True) if histories else pd.DataFrame()
+        config = pd.concat(configs, ignore_index=True) if configs else pd.DataFrame()
+        return history, config
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._configs:
+            return
+        parts = self._completed_parts()
+        if not parts and self.fingerprint_value is not None:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, self.FINGERPRINT_FILE), 'w') as f:
+                json.dump({'fingerprint': self.fingerprint_value}, f)
+        part = os.path.join(self.path, f'part-{len(parts):05d}')
+        shutil.rmtree(part, ignore_errors=True)
+        DatasetStore().create(path=os.path.join(part, 'history'), dataframe=pd.concat(self._histories, ignore_index=True), partition_format=self.partition_format, overwrite=True)
+        DatasetStore().create(path=os.path.join(part, 'config'), dataframe=pd.concat(self._configs, ignore_index=True), partition_format=self.partition_format, overwrite=True)
+        self._histories, self._configs = [], []
+
+    def _check_fingerprint(self):
+        if self.fingerprint_value is None or not self._completed_parts():
+            return
+        try:
+            with open(os.path.join(self.path, self.FINGERPRINT_FILE)) as f:
+                stored = json.load(f).get('fingerprint')
+        except FileNotFoundError:
+            stored = None
+        if stored != self.fingerprint_value:
+            raise ValueError(f"El checkpoint {self.path} pertenece a otra ejecución (datos o configuración distintos). "
+                             f"Bórralo (EvaluationCheckpoint.clear) para empezar de cero.")
+
+    def _completed_parts(self):
+        if not os.path.isdir(self.path):
+            return []
+        parts = sorted(p for p in os.listdir(self.path) if p.startswith('part-'))
+        return [p for p in parts if any(os.path.exists(os.path.join(self.path, p, 'config', f)) for f in DatasetStore.FILE_NAMES.values())]
+
+    def _read_parts(self, name):
+        return [DatasetStore().read(path=os.path.join(self.path, part, name)) for part in self._completed_parts()]
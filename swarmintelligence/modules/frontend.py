@@ -1,22 +1,76 @@
 import streamlit as st
 import importlib
-import pickle
 import datetime
+import functools
+import json
 import os
+import sys
 from pathlib import Path
-from eigenlib.utils.setup import Setup
-from swarmintelligence.main import Main
-
-Setup(verbose=True).init()
+from swarmintelligence.modules.chat_store import ChatStore
+
+
+@st.cache_resource(show_spinner=False)
+def _setup():
+    """Inicialización del entorno una sola vez por proceso (no en cada rerun)."""
+    from eigenlib.utils.setup import Setup
+    Setup(verbose=True).init()
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _load_agent(config_path, config_name, config_mtime):
+    """
+    Config y Main ya inicializados, compartidos entre reruns, sesiones y pestañas.
+
+    La clave incluye el mtime del fichero de configuración: al editarlo se construye un agente nuevo.
+    Devuelve (config, main_class, history inicial); cada sesión trabaja con su propia copia del history.
+    """
+    from swarmintelligence.main import Main
+    if str(config_path) not in sys.path:
+        sys.path.insert(0, str(config_path))
+    # Recargar el módulo para recoger los cambios del fichero si ya estaba importado
+    module = importlib.reload(importlib.import_module(config_name))
+    cfg_object = getattr(module, "Config")()
+    config = {
+        'initialize': cfg_object.initialize(),
+        'predict': cfg_object.predict(),
+    }
+    main_class = Main()
+    updated_cfg = main_class.initialize(config['initialize'].copy())
+    return config, main_class, updated_cfg.get('history', [])
+
+
+@functools.lru_cache(maxsize=5000)
+def _render_text(text):
+    """
+    Texto de un mensaje listo para st.markdown, cacheado en memoria por contenido.
+
+    Se usa lru_cache y no st.cache_data: la clave es el propio str (hash cacheado por Python) y se
+    evita hashear y serializar el valor en cada rerun. Solo se cachea la conversión, no la llamada a Streamlit.
+    """
+    return text.replace('\n', '  \n')
+
+
+@st.cache_data(max_entries=5000, show_spinner=False)
+def _render_json(content):
+    """JSON indentado de una tool call o resultado (cacheado por contenido)."""
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except ValueError:
+            return content
+    return json.dumps(content, indent=2, ensure_ascii=False, default=str)
 
 
 class SimpleChatInterface:
-    def __init__(self):
+    def __init__(self, turns_per_page=10):
+        self.turns_per_page = turns_per_page
         self.HISTORY_DIR = Path("data/raw/chat_history")
         self.HISTORY_DIR.mkdir(exist_ok=True)
+        self.chat_store = ChatStore(self.HISTORY_DIR)
 
     def run(self):
         st.set_page_config(page_title="Chat Assistant", layout="wide")
+        _setup()
         st.title("🤖 Chat Assistant")
 
         # Sidebar para configuración
@@ -40,10 +94,15 @@ class SimpleChatInterface:
                         key="config_selector"
                     )
 
-                    if st.button("🚀 Cargar Configuración"):
+                    col1, col2 = st.columns(2)
+                    if col1.button("🚀 Cargar Configuración"):
                         self._load_config(config_path, selected_config)
                         st.success(f"Configuración '{selected_config}' cargada")
                         st.rerun()
+                    if col2.button("♻️ Recargar agente", help="Descarta los agentes cacheados y los vuelve a construir"):
+                        _load_agent.clear()
+                        st.session_state.pop('main_class', None)
+                        st.rerun()
                 else:
                     st.warning("No se encontraron configuraciones en la ruta")
             elif config_path:
@@ -55,23 +114,30 @@ class SimpleChatInterface:
             st.header("💬 Chats")
             if st.button("➕ Nuevo Chat"):
                 st.session_state.history = []
-                st.session_state.current_chat_file = None
+                st.session_state.current_chat_id = None
+                st.session_state.visible_turns = self.turns_per_page
                 st.rerun()
 
-            # Cargar chats guardados
+            # Cargar chats guardados (listado desde el índice, sin recorrer el directorio)
             saved_chats = self._get_saved_chats()
             if saved_chats:
-                selected_chat = st.selectbox("Cargar chat:", saved_chats)
+                chat_meta = dict(saved_chats)
+                selected_chat = st.selectbox(
+                    "Cargar chat:",
+                    [chat_id for chat_id, _ in saved_chats],
+                    format_func=lambda chat_id: self._format_chat_label(chat_meta[chat_id])
+                )
                 col1, col2 = st.columns(2)
                 if col1.button("📂 Cargar"):
                     st.session_state.history = self._load_chat_history(selected_chat)
-                    st.session_state.current_chat_file = selected_chat
+                    st.session_state.current_chat_id = selected_chat
+                    st.session_state.visible_turns = self.turns_per_page
                     st.rerun()
                 if col2.button("🗑️ Borrar"):
                     self._delete_chat_history(selected_chat)
-                    if st.session_state.get('current_chat_file') == selected_chat:
+                    if st.session_state.get('current_chat_id') == selected_chat:
                         st.session_state.history = []
-                        st.session_state.current_chat_file = None
+                        st.session_state.current_chat_id = None
                     st.rerun()
 
             st.divider()
@@ -88,14 +154,17 @@ class SimpleChatInterface:
         if 'history' not in st.session_state:
             st.session_state.history = []
 
-        if 'main_class' not in st.session_state and 'config' in st.session_state:
+        if 'main_class' not in st.session_state and 'config_name' in st.session_state:
             with st.spinner("Inicializando asistente..."):
                 try:
-                    st.session_state.main_class = Main()
-                    updated_cfg = st.session_state.main_class.initialize(
-                        st.session_state.config['initialize'].copy()
-                    )
-                    st.session_state.history = updated_cfg.get('history', [])
+                    # Agente compartido (cache_resource): solo se construye si no hay uno caliente
+                    config_path = st.session_state.config_path
+                    config_name = st.session_state.config_name
+                    config_mtime = (Path(config_path) / f"{config_name}.py").stat().st_mtime_ns
+                    config, main_class, history = _load_agent(config_path, config_name, config_mtime)
+                    st.session_state.config = config
+                    st.session_state.main_class = main_class
+                    st.session_state.history = [dict(message) for message in history]
                     st.toast("✅ Asistente inicializado")
                 except Exception as e:
                     st.error(f"Error en inicialización: {e}")
@@ -104,22 +173,10 @@ class SimpleChatInterface:
         if 'config' not in st.session_state:
             st.info("👈 Selecciona una configuración en el panel lateral para comenzar")
         else:
-            # Mostrar historial
+            # Mostrar historial (solo los últimos turnos; el coste no depende de la longitud del chat)
             chat_container = st.container(height=1600)
             with chat_container:
-                for message in st.session_state.history:
-                    role = message.get("role", "user")
-                    content = message.get("content", "")
-                    modality = message.get("modality", None)
-                    avatar = "🧑‍💻" if role == "user" else "🤖"
-
-                    with st.chat_message(role, avatar=avatar):
-                        if modality == 'img':
-                            st.image(content, width=250)
-                        elif modality == 'tool_call' or role == 'tool':
-                            st.json(content, expanded=False)
-                        else:
-                            self._display_message(content)
+                self._render_history(st.session_state.history)
 
             # Input del usuario
             if prompt := st.chat_input("Escribe tu mensaje aquí..."):
@@ -147,24 +204,89 @@ class SimpleChatInterface:
                     'img': img_src
                 })
 
-                with st.spinner("🤔 Pensando..."):
-                    try:
-                        updated = st.session_state.main_class.predict(call_cfg)
-                        if updated:
-                            st.session_state.history = updated.get('history', [])
-
-                            # Guardar chat automáticamente
-                            if st.session_state.get('current_chat_file') is None:
-                                ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                                st.session_state.current_chat_file = f"chat_{ts}.pkl"
-
-                            self._save_chat_history(
-                                st.session_state.history,
-                                st.session_state.current_chat_file
-                            )
-                            st.rerun()
-                    except Exception as e:
-                        st.error(f"❌ Error procesando mensaje: {e}")
+                with chat_container:
+                    with st.chat_message("user", avatar="🧑‍💻"):
+                        self._display_message(prompt)
+                    with st.chat_message("assistant", avatar="🤖"):
+                        tool_status = st.status("🤔 Pensando...", expanded=False)
+                        try:
+                            # predict_stream actualiza call_cfg (history, agent_message) al terminar el turno
+                            events = st.session_state.main_class.predict_stream(call_cfg)
+                            st.write_stream(self._stream_deltas(events, tool_status))
+                            tool_status.update(label="✅ Completado", state="complete")
+                            updated = call_cfg
+                        except Exception as e:
+                            tool_status.update(label="❌ Error", state="error")
+                            st.error(f"❌ Error procesando mensaje: {e}")
+                            updated = None
+
+                if updated:
+                    st.session_state.history = updated.get('history', [])
+
+                    # Guardar chat automáticamente (solo se añaden los mensajes nuevos)
+                    if st.session_state.get('current_chat_id') is None:
+                        st.session_state.current_chat_id = ChatStore.new_chat_id()
+
+                    self._save_chat_history(
+                        st.session_state.history,
+                        st.session_state.current_chat_id
+                    )
+                    st.rerun()
+
+    def _render_history(self, history):
+        """Renderiza los últimos `visible_turns` turnos, agrupando las tool calls consecutivas."""
+        visible_turns = st.session_state.setdefault('visible_turns', self.turns_per_page)
+        user_positions = [i for i, message in enumerate(history) if message.get("role") == "user"]
+        start = user_positions[-visible_turns] if len(user_positions) > visible_turns else 0
+        if start > 0:
+            hidden_turns = len(user_positions) - visible_turns
+            if st.button(f"⬆️ Cargar anteriores ({hidden_turns} turnos ocultos)", key="load_older"):
+                st.session_state.visible_turns += self.turns_per_page
+                st.rerun()
+
+        i = start
+        while i < len(history):
+            message = history[i]
+            role = message.get("role", "user")
+            modality = message.get("modality", None)
+            if modality == 'tool_call' or role == 'tool':
+                # Grupo de tool calls/resultados consecutivos
+                j = i
+                while j < len(history) and (history[j].get("modality") == 'tool_call' or history[j].get("role") == 'tool'):
+                    j += 1
+                self._display_tool_group(history[i:j], key=f"tools_{i}")
+                i = j
+                continue
+
+            content = message.get("content", "")
+            avatar = "🧑‍💻" if role == "user" else "🤖"
+            with st.chat_message(role, avatar=avatar):
+                if modality == 'img':
+                    st.image(content, width=250)
+                else:
+                    self._display_message(content)
+            i += 1
+
+    def _display_tool_group(self, messages, key):
+        """Grupo plegado de tool calls: el JSON solo se renderiza al desplegarlo."""
+        n_calls = sum(1 for message in messages if message.get("modality") == 'tool_call')
+        names = [message["content"]["function"]["name"] for message in messages
+                 if message.get("modality") == 'tool_call' and isinstance(message.get("content"), dict) and "function" in message["content"]]
+        with st.chat_message("assistant", avatar="🔧"):
+            if st.toggle(f"🔧 {n_calls} tool call(s): {', '.join(names)}", key=key):
+                for message in messages:
+                    st.code(_render_json(message.get("content", "")), language='json')
+
+    def _stream_deltas(self, events, tool_status):
+        """Convierte los eventos de predict_stream en deltas de texto para st.write_stream."""
+        for event in events:
+            if event['type'] == 'text_delta':
+                yield event['delta']
+            elif event['type'] == 'tool_call_start':
+                tool_status.update(label=f"🔧 {event['tool_call']['function']['name']}...", state="running")
+                tool_status.write(f"🔧 {event['tool_call']['function']['name']}")
+            elif event['type'] == 'tool_call_end':
+                tool_status.write(f"✔️ {event['tool_call']['function']['name']}")
 
     def _get_available_configs(self, config_path):
         """Obtiene las configuraciones disponibles en la ruta especificada."""
@@ -178,71 +300,57 @@ class SimpleChatInterface:
             return []
 
     def _load_config(self, config_path, config_name):
-        """Carga la configuración seleccionada."""
-        try:
-            # Agregar la ruta al sys.path temporalmente
-            import sys
-            if str(config_path) not in sys.path:
-                sys.path.insert(0, str(config_path))
-
-            # Importar el módulo de configuración
-            module = importlib.import_module(config_name)
-            cfg_object = getattr(module, "Config")()
+        """Selecciona la configuración; el agente se obtiene (o construye) en el siguiente rerun."""
+        if not (Path(config_path) / f"{config_name}.py").exists():
+            st.error(f"Error cargando configuración: no existe '{config_name}'")
+            return
+        st.session_state.config_path = config_path
+        st.session_state.config_name = config_name
 
-            st.session_state.config = {
-                'initialize': cfg_object.initialize(),
-                'predict': cfg_object.predict(),
-            }
-            st.session_state.config_path = config_path
-
-            # Limpiar instancia anterior si existe
-            if 'main_class' in st.session_state:
-                del st.session_state.main_class
-
-        except Exception as e:
-            st.error(f"Error cargando configuración: {e}")
+        # Limpiar instancia anterior si existe
+        st.session_state.pop('main_class', None)
+        st.session_state.pop('config', None)
 
     def _get_saved_chats(self):
-        """Obtiene la lista de chats guardados."""
-        return sorted([f.name for f in self.HISTORY_DIR.glob("*.pkl")], reverse=True)
+        """Obtiene la lista de chats guardados con sus metadatos, del más reciente al más antiguo."""
+        return self.chat_store.list_chats()
+
+    def _format_chat_label(self, meta):
+        """Etiqueta de un chat en el selector: título, fecha y nº de mensajes."""
+        updated = datetime.datetime.fromtimestamp(meta['updated']).strftime("%Y-%m-%d %H:%M")
+        n_messages = meta.get('n_messages')
+        return f"{meta['title']} · {updated}" + (f" · {n_messages} msgs" if n_messages is not None else "")
 
-    def _save_chat_history(self, history, filename):
-        """Guarda el historial del chat."""
-        with open(self.HISTORY_DIR / filename, "wb") as f:
-            pickle.dump(history, f)
+    def _save_chat_history(self, history, chat_id):
+        """Guarda los mensajes nuevos del chat."""
+        self.chat_store.save(chat_id, history)
 
-    def _load_chat_history(self, filename):
+    def _load_chat_history(self, chat_id):
         """Carga el historial del chat."""
         try:
-            with open(self.HISTORY_DIR / filename, "rb") as f:
-                return pickle.load(f)
+            return self.chat_store.load(chat_id)
         except Exception as e:
             st.error(f"Error cargando chat: {e}")
             return []
 
-    def _delete_chat_history(self, filename):
+    def _delete_chat_history(self, chat_id):
         """Elimina un chat guardado."""
         try:
-            (self.HISTORY_DIR / filename).unlink()
-            st.success(f"Chat '{filename}' eliminado")
+            self.chat_store.delete(chat_id)
+            st.success(f"Chat '{chat_id}' eliminado")
         except Exception as e:
             st.error(f"Error eliminando chat: {e}")
 
     def _display_message(self, text):
-        """Muestra un mensaje en una caja escalable."""
-        text_length = len(str(text))
-        min_height = 50
+        """Muestra un mensaje; los largos van en una caja con scroll de altura fija."""
         max_height = 700
         max_text_length = 2000
 
-        if text_length < max_text_length:
-            height = int(min_height + (max_height - min_height) * (text_length / max_text_length))
+        if len(str(text)) < max_text_length:
+            st.markdown(_render_text(str(text)))
         else:
-            height = max_height
-
-        with st.container(height=height):
-            st.text(text)
-
+            with st.container(height=max_height):
+                st.markdown(_render_text(str(text)))
 
 if __name__ == '__main__':
     SimpleChatInterface().run()
\ No newline at end of file
@@ -1,9 +1,26 @@
 from eigenlib.genai.llm_client import LLMClient
-from eigenlib.genai.memory import Memory
+from swarmintelligence.modules.columnar_memory import ColumnarMemory
+from swarmintelligence.modules.llm_cache import CachedLLMClient
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import inspect
 import json
 
+
+def tool_calls_of(answer):
+    """
+    Normaliza una respuesta de LLMClient (`run` o un chunk de `stream`): devuelve la lista de tool
+    calls, o None si la respuesta es texto. El cliente devuelve un dict si hay una sola tool call
+    y una lista de dicts si hay varias; ambas formas se tratan igual a partir de aquí.
+    """
+    if isinstance(answer, dict):
+        return [answer]
+    if isinstance(answer, (list, tuple)) and answer:
+        return list(answer)
+    return None
+
 class GeneralAgent:
-    def __init__(self, system_prompt=None, model='o3', client='oai_2', temperature=1, tools=[]):
+    def __init__(self, system_prompt=None, model='o3', client='oai_2', temperature=1, tools=[], max_tool_workers=4, context_manager=None, llm_cache=None):
         self.id = 'GENERAL_AGENT'
         self.system_prompt = system_prompt
         self.model = model
@@ -12,41 +29,170 @@ class GeneralAgent:
         self.tool_choice = 'auto'
         self.use_steering = True
         self.tools = tools
+        self.max_tool_workers = max_tool_workers
+        self.context_manager = context_manager
+        self.llm_cache = llm_cache
 
-    def initialize(self, memory=Memory(), agent_config=None):
+    def initialize(self, memory=None, agent_config=None):
+        memory = memory if memory is not None else ColumnarMemory()
         self.tools_dict = {t.tool_name: t for t in self.tools}
         self.LLM = LLMClient(client=self.client)
+        if self.llm_cache is not None:
+            self.LLM = CachedLLMClient(self.LLM, self.llm_cache)
+        if self.context_manager is not None:
+            self.context_manager.initialize(llm=self.LLM, model=self.model)
         memory.log(role='system', modality='text', content=self.system_prompt, channel=self.id)
         return memory
 
     def call(self, memory=None, user_message=None, steering=None, **kwargs):
+        for event in self.stream(memory=memory, user_message=user_message, steering=steering, **kwargs):
+            pass
+        return event['memory'], event['answer']
+
+    def stream(self, memory=None, user_message=None, steering=None, **kwargs):
+        """
+        Versión generadora de `call`. Emite eventos dict según avanza el turno:
+        {'type': 'text_delta', 'delta'}, {'type': 'tool_call_start', 'tool_call'},
+        {'type': 'tool_call_end', 'tool_call', 'tool_answer'} y, al final, {'type': 'final', 'memory', 'answer'}.
+        """
+        self._start_turn(memory, user_message, steering)
+        while True:
+            answer = yield from self._llm_stream(self._memory_manager(memory))
+            tool_calls = self._handle_answer(memory, answer)
+            if tool_calls is None:
+                break
+            # Una respuesta puede traer varias tool calls: se ejecutan en paralelo y se registran en el orden original
+            for query in tool_calls:
+                yield {'type': 'tool_call_start', 'tool_call': query}
+            tool_answers = []
+            for query, tool_answer in zip(tool_calls, self._tool_calls(tool_calls)):
+                tool_answers.append(tool_answer)
+                yield {'type': 'tool_call_end', 'tool_call': query, 'tool_answer': tool_answer}
+            # Como en acall, si una tool falla no se registra la ronda incompleta
+            for query, tool_answer in zip(tool_calls, tool_answers):
+                self._log_tool_answer(memory, query, tool_answer)
+            print('------------------------------------------------------------------------------------------------')
+        yield {'type': 'final', 'memory': memory, 'answer': answer}
+
+    async def acall(self, memory=None, user_message=None, steering=None, **kwargs):
+        """
+        Versión asíncrona de `call` para servir muchas conversaciones en un único event loop.
+
+        El LLM y las tools se usan a través de adaptadores: si exponen `arun`/`acall` nativos se
+        esperan directamente y, si no, se ejecutan en un hilo con `asyncio.to_thread`. La gestión del
+        contexto (conteo de tokens y posibles resúmenes con el LLM) también se ejecuta en un hilo.
+        Las tool calls de una misma respuesta se lanzan con `asyncio.gather`, limitadas a `max_tool_workers` a la vez.
+        Si la tarea se cancela, se cancelan las llamadas pendientes y no se registra la ronda de tools incompleta.
+        """
+        self._start_turn(memory, user_message, steering)
+        while True:
+            history = await asyncio.to_thread(self._memory_manager, memory)
+            answer = await self._allm_run(history)
+            tool_calls = self._handle_answer(memory, answer)
+            if tool_calls is None:
+                break
+            semaphore = asyncio.Semaphore(max(self.max_tool_workers, 1))
+            tool_answers = await asyncio.gather(*[self._atool_call(query, semaphore) for query in tool_calls])
+            for query, tool_answer in zip(tool_calls, tool_answers):
+                self._log_tool_answer(memory, query, tool_answer)
+            print('------------------------------------------------------------------------------------------------')
+        return memory, answer
+
+    def _start_turn(self, memory, user_message, steering):
         if steering is not None:
             steering = 'Instrucciones para responder: ' + steering
             print('HINT: ', steering)
         memory.log(role='system', modality='text', content=steering, steering=True, channel=self.id)
         memory.log(role='user', modality='text', content=user_message, channel=self.id)
-        while True:
-            answer = self.LLM.run(self._memory_manager(memory.history), model=self.model, temperature=self.temperature, tools_dict=self.tools_dict, response_format=None, tool_choice=self.tool_choice)
-            if type(answer) == dict:
-                print('TOOL CALL: ', str(answer)[0:1000])
-                memory.log(role='assistant', modality='tool_call', content = answer, channel = self.id)
-                tool_answer = self._tool_call(answer)
-                memory.log(role='tool', modality='tool_result', content=tool_answer, channel=self.id)
-                print('TOOL: ', tool_answer['tool_call_result'][0:1000])
-                print('------------------------------------------------------------------------------------------------')
+
+    def _handle_answer(self, memory, answer):
+        """Devuelve la lista de tool calls de la respuesta o, si es texto, la registra y devuelve None."""
+        tool_calls = tool_calls_of(answer)
+        if tool_calls is None:
+            memory.log(role='assistant', modality='text', content=answer, channel = self.id)
+            return None
+        for query in tool_calls:
+            print('TOOL CALL: ', str(query)[0:1000])
+        return tool_calls
+
+    def _log_tool_answer(self, memory, query, tool_answer):
+        memory.log(role='assistant', modality='tool_call', content = query, channel = self.id)
+        memory.log(role='tool', modality='tool_result', content=tool_answer, channel=self.id)
+        print('TOOL: ', str(tool_answer['tool_call_result'])[0:1000])
+
+    async def _allm_run(self, history):
+        kwargs = self._llm_kwargs()
+        arun = getattr(self.LLM, 'arun', None)
+        if inspect.iscoroutinefunction(arun):
+            return await arun(history, **kwargs)
+        return await asyncio.to_thread(self.LLM.run, history, **kwargs)
+
+    async def _atool_call(self, query, semaphore):
+        async with semaphore:
+            tool, arguments = self._resolve_tool(query)
+            acall = getattr(tool, 'acall', None)
+            if inspect.iscoroutinefunction(acall):
+                tool_result = await acall(arguments)
             else:
-                memory.log(role='assistant', modality='text', content=answer, channel = self.id)
-                break
-        return memory, answer
+                tool_result = await asyncio.to_thread(tool.call, arguments)
+        return self._tool_answer(query, tool_result)
+
+    def _llm_kwargs(self):
+        return dict(model=self.model, temperature=self.temperature, tools_dict=self.tools_dict, response_format=None, tool_choice=self.tool_choice)
+
+    def _llm_stream(self, history):
+        """
+        Emite los deltas de texto del LLM y devuelve la respuesta completa (texto o tool calls).
+        Si el cliente expone `stream(history, **kwargs)` (chunks str de texto, o la tool call como dict/list)
+        se reenvían los deltas según llegan; si no, el texto de `run` se emite como un único delta.
+        """
+        kwargs = self._llm_kwargs()
+        llm_stream = getattr(self.LLM, 'stream', None)
+        if not callable(llm_stream):
+            answer = self.LLM.run(history, **kwargs)
+            if tool_calls_of(answer) is None:
+                yield {'type': 'text_delta', 'delta': answer}
+            return answer
+        deltas = []
+        for chunk in llm_stream(history, **kwargs):
+            if tool_calls_of(chunk) is not None:
+                return chunk
+            deltas.append(chunk)
+            yield {'type': 'text_delta', 'delta': chunk}
+        return ''.join(deltas)
+
+    def _tool_calls(self, tool_calls):
+        """Ejecuta las tool calls y genera sus resultados en el orden original según van estando listos."""
+        if len(tool_calls) == 1 or self.max_tool_workers <= 1:
+            for query in tool_calls:
+                yield self._tool_call(query)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_tool_workers, len(tool_calls))) as executor:
+            futures = [executor.submit(self._tool_call, query) for query in tool_calls]
+            for future in futures:
+                yield future.result()
 
     def _tool_call(self, query):
-        tool_result = self.tools_dict[query['function']['name']].call(json.loads(query['function']['arguments']))
+        tool, arguments = self._resolve_tool(query)
+        return self._tool_answer(query, tool.call(arguments))
+
+    def _resolve_tool(self, query):
+        return self.tools_dict[query['function']['name']], json.loads(query['function']['arguments'])
+
+    @staticmethod
+    def _tool_answer(query, tool_result):
         return {'tool_call_id': query['id'], 'tool_call_function_name': query['function']['name'], 'tool_call_result': tool_result}
 
-    def _memory_manager(self, history):
-        history = history[history['channel'] == self.id]
-        if not self.use_steering:
-            history = history[history['steering'] == False]
+    def _memory_manager(self, memory):
+        if hasattr(memory, 'channel_history'):
+            history = memory.channel_history(self.id, use_steering=self.use_steering)
+        else:
+            history = memory.history
+            history = history[history['channel'] == self.id]
+            if not self.use_steering:
+                history = history[history['steering'] == False]
+        if self.context_manager is not None:
+            history = self.context_manager.run(history)
         return history
 
 if __name__ == "__main__":
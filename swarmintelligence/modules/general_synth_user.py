@@ -1,9 +1,10 @@
 from eigenlib.genai.llm_client import LLMClient
-from eigenlib.genai.memory import Memory
+from swarmintelligence.modules.columnar_memory import ColumnarMemory
+from swarmintelligence.modules.llm_cache import CachedLLMClient
 import json
 
 class GeneralSynthUser:
-    def __init__(self, system_prompt=None, structured_query_prompt=None, model='o3', tools=[], eval_prompt=None, query_format=None, eval_format=None):
+    def __init__(self, system_prompt=None, structured_query_prompt=None, model='o3', tools=[], eval_prompt=None, query_format=None, eval_format=None, llm_cache=None):
         self.id = 'GENERAL_SYNTH_USER'
         self.system_prompt = system_prompt
         self.structured_query_prompt = structured_query_prompt
@@ -16,12 +17,16 @@ class GeneralSynthUser:
         self.eval_prompt = eval_prompt
         self.query_format = query_format
         self.eval_format = eval_format
+        self.llm_cache = llm_cache
 
-    def initialize(self, memory=Memory(), state=None):
+    def initialize(self, memory=None, state=None):
+        memory = memory if memory is not None else ColumnarMemory()
         # TOOLS SETUP
         self.tools_dict = {t().tool_name: t() for t in self.tools}
         # SYSTEM
         self.LLM = LLMClient(client=self.client)
+        if self.llm_cache is not None:
+            self.LLM = CachedLLMClient(self.LLM, self.llm_cache)
         memory.log(role='system', modality='text', content=self.system_prompt, channel=self.id)
         return memory
 
@@ -29,7 +34,7 @@ class GeneralSynthUser:
         # ANSWER
         memory.log(role='user', modality='text', content=agent_message, channel=self.id)
         while True:
-            answer = self.LLM.run(self._memory_manager(memory.history), model=self.model, temperature=self.temperature, tools_dict=self.tools_dict, response_format=None, tool_choice=self.tool_choice)
+            answer = self.LLM.run(self._memory_manager(memory), model=self.model, temperature=self.temperature, tools_dict=self.tools_dict, response_format=None, tool_choice=self.tool_choice)
             if type(answer) == dict:
                 print('TOOL CALL: ', str(answer)[0:1000])
                 memory.log(role='assistant', modality='tool_call', content = answer, channel = self.id)
@@ -41,7 +46,7 @@ class GeneralSynthUser:
                 memory.log(role='assistant', modality='text', content=answer, channel = self.id)
                 break
         memory.log(role='system', modality='text', content=self.structured_query_prompt, steering=True, channel=self.id)
-        answer = self.LLM.run(self._memory_manager(memory.history), model=self.model, temperature=self.temperature, response_format=self.query_format, tool_choice=self.tool_choice)
+        answer = self.LLM.run(self._memory_manager(memory), model=self.model, temperature=self.temperature, response_format=self.query_format, tool_choice=self.tool_choice)
         answer = eval(answer.model_dump_json())
         return memory, answer['query'], answer['hint']
 
@@ -49,7 +54,7 @@ class GeneralSynthUser:
         memory.log(role='system', modality='text', content=self.eval_prompt, steering=True, channel=self.id)
         memory.log(role='user', modality='text', content=agent_message, steering=True, channel=self.id)
         if kwargs.get('update', True):
-            answer = self.LLM.run(self._memory_manager(memory.history), model=self.model, temperature=self.temperature, tools_dict=None, response_format=self.eval_format, tool_choice=None)
+            answer = self.LLM.run(self._memory_manager(memory), model=self.model, temperature=self.temperature, tools_dict=None, response_format=self.eval_format, tool_choice=None)
             answer = eval(answer.model_dump_json())
         else:
             answer = {'reasoning': kwargs['user_message'], 'score': kwargs['score']}
@@ -59,7 +64,10 @@ class GeneralSynthUser:
         tool_result = self.tools_dict[query['function']['name']].call(json.loads(query['function']['arguments']))
         return {'tool_call_id': query['id'], 'tool_call_function_name': query['function']['name'], 'tool_call_result': tool_result}
 
-    def _memory_manager(self, history):
+    def _memory_manager(self, memory):
+        if hasattr(memory, 'channel_history'):
+            return memory.channel_history(self.id, use_steering=self.use_steering)
+        history = memory.history
         history = history[history['channel'] == self.id]
         if not self.use_steering:
             history = history[history['steering'] == False]
@@ -0,0 +1,22 @@
+class LazyValue:
+    """
+    Valor de configuración que se construye solo cuando una etapa lo necesita.
+
+    Los configs lo usan para el agente y el usuario sintético: construir el dict de una etapa no
+    crea el objeto, y `Main` lo resuelve con `resolve` en el punto de uso. La fábrica se llama en
+    cada resolución; los configs le pasan un cached_property, que ya devuelve siempre la misma instancia.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def get(self):
+        return self.factory()
+
+    def __repr__(self):
+        return f'LazyValue({self.factory!r})'
+
+
+def resolve(value):
+    """Devuelve el valor construido si `value` es un LazyValue y `value` tal cual en otro caso."""
+    return value.get() if isinstance(value, LazyValue) else value
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+
+_MISS = object()
+
+
+class LLMResponseCache:
+    """
+    Caché de respuestas del LLM con dos niveles y persistencia en SQLite.
+
+    - Nivel exacto: hash de los mensajes serializados junto con model, temperature, tools,
+      tool_choice y response_format.
+    - Nivel semántico (opcional, requiere `embedding_function`): con el mismo contexto previo y
+      los mismos parámetros, reutiliza la respuesta de un último mensaje con similitud coseno
+      >= `similarity_threshold`.
+
+    Las entradas caducan tras `ttl` segundos (None = sin caducidad) y, al superar `max_entries`,
+    se expulsan las menos usadas recientemente. `stats()` devuelve los contadores de aciertos y fallos.
+    """
+
+    def __init__(self, path=None, ttl=None, max_entries=10000, embedding_function=None, similarity_threshold=0.97):
+        self.path = path or ':memory:'
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embedding_function = embedding_function
+        self.similarity_threshold = similarity_threshold
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if self.path != ':memory:' and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, scope TEXT, value TEXT, embedding TEXT, created REAL, last_access REAL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_scope ON entries (scope)')
+        self._db.commit()
+
+    def get(self, history, response_format=None, **params):
+        """Devuelve la respuesta cacheada o `_MISS`."""
+        key, scope, last_message = self._keys(history, response_format=response_format, **params)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute('SELECT value, created FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is not None and not self._expired(row[1], now):
+                self._db.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+                self._db.commit()
+                self.hits_exact += 1
+                return self._loads(row[0], response_format)
+        if self.embedding_function is not None:
+            value = self._semantic_get(scope, last_message, now)
+            if value is not _MISS:
+                with self._lock:
+                    self.hits_semantic += 1
+                return self._loads(value, response_format)
+        with self._lock:
+            self.misses += 1
+        return _MISS
+
+    def set(self, history, answer, response_format=None, **params):
+        """Guarda la respuesta. Las respuestas que no se pueden serializar sin pérdida no se cachean (devuelve False)."""
+        try:
+            value = self._dumps(answer)
+        except (TypeError, ValueError):
+            return False
+        key, scope, last_message = self._keys(history, response_format=response_format, **params)
+        embedding = json.dumps(self.embedding_function(last_message)) if self.embedding_function is not None else None
+        now = time.time()
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)', (key, scope, value, embedding, now, now))
+            if self.ttl is not None:
+                self._db.execute('DELETE FROM entries WHERE created < ?', (now - self.ttl,))
+            excess = self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._db.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access LIMIT ?)', (excess,))
+            self._db.commit()
+        return True
+
+    def stats(self):
+        with self._lock:
+            size = self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        total = self.hits_exact + self.hits_semantic + self.misses
+        return {'hits_exact': self.hits_exact, 'hits_semantic': self.hits_semantic, 'misses': self.misses,
+                'hit_rate': (self.hits_exact + self.hits_semantic) / total if total else 0.0, 'size': size}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM entries')
+            self._db.commit()
+
+    def _semantic_get(self, scope, last_message, now):
+        import numpy as np
+        with self._lock:
+            rows = self._db.execute('SELECT key, value, embedding, created FROM entries WHERE scope = ? AND embedding IS NOT NULL', (scope,)).fetchall()
+        rows = [row for row in rows if not self._expired(row[3], now)]
+        if not rows:
+            return _MISS
+        query = np.asarray(self.embedding_function(last_message), dtype=float)
+        matrix = np.asarray([json.loads(row[2]) for row in rows], dtype=float)
+        similarity = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(similarity))
+        if similarity[best] < self.similarity_threshold:
+            return _MISS
+        with self._lock:
+            self._db.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, rows[best][0]))
+            self._db.commit()
+        return rows[best][1]
+
+    def _keys(self, history, response_format=None, tools_dict=None, **params):
+        records = history.to_dict(orient='records') if hasattr(history, 'to_dict') else list(history)
+        messages = [[r.get('role'), r.get('modality'), r.get('content')] for r in records]
+        params['tools'] = sorted((name, tool.initialize()) for name, tool in (tools_dict or {}).items())
+        params['response_format'] = self._format_schema(response_format)
+        params_hash = self._hash(params)
+        scope = self._hash([params_hash, messages[:-1]])
+        key = self._hash([scope, messages[-1:]])
+        last_message = str(messages[-1][2]) if messages else ''
+        return key, scope, last_message
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    @staticmethod
+    def _format_schema(response_format):
+        if response_format is None:
+            return None
+        if hasattr(response_format, 'model_json_schema'):
+            return response_format.model_json_schema()
+        return str(response_format)
+
+    @staticmethod
+    def _hash(value):
+        return hashlib.sha256(json.dumps(value, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _dumps(answer):
+        if hasattr(answer, 'model_dump_json'):
+            return json.dumps({'type': 'model', 'value': answer.model_dump_json()})
+        # Sin default=str: una respuesta no JSON se devolvería convertida en texto en los aciertos
+        return json.dumps({'type': 'json', 'value': answer})
+
+    @staticmethod
+    def _loads(value, response_format):
+        value = json.loads(value)
+        if value['type'] == 'model':
+            return response_format.model_validate_json(value['value'])
+        return value['value']
+
+
+class CachedLLMClient:
+    """
+    Envuelve un LLMClient y sirve `run`, `stream` y `arun` desde un LLMResponseCache cuando hay acierto.
+
+    En `stream`, un acierto se reproduce como un único delta y la respuesta se guarda al terminar
+    el stream (o al recibir la tool call). `arun` usa el `arun` nativo del cliente si existe.
+    """
+
+    def __init__(self, llm, cache):
+        self.llm = llm
+        self.cache = cache
+
+    def run(self, history, **kwargs):
+        answer = self.cache.get(history, **kwargs)
+        if answer is not _MISS:
+            return answer
+        answer = self.llm.run(history, **kwargs)
+        self.cache.set(history, answer, **kwargs)
+        return answer
+
+    def stream(self, history, **kwargs):
+        answer = self.cache.get(history, **kwargs)
+        if answer is not _MISS:
+            yield answer
+            return
+        llm_stream = getattr(self.llm, 'stream', None)
+        if not callable(llm_stream):
+            answer = self.llm.run(history, **kwargs)
+            self.cache.set(history, answer, **kwargs)
+            yield answer
+            return
+        deltas = []
+        for chunk in llm_stream(history, **kwargs):
+            if type(chunk) in (dict, list):
+                # El consumidor deja de iterar al recibir la tool call: se guarda antes de emitirla
+                self.cache.set(history, chunk, **kwargs)
+                yield chunk
+                return
+            deltas.append(chunk)
+            yield chunk
+        self.cache.set(history, ''.join(deltas), **kwargs)
+
+    async def arun(self, history, **kwargs):
+        # La búsqueda semántica puede calcular embeddings: fuera del event loop
+        answer = await asyncio.to_thread(self.cache.get, history, **kwargs)
+        if answer is not _MISS:
+            return answer
+        arun = getattr(self.llm, 'arun', None)
+        if inspect.iscoroutinefunction(arun):
+            answer = await arun(history, **kwargs)
+        else:
+            answer = await asyncio.to_thread(self.llm.run, history, **kwargs)
+        await asyncio.to_thread(self.cache.set, history, answer, **kwargs)
+        return answer
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
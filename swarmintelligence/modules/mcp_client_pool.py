@@ -0,0 +1,162 @@
+import atexit
+import itertools
+import logging
+import threading
+import time
+import zmq
+from eigenlib.utils.network_io import NetworkIO
+
+logger = logging.getLogger(__name__)
+
+# Errores que NetworkIO propaga cuando falla el transporte: los de sockets zmq y los del sistema
+TRANSPORT_ERRORS = (zmq.ZMQError, OSError)
+# De ellos, solo se reintentan los que garantizan que el payload no llegó a enviarse. Un timeout
+# esperando la respuesta (zmq.Again, TimeoutError) no: la tool puede haberse ejecutado.
+NOT_RETRYABLE_ERRORS = (zmq.Again, TimeoutError)
+
+
+class MCPClientPool:
+    """
+    Pool de clientes NetworkIO compartido por todas las instancias de ServerTool del proceso.
+
+    Los nodos cliente se lanzan una sola vez y se reutilizan entre llamadas. Cada clave
+    (master_address, target_node) mantiene hasta `max_clients_per_key` nodos, de modo que
+    varias tool calls en paralelo no se serializan sobre un único cliente.
+    Los clientes se reconectan de forma perezosa:
+    - Un cliente cuya llamada lanza una excepción se descarta (los errores de la tool llegan como
+      respuesta normal, no como excepción), y también el que lleva más de `max_idle` segundos sin usarse.
+    - Antes de reutilizar un cliente ocioso más de `ping_interval` segundos se comprueba con un ping
+      a su propio nodo; si no responde se descarta y se usa o lanza otro.
+    Solo se reintentan los errores de transporte en los que el payload no llegó a enviarse (ver
+    TRANSPORT_ERRORS y NOT_RETRYABLE_ERRORS), para no ejecutar dos veces tools con efectos secundarios.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_clients_per_key=4, max_idle=600, max_retries=1, ping_interval=30):
+        self.max_clients_per_key = max_clients_per_key
+        self.max_idle = max_idle
+        self.max_retries = max_retries
+        self.ping_interval = ping_interval
+        self._lock = threading.Condition()
+        self._idle = {}
+        self._n_clients = {}
+        self._node_names = {}
+        self._counter = itertools.count()
+
+    @classmethod
+    def shared(cls):
+        """Devuelve el pool global del proceso (se crea en el primer uso)."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.close_all)
+            return cls._instance
+
+    def call(self, config):
+        """Ejecuta `config['payload']` contra `config['target_node']` usando un cliente del pool."""
+        key = (config['master_address'], config['target_node'])
+        for attempt in range(self.max_retries + 1):
+            client = self._acquire(key, config)
+            try:
+                result = client.call(target_node=config['target_node'], payload=config['payload'])
+            except Exception as e:
+                # Una excepción en el cliente deja la conexión en estado desconocido: no vuelve al pool
+                self._discard(key, client)
+                if not self._is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                logger.warning(f"Cliente MCP {key} caído ({e}). Reconectando...")
+                continue
+            self._release(key, client)
+            return result
+
+    def close_all(self):
+        """Detiene todos los clientes ociosos del pool."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+            for key, clients in idle.items():
+                self._n_clients[key] -= len(clients)
+        for clients in idle.values():
+            for client, _ in clients:
+                self._stop(client)
+
+    def _acquire(self, key, config):
+        while True:
+            client, idle_for = self._reserve(key)
+            if client is None:
+                break
+            if idle_for <= self.ping_interval or self._ping(client):
+                return client
+            logger.warning(f"Cliente MCP {key} sin respuesta al ping. Reconectando...")
+            self._discard(key, client)
+        try:
+            return self._launch(config)
+        except Exception:
+            with self._lock:
+                self._n_clients[key] -= 1
+                self._lock.notify()
+            raise
+
+    def _reserve(self, key):
+        # Devuelve (cliente ocioso, segundos sin usarse) o (None, 0) tras reservar hueco para uno nuevo
+        stale = []
+        client, idle_for = None, 0
+        with self._lock:
+            while True:
+                clients = self._idle.setdefault(key, [])
+                while clients and client is None:
+                    candidate, last_used = clients.pop()
+                    idle_for = time.monotonic() - last_used
+                    if idle_for <= self.max_idle:
+                        client = candidate
+                    else:
+                        # Demasiado tiempo sin usarse: se descarta y se reconecta
+                        self._n_clients[key] -= 1
+                        stale.append(candidate)
+                if client is not None:
+                    break
+                if self._n_clients.get(key, 0) < self.max_clients_per_key:
+                    self._n_clients[key] = self._n_clients.get(key, 0) + 1
+                    break
+                self._lock.wait()
+        for candidate in stale:
+            self._stop(candidate)
+        return client, idle_for
+
+    def _ping(self, client):
+        """Comprueba la conexión llamando al propio nodo del cliente, que responde "OK"."""
+        try:
+            return client.call(target_node=self._node_names[client], payload={}) == "OK"
+        except Exception as e:
+            logger.warning(f"Ping a cliente MCP fallido: {e}")
+            return False
+
+    @staticmethod
+    def _is_retryable(error):
+        return isinstance(error, TRANSPORT_ERRORS) and not isinstance(error, NOT_RETRYABLE_ERRORS)
+
+    def _release(self, key, client):
+        with self._lock:
+            self._idle.setdefault(key, []).append((client, time.monotonic()))
+            self._lock.notify()
+
+    def _discard(self, key, client):
+        self._stop(client)
+        with self._lock:
+            self._n_clients[key] -= 1
+            self._lock.notify()
+
+    def _launch(self, config):
+        client = NetworkIO()
+        node_name = f"{config['client_name']}_{next(self._counter)}"
+        client.launch_node(node_name=node_name, master_address=config['master_address'], node_method=lambda: "OK", delay=config['delay'], password=config['password'])
+        self._node_names[client] = node_name
+        return client
+
+    def _stop(self, client):
+        self._node_names.pop(client, None)
+        try:
+            client.stop()
+        except Exception as e:
+            logger.warning(f"Error deteniendo cliente MCP: {e}")
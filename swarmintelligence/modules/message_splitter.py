@@ -0,0 +1,182 @@
+import html
+import re
+import time
+from bisect import bisect_left, bisect_right
+
+FENCE_CLOSE = '\n```'
+LEVELS = ('paragraph', 'line', 'sentence', 'clause', 'word')
+_BOUNDARIES = re.compile(
+    r'(?P<fence>^[ \t]*```(?P<lang>[^\n`]*)$)'
+    r'|(?P<paragraph>\n[ \t]*\n)'
+    r'|(?P<line>\n)'
+    r'|(?P<sentence>(?<=[.!?…:;])[ \t]+)'
+    r'|(?P<clause>(?<=,)[ \t]+)'
+    r'|(?P<word>[ \t]+)',
+    re.M)
+_CODE_BLOCK = re.compile(r'^[ \t]*```(?P<lang>[^\n`]*)\n(?P<code>.*?)\n?^[ \t]*```[ \t]*$', re.M | re.S)
+_INLINE = re.compile(r'`(?P<code>[^`\n]+)`|\*\*(?P<bold>[^*\n]+)\*\*')
+_MARKDOWN_V2_SPECIAL = re.compile(r'([_*\[\]()~`>#+\-=|{}.!\\])')
+_MARKDOWN_V2_CODE = re.compile(r'([`\\])')
+
+
+class MessageSplitter:
+    """
+    Divide textos largos en mensajes de Telegram de como mucho `max_length` caracteres.
+
+    - Una sola pasada con una expresión regular indexa todos los puntos de corte (párrafo, línea,
+      frase, coma, palabra) y los bloques de código; cada trozo elige su corte con búsqueda binaria
+      sobre esos índices, así que el coste total es lineal en la longitud del texto.
+    - Se prefiere el corte de mayor nivel que deje el trozo al menos `min_fill` lleno.
+    - Si un corte cae dentro de un bloque de código, se cierra el bloque en ese trozo y se reabre
+      (con el mismo lenguaje) en el siguiente.
+    - Con `parse_mode` 'HTML' o 'MarkdownV2' cada trozo se devuelve escapado para Telegram
+      (bloques de código, `código` y **negrita**); la longitud se comprueba sobre el texto ya escapado.
+    """
+
+    def __init__(self, max_length=4096, parse_mode=None, min_fill=0.5):
+        if parse_mode not in (None, 'HTML', 'MarkdownV2'):
+            raise ValueError(f"parse_mode no soportado: {parse_mode}")
+        self.max_length = max_length
+        self.parse_mode = parse_mode
+        self.min_fill = min_fill
+
+    def split(self, text):
+        """Devuelve la lista de mensajes (ya renderizados según `parse_mode`)."""
+        return [rendered for _, rendered in self.split_pairs(text)]
+
+    def split_pairs(self, text):
+        """
+        Devuelve la lista de pares (trozo sin formato, trozo renderizado según `parse_mode`).
+
+        El trozo sin formato sirve para reenviar el mensaje como texto plano si Telegram rechaza el formato.
+        """
+        if len(text) <= self.max_length and self.parse_mode is None:
+            return [(text, text)]
+        index = self._scan(text)
+        parts = []
+        start = 0
+        reopen = ''
+        while start < len(text):
+            budget = max(1, self.max_length - len(reopen) - len(FENCE_CLOSE))
+            while True:
+                end = len(text) if len(text) - start <= budget else self._boundary(index, start, budget)
+                end, part, next_reopen = self._chunk(text, index, start, end, reopen)
+                rendered = self.render(part)
+                if len(rendered) <= self.max_length or budget == 1:
+                    break
+                # El escape ha alargado el trozo: se reduce el presupuesto en lo que sobra
+                budget = max(1, budget - (len(rendered) - self.max_length))
+            if part.strip():
+                parts.append((part, rendered))
+            start, reopen = end, next_reopen
+            while start < len(text) and text[start] == '\n':
+                start += 1
+        return parts or [(text, self.render(text))]
+
+    def render(self, text):
+        """Convierte un trozo con los bloques de código equilibrados al formato de `parse_mode`."""
+        if self.parse_mode is None:
+            return text
+        rendered = []
+        position = 0
+        for match in _CODE_BLOCK.finditer(text):
+            rendered.append(self._render_inline(text[position:match.start()]))
+            rendered.append(self._render_code_block(match.group('code'), match.group('lang').strip()))
+            position = match.end()
+        rendered.append(self._render_inline(text[position:]))
+        return ''.join(rendered)
+
+    def escape(self, text):
+        """Escapa texto plano (sin formato) para `parse_mode`."""
+        if self.parse_mode == 'HTML':
+            return html.escape(text, quote=False)
+        if self.parse_mode == 'MarkdownV2':
+            return _MARKDOWN_V2_SPECIAL.sub(r'\\\1', text)
+        return text
+
+    def _scan(self, text):
+        # Posiciones de corte (tras el separador) por nivel, y posición y lenguaje de cada marca ```
+        index = {level: [] for level in LEVELS}
+        fences, languages = [], []
+        for match in _BOUNDARIES.finditer(text):
+            kind = match.lastgroup
+            if kind == 'fence':
+                fences.append(match.start())
+                languages.append(match.group('lang').strip())
+            else:
+                index[kind].append(match.end())
+        index['fences'] = fences
+        index['languages'] = languages
+        return index
+
+    def _boundary(self, index, start, budget):
+        limit = start + budget
+        best = start
+        for level in LEVELS:
+            positions = index[level]
+            i = bisect_right(positions, limit) - 1
+            if i >= 0 and positions[i] > start:
+                if positions[i] - start >= budget * self.min_fill:
+                    return positions[i]
+                best = max(best, positions[i])
+        # Sin corte suficientemente lejano: el más lejano disponible o, si no hay, corte duro
+        return best if best > start else limit
+
+    def _chunk(self, text, index, start, end, reopen):
+        # Número impar de marcas ``` antes del corte: estamos dentro de un bloque de código
+        fences = bisect_left(index['fences'], end)
+        if fences % 2:
+            opening = index['fences'][fences - 1]
+            if start < opening and '\n' not in text[opening:end].strip():
+                # El bloque se abriría sin contenido: mejor cortar antes de la marca de apertura
+                return self._chunk(text, index, start, opening, reopen)
+            return end, reopen + text[start:end].rstrip() + FENCE_CLOSE, f"```{index['languages'][fences - 1]}\n"
+        return end, reopen + text[start:end].rstrip(), ''
+
+    def _render_inline(self, text):
+        rendered = []
+        position = 0
+        for match in _INLINE.finditer(text):
+            rendered.append(self.escape(text[position:match.start()]))
+            if match.group('code') is not None:
+                code = match.group('code')
+                rendered.append(f'<code>{html.escape(code, quote=False)}</code>' if self.parse_mode == 'HTML'
+                                else f'`{_escape_code(code)}`')
+            else:
+                bold = self.escape(match.group('bold'))
+                rendered.append(f'<b>{bold}</b>' if self.parse_mode == 'HTML' else f'*{bold}*')
+            position = match.end()
+        rendered.append(self.escape(text[position:]))
+        return ''.join(rendered)
+
+    def _render_code_block(self, code, language):
+        if self.parse_mode == 'HTML':
+            attribute = f' class="language-{html.escape(language)}"' if language else ''
+            return f'<pre><code{attribute}>{html.escape(code, quote=False)}</code></pre>'
+        return f'```{language}\n{_escape_code(code)}\n```'
+
+
+def _escape_code(code):
+    # Dentro de código MarkdownV2 solo hay que escapar ` y \
+    return _MARKDOWN_V2_CODE.sub(r'\\\1', code)
+
+
+def _benchmark_text(size):
+    # Salida típica de un intérprete de código: prosa, listas, bloques de código y líneas muy largas
+    unit = ('El análisis ha terminado. Resultados por columna, ordenados por importancia:\n\n'
+            + ''.join(f'- columna_{i}: media={i * 0.37:.3f}, std={i * 0.11:.3f}\n' for i in range(20))
+            + '\n```python\n' + ''.join(f'df["col_{i}"] = df["col_{i}"].fillna(0) * {i}\n' for i in range(40)) + '```\n\n'
+            + 'x' * 5000 + '\n\n')
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+if __name__ == '__main__':
+    for parse_mode in (None, 'HTML'):
+        splitter = MessageSplitter(parse_mode=parse_mode)
+        for megabytes in (1, 4, 16):
+            text = _benchmark_text(megabytes * 1024 * 1024)
+            start = time.perf_counter()
+            parts = splitter.split(text)
+            elapsed = time.perf_counter() - start
+            print(f"{str(parse_mode):>5} {megabytes:>3} MB: {len(parts):>6} mensajes en {elapsed:.3f}s "
+                  f"({megabytes / elapsed:.1f} MB/s, máx {max(map(len, parts))} caracteres)")
@@ -0,0 +1,189 @@
+import re
+
+MAX_TEXT_LENGTH = 2000
+CODE_LANGUAGES = {
+    'bash', 'c', 'c#', 'c++', 'css', 'diff', 'docker', 'go', 'graphql', 'html', 'java', 'javascript', 'json',
+    'kotlin', 'latex', 'makefile', 'markdown', 'plain text', 'powershell', 'python', 'r', 'ruby', 'rust', 'scala',
+    'shell', 'sql', 'swift', 'typescript', 'xml', 'yaml',
+}
+LANGUAGE_ALIASES = {'py': 'python', 'js': 'javascript', 'ts': 'typescript', 'sh': 'shell', 'yml': 'yaml', 'cpp': 'c++', 'csharp': 'c#', '': 'plain text', 'text': 'plain text'}
+
+_INLINE = re.compile(r'`(?P<code>[^`]+)`|\*\*(?P<bold>.+?)\*\*|~~(?P<strike>.+?)~~|\[(?P<link_text>[^\]]+)\]\((?P<link_url>[^)\s]+)\)|(?<![\w*])\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*(?!\w)|(?<!\w)_(?P<italic_u>[^_\s](?:[^_]*[^_\s])?)_(?!\w)')
+_HEADING = re.compile(r'^(#{1,6})\s+(.*)$')
+_TODO = re.compile(r'^[-*+]\s+\[([ xX])\]\s+(.*)$')
+_BULLET = re.compile(r'^[-*+]\s+(.*)$')
+_NUMBERED = re.compile(r'^\d+[.)]\s+(.*)$')
+_DIVIDER = re.compile(r'^(-{3,}|\*{3,}|_{3,})$')
+_LIST_TYPES = ('bulleted_list_item', 'numbered_list_item', 'to_do')
+
+
+def rich_text(text):
+    """Convierte texto con Markdown inline (negrita, cursiva, tachado, código, enlaces) en rich_text de Notion."""
+    parts = []
+    position = 0
+    for match in _INLINE.finditer(text):
+        if match.start() > position:
+            parts.append(_text_part(text[position:match.start()]))
+        if match.group('code') is not None:
+            parts.append(_text_part(match.group('code'), code=True))
+        elif match.group('bold') is not None:
+            parts.append(_text_part(match.group('bold'), bold=True))
+        elif match.group('strike') is not None:
+            parts.append(_text_part(match.group('strike'), strikethrough=True))
+        elif match.group('link_text') is not None:
+            parts.append(_text_part(match.group('link_text'), link=match.group('link_url')))
+        else:
+            parts.append(_text_part(match.group('italic') or match.group('italic_u'), italic=True))
+        position = match.end()
+    if position < len(text):
+        parts.append(_text_part(text[position:]))
+    # La API limita cada objeto de texto a 2000 caracteres
+    return [chunk for part in parts for chunk in _split_part(part)]
+
+
+def markdown_to_blocks(markdown):
+    """
+    Convierte Markdown en una lista de bloques de Notion (formato de la API).
+
+    Soporta encabezados, párrafos, listas (con anidamiento por sangría), to-do, citas,
+    bloques de código y separadores.
+    """
+    blocks = []
+    # Pila de (sangría, bloque) para colgar los elementos de lista anidados de su padre
+    list_stack = []
+    paragraph = []
+    lines = markdown.replace('\r\n', '\n').split('\n')
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(_block('paragraph', '\n'.join(paragraph)))
+            paragraph.clear()
+
+    while i < len(lines):
+        raw = lines[i].rstrip()
+        stripped = raw.strip()
+        indent = len(raw.expandtabs(4)) - len(raw.expandtabs(4).lstrip())
+
+        if stripped.startswith('```'):
+            flush_paragraph()
+            list_stack.clear()
+            language = stripped[3:].strip().lower()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith('```'):
+                code.append(lines[i])
+                i += 1
+            language = LANGUAGE_ALIASES.get(language, language)
+            blocks.append({'object': 'block', 'type': 'code', 'code': {
+                'rich_text': _split_part(_text_part('\n'.join(code))),
+                'language': language if language in CODE_LANGUAGES else 'plain text',
+            }})
+            i += 1
+            continue
+
+        if not stripped:
+            flush_paragraph()
+            i += 1
+            continue
+
+        item = None
+        todo, bullet, numbered = _TODO.match(stripped), _BULLET.match(stripped), _NUMBERED.match(stripped)
+        if todo:
+            item = _block('to_do', todo.group(2))
+            item['to_do']['checked'] = todo.group(1).lower() == 'x'
+        elif bullet and not _DIVIDER.match(stripped):
+            item = _block('bulleted_list_item', bullet.group(1))
+        elif numbered:
+            item = _block('numbered_list_item', numbered.group(1))
+
+        if item is not None:
+            flush_paragraph()
+            while list_stack and list_stack[-1][0] >= indent:
+                list_stack.pop()
+            if list_stack:
+                parent = list_stack[-1][1]
+                parent[parent['type']].setdefault('children', []).append(item)
+            else:
+                blocks.append(item)
+            list_stack.append((indent, item))
+            i += 1
+            continue
+
+        list_stack.clear()
+        heading = _HEADING.match(stripped)
+        if heading:
+            flush_paragraph()
+            blocks.append(_block(f'heading_{min(len(heading.group(1)), 3)}', heading.group(2)))
+        elif _DIVIDER.match(stripped):
+            flush_paragraph()
+            blocks.append({'object': 'block', 'type': 'divider', 'divider': {}})
+        elif stripped.startswith('>'):
+            flush_paragraph()
+            quote = [stripped.lstrip('>').strip()]
+            while i + 1 < len(lines) and lines[i + 1].strip().startswith('>'):
+                i += 1
+                quote.append(lines[i].strip().lstrip('>').strip())
+            blocks.append(_block('quote', '\n'.join(quote)))
+        else:
+            paragraph.append(stripped)
+        i += 1
+    flush_paragraph()
+    return blocks
+
+
+def block_signature(block, children=None):
+    """
+    Firma comparable de un bloque (tipo, texto con formato y atributos), válida tanto para bloques
+    generados por `markdown_to_blocks` como para los devueltos por la API.
+
+    `children` son las firmas de los hijos; si es None se usan los hijos incluidos en el propio bloque.
+    """
+    kind = block['type']
+    content = block.get(kind) or {}
+    if kind not in _LIST_TYPES + ('paragraph', 'heading_1', 'heading_2', 'heading_3', 'quote', 'code', 'divider'):
+        # Bloques no soportados por el conversor: nunca coinciden con los nuevos
+        return (kind, block.get('id'))
+    text = tuple(_part_signature(part) for part in content.get('rich_text', []))
+    extra = (content.get('checked', False), content.get('language'))
+    if children is None:
+        children = tuple(block_signature(child) for child in content.get('children', []))
+    return (kind, _merge_text(text), extra, tuple(children))
+
+
+def _merge_text(parts):
+    # Une trozos contiguos con el mismo formato: la API puede partir el texto de forma distinta
+    merged = []
+    for content, annotations in parts:
+        if merged and merged[-1][1] == annotations:
+            merged[-1] = (merged[-1][0] + content, annotations)
+        else:
+            merged.append((content, annotations))
+    return tuple(merged)
+
+
+def _part_signature(part):
+    annotations = part.get('annotations', {})
+    text = part.get('text', {})
+    link = (text.get('link') or {}).get('url')
+    return (text.get('content', part.get('plain_text', '')),
+            (bool(annotations.get('bold')), bool(annotations.get('italic')), bool(annotations.get('strikethrough')), bool(annotations.get('code')), link))
+
+
+def _block(kind, text):
+    return {'object': 'block', 'type': kind, kind: {'rich_text': rich_text(text)}}
+
+
+def _text_part(content, bold=False, italic=False, strikethrough=False, code=False, link=None):
+    return {
+        'type': 'text',
+        'text': {'content': content, 'link': {'url': link} if link else None},
+        'annotations': {'bold': bold, 'italic': italic, 'strikethrough': strikethrough, 'underline': False, 'code': code, 'color': 'default'},
+    }
+
+
+def _split_part(part):
+    content = part['text']['content']
+    if len(content) <= MAX_TEXT_LENGTH:
+        return [part]
+    return [{**part, 'text': {**part['text'], 'content': content[i:i + MAX_TEXT_LENGTH]}} for i in range(0, len(content), MAX_TEXT_LENGTH)]
@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from swarmintelligence.modules.notion_rest_client import flatten_properties
+
+
+class NotionMirror:
+    """
+    Réplica local (SQLite) de una database de Notion para consultas rápidas sin ir a la API.
+
+    - `sync` es incremental: solo pide las páginas con last_edited_time >= la última marca guardada.
+      Como la API no devuelve las páginas archivadas, cada `full_sync_interval` segundos se hace una
+      sincronización completa que elimina de la réplica las páginas que ya no existen.
+    - Las llamadas a `sync` más seguidas que `min_sync_interval` segundos no van a la red.
+    - `query` filtra por status, project, rango de fechas y texto del nombre, con proyección de
+      columnas y paginación.
+    """
+
+    def __init__(self, client, database_id, path=None, min_sync_interval=30, full_sync_interval=3600,
+                 name_property='Name', status_property='Status', project_property='Project', date_property='Target Date'):
+        self.client = client
+        self.database_id = database_id
+        self.path = path or ':memory:'
+        self.min_sync_interval = min_sync_interval
+        self.full_sync_interval = full_sync_interval
+        self.name_property = name_property
+        self.status_property = status_property
+        self.project_property = project_property
+        self.date_property = date_property
+        self._last_sync = None
+        self._lock = threading.Lock()
+        if self.path != ':memory:' and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS pages (id TEXT PRIMARY KEY, database_id TEXT, name TEXT, status TEXT, project TEXT, target_date TEXT, '
+                         'last_edited_time TEXT, url TEXT, properties TEXT)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS pages_database ON pages (database_id, last_edited_time)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS sync_state (database_id TEXT PRIMARY KEY, watermark TEXT, last_full_sync REAL)')
+        self._db.commit()
+
+    def sync(self, force=False):
+        """Sincroniza la réplica con Notion y devuelve el número de páginas actualizadas."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_sync is not None and now - self._last_sync < self.min_sync_interval:
+                return 0
+            watermark, last_full_sync = self._sync_state()
+            full = force or watermark is None or time.time() - (last_full_sync or 0) >= self.full_sync_interval
+            page_filter = None if full else {'timestamp': 'last_edited_time', 'last_edited_time': {'on_or_after': watermark}}
+            pages = list(self.client.query_database(self.database_id, filter=page_filter))
+
+            rows = [self._row(page) for page in pages if not page.get('archived') and not page.get('in_trash')]
+            with self._db:
+                if full:
+                    self._db.execute('DELETE FROM pages WHERE database_id = ?', (self.database_id,))
+                else:
+                    self._db.executemany('DELETE FROM pages WHERE id = ?', [(page['id'],) for page in pages])
+                self._db.executemany('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                new_watermark = max([watermark or ''] + [page['last_edited_time'] for page in pages]) or None
+                self._db.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)',
+                                 (self.database_id, new_watermark, time.time() if full else last_full_sync))
+            self._last_sync = now
+            return len(pages)
+
+    def query(self, status=None, project=None, date_from=None, date_to=None, name_contains=None, columns=None, page=1, page_size=20):
+        """
+        Consulta la réplica.
+
+        Args:
+            status (str | list): Status permitidos
+            project (str | list): Páginas con al menos uno de estos proyectos
+            date_from / date_to (str): Rango (inclusivo, 'YYYY-MM-DD') sobre la propiedad de fecha
+            name_contains (str): Subcadena del nombre (sin distinguir mayúsculas)
+            columns (list): Propiedades a devolver (None = todas). 'id', 'url' y 'last_edited_time' siempre se incluyen
+            page / page_size (int): Paginación (page empieza en 1)
+
+        Returns:
+            dict: {'pages', 'total', 'page', 'page_size'}
+        """
+        where, params = ['database_id = ?'], [self.database_id]
+        if status:
+            status = [status] if isinstance(status, str) else list(status)
+            where.append(f"status IN ({', '.join('?' * len(status))})")
+            params += status
+        if project:
+            project = [project] if isinstance(project, str) else list(project)
+            where.append(f"EXISTS (SELECT 1 FROM json_each(pages.project) WHERE value IN ({', '.join('?' * len(project))}))")
+            params += project
+        if date_from:
+            where.append('substr(target_date, 1, 10) >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('substr(target_date, 1, 10) <= ?')
+            params.append(date_to)
+        if name_contains:
+            where.append('lower(name) LIKE ?')
+            params.append(f'%{name_contains.lower()}%')
+        page, page_size = max(int(page), 1), max(int(page_size), 1)
+        clause = ' AND '.join(where)
+        with self._lock:
+            total = self._db.execute(f'SELECT COUNT(*) FROM pages WHERE {clause}', params).fetchone()[0]
+            rows = self._db.execute(f'SELECT id, url, last_edited_time, properties FROM pages WHERE {clause} '
+                                    f'ORDER BY last_edited_time DESC LIMIT ? OFFSET ?', params + [page_size, (page - 1) * page_size]).fetchall()
+        records = []
+        for page_id, url, last_edited_time, properties in rows:
+            properties = json.loads(properties)
+            if columns is not None:
+                properties = {column: properties.get(column) for column in columns}
+            records.append({'id': page_id, 'url': url, 'last_edited_time': last_edited_time, **properties})
+        return {'pages': records, 'total': total, 'page': page, 'page_size': page_size}
+
+    def invalidate(self):
+        """Fuerza que el próximo `sync` vaya a la API (p.ej. tras crear o editar páginas)."""
+        with self._lock:
+            self._last_sync = None
+
+    def remove(self, page_id):
+        """Elimina una página de la réplica (p.ej. tras archivarla)."""
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM pages WHERE id = ?', (page_id,))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM pages WHERE database_id = ?', (self.database_id,)).fetchone()[0]
+
+    def _sync_state(self):
+        row = self._db.execute('SELECT watermark, last_full_sync FROM sync_state WHERE database_id = ?', (self.database_id,)).fetchone()
+        return row if row is not None else (None, None)
+
+    def _row(self, page):
+        properties = flatten_properties(page.get('properties', {}))
+        project = properties.get(self.project_property) or []
+        project = [project] if isinstance(project, str) else project
+        return (page['id'], self.database_id, properties.get(self.name_property), properties.get(self.status_property),
+                json.dumps(project, ensure_ascii=False), properties.get(self.date_property), page['last_edited_time'],
+                page.get('url'), json.dumps(properties, ensure_ascii=False, default=str))
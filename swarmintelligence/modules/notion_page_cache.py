@@ -0,0 +1,157 @@
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from swarmintelligence.modules.notion_rest_client import plain_text
+
+
+class NotionPageCache:
+    """
+    Caché de páginas de Notion renderizadas a Markdown, validada con una petición de metadatos.
+
+    - Cada lectura pide solo la página (`retrieve_page`) y compara su last_edited_time con el de la
+      versión cacheada. Notion redondea last_edited_time al minuto, así que una versión solo se da por
+      buena si se descargó más de `trust_window` segundos después de ese instante (una edición
+      posterior cambiaría necesariamente la marca).
+    - En caso de fallo de caché el árbol de bloques se descarga por niveles: los hijos de todos los
+      bloques de un nivel se piden en paralelo con `max_workers` hilos.
+    - Se guardan como mucho `max_pages` páginas (LRU).
+    """
+
+    def __init__(self, client, max_pages=128, max_workers=8, trust_window=60):
+        self.client = client
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.trust_window = trust_window
+        self.hits = 0
+        self.misses = 0
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read_markdown(self, page_id):
+        """Devuelve el Markdown de la página, descargándola solo si ha cambiado."""
+        last_edited_time = self.client.retrieve_page(page_id)['last_edited_time']
+        with self._lock:
+            entry = self._pages.get(page_id)
+            if entry is not None and entry['last_edited_time'] == last_edited_time and self._trusted(entry):
+                self._pages.move_to_end(page_id)
+                self.hits += 1
+                return entry['markdown']
+            self.misses += 1
+
+        fetched_at = datetime.datetime.now(datetime.timezone.utc)
+        markdown = render_markdown(self.fetch_tree(page_id))
+        with self._lock:
+            self._pages[page_id] = {'last_edited_time': last_edited_time, 'fetched_at': fetched_at, 'markdown': markdown}
+            self._pages.move_to_end(page_id)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return markdown
+
+    def fetch_tree(self, page_id):
+        """Árbol de bloques de la página; cada bloque con hijos los lleva en la clave 'children'."""
+        root = list(self.client.list_block_children(page_id))
+        level = [block for block in root if block.get('has_children') and block['type'] != 'child_page']
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while level:
+                children = list(executor.map(lambda block: list(self.client.list_block_children(block['id'])), level))
+                next_level = []
+                for block, block_children in zip(level, children):
+                    block['children'] = block_children
+                    next_level += [child for child in block_children if child.get('has_children') and child['type'] != 'child_page']
+                level = next_level
+        return root
+
+    def invalidate(self, page_id=None):
+        """Elimina una página o, sin argumentos, toda la caché."""
+        with self._lock:
+            if page_id is None:
+                self._pages.clear()
+            else:
+                self._pages.pop(page_id, None)
+
+    def _trusted(self, entry):
+        edited = datetime.datetime.fromisoformat(entry['last_edited_time'].replace('Z', '+00:00'))
+        return (entry['fetched_at'] - edited).total_seconds() > self.trust_window
+
+
+def render_markdown(blocks, depth=0):
+    """Renderiza un árbol de bloques de Notion (con 'children' ya resueltos) a Markdown."""
+    # (compacto, texto): elementos de lista y filas de tabla consecutivos van sin línea en blanco entre ellos
+    lines = []
+    indent = '  ' * depth
+    number = 0
+    for block in blocks:
+        kind = block['type']
+        content = block.get(kind) or {}
+        text = _rich_text_markdown(content.get('rich_text', []))
+        number = number + 1 if kind == 'numbered_list_item' else 0
+        nested = block.get('children', [])
+        line_count = len(lines)
+        if kind.startswith('heading_'):
+            lines.append(f"{'#' * int(kind[-1])} {text}")
+        elif kind == 'bulleted_list_item' or kind == 'toggle':
+            lines.append(f'{indent}- {text}')
+        elif kind == 'numbered_list_item':
+            lines.append(f'{indent}{number}. {text}')
+        elif kind == 'to_do':
+            lines.append(f"{indent}- [{'x' if content.get('checked') else ' '}] {text}")
+        elif kind == 'code':
+            language = content.get('language', '')
+            lines.append(f"```{'' if language == 'plain text' else language}\n{plain_text(content.get('rich_text', []))}\n```")
+        elif kind in ('quote', 'callout'):
+            lines.append('\n'.join('> ' + line for line in text.split('\n')))
+        elif kind == 'divider':
+            lines.append('---')
+        elif kind == 'child_page':
+            lines.append(f"📄 {content.get('title', '')}")
+        elif kind in ('image', 'file', 'pdf', 'video'):
+            url = (content.get('file') or content.get('external') or {}).get('url', '')
+            caption = plain_text(content.get('caption', []))
+            lines.append(f'![{caption}]({url})' if kind == 'image' else f'[{caption or kind}]({url})')
+        elif kind in ('bookmark', 'embed', 'link_preview'):
+            lines.append(content.get('url', ''))
+        elif kind == 'equation':
+            lines.append(f"$$ {content.get('expression', '')} $$")
+        elif kind == 'table_row':
+            lines.append('| ' + ' | '.join(_rich_text_markdown(cell) for cell in content.get('cells', [])) + ' |')
+        elif kind == 'table':
+            rows = render_markdown(nested).split('\n')
+            if content.get('has_column_header') and rows:
+                rows.insert(1, '|' + ' --- |' * content.get('table_width', 1))
+            lines.append('\n'.join(rows))
+            lines[-1] = (False, lines[-1])
+            continue
+        elif text:
+            lines.append(f'{indent}{text}' if depth else text)
+        is_list = kind in ('bulleted_list_item', 'numbered_list_item', 'to_do', 'toggle')
+        compact = is_list or kind == 'table_row'
+        lines[line_count:] = [(compact, line) for line in lines[line_count:]]
+        if nested:
+            lines.append((compact, render_markdown(nested, depth + 1 if is_list else depth)))
+    markdown = ''
+    for i, (compact, line) in enumerate(lines):
+        if i:
+            markdown += '\n' if compact and lines[i - 1][0] else '\n\n'
+        markdown += line
+    return markdown
+
+
+def _rich_text_markdown(rich_text):
+    parts = []
+    for part in rich_text:
+        text = part.get('plain_text', part.get('text', {}).get('content', ''))
+        annotations = part.get('annotations', {})
+        if annotations.get('code'):
+            text = f'`{text}`'
+        if annotations.get('bold'):
+            text = f'**{text}**'
+        if annotations.get('italic'):
+            text = f'*{text}*'
+        if annotations.get('strikethrough'):
+            text = f'~~{text}~~'
+        link = part.get('href') or (part.get('text', {}).get('link') or {}).get('url')
+        if link:
+            text = f'[{text}]({link})'
+        parts.append(text)
+    return ''.join(parts)
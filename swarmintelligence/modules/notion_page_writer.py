@@ -0,0 +1,121 @@
+import difflib
+from swarmintelligence.modules.notion_markdown import block_signature, markdown_to_blocks
+
+MAX_BLOCKS_PER_REQUEST = 100
+
+
+class NotionPageWriter:
+    """
+    Escritura de contenido Markdown en páginas de Notion con el mínimo de peticiones.
+
+    `replace` compara los bloques actuales de la página con los generados a partir del nuevo Markdown
+    (difflib sobre firmas de bloque) y solo envía los cambios:
+      - bloques iguales: no se tocan;
+      - bloques del mismo tipo con distinto texto: se actualizan en su sitio;
+      - el resto: se borran los sobrantes y se insertan los nuevos tras el bloque anterior (`after`),
+        en lotes de hasta 100 bloques por petición.
+    La API no permite insertar antes del primer bloque: si hay que insertar al principio de una página
+    con bloques que se conservan, se reescribe la página completa.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def append(self, page_id, markdown):
+        """Añade el Markdown al final de la página en lotes de hasta 100 bloques."""
+        stats = self._new_stats()
+        self._insert(page_id, None, markdown_to_blocks(markdown), stats)
+        return stats
+
+    def replace(self, page_id, markdown):
+        """Deja la página con el contenido de `markdown` enviando solo las diferencias."""
+        new_blocks = markdown_to_blocks(markdown)
+        old_blocks = list(self.client.list_block_children(page_id))
+        old_signatures = [self._existing_signature(block) for block in old_blocks]
+        new_signatures = [block_signature(block) for block in new_blocks]
+
+        operations = self._plan(old_blocks, new_blocks, old_signatures, new_signatures)
+        stats = self._new_stats()
+        kept = {op[1] for op in operations if op[0] in ('keep', 'update')}
+        if any(op[0] == 'insert' and op[1] is None for op in operations) and kept:
+            # Inserción al principio con bloques conservados después: reescritura completa
+            operations = [('delete', block['id']) for block in old_blocks] + [('insert', None, new_blocks)]
+            stats['full_rewrite'] = True
+
+        for op in operations:
+            if op[0] == 'update':
+                _, block_id, block = op
+                self.client.update_block(block_id, {block['type']: block[block['type']]})
+                stats['updated'] += 1
+                stats['requests'] += 1
+            elif op[0] == 'delete':
+                self.client.delete_block(op[1])
+                stats['deleted'] += 1
+                stats['requests'] += 1
+            elif op[0] == 'insert':
+                self._insert(page_id, op[1], op[2], stats)
+        return stats
+
+    def _plan(self, old_blocks, new_blocks, old_signatures, new_signatures):
+        """Lista de operaciones ('keep'|'update'|'delete', id...) e ('insert', after_id, bloques) en orden."""
+        operations = []
+        anchor = None
+        pending = []
+
+        def flush():
+            if pending:
+                operations.append(('insert', anchor, list(pending)))
+                pending.clear()
+
+        matcher = difflib.SequenceMatcher(None, old_signatures, new_signatures, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                flush()
+                operations.extend(('keep', block['id']) for block in old_blocks[i1:i2])
+                anchor = old_blocks[i2 - 1]['id']
+                continue
+            old, new = old_blocks[i1:i2], new_blocks[j1:j2]
+            for k in range(max(len(old), len(new))):
+                old_block = old[k] if k < len(old) else None
+                new_block = new[k] if k < len(new) else None
+                if old_block is not None and new_block is not None and self._updatable(old_block, new_block):
+                    flush()
+                    operations.append(('update', old_block['id'], new_block))
+                    anchor = old_block['id']
+                    continue
+                if old_block is not None:
+                    operations.append(('delete', old_block['id']))
+                if new_block is not None:
+                    pending.append(new_block)
+        flush()
+        # Los inserts se encadenan: cada lote va tras el último bloque insertado del lote anterior
+        return operations
+
+    def _insert(self, page_id, after, blocks, stats):
+        for start in range(0, len(blocks), MAX_BLOCKS_PER_REQUEST):
+            batch = blocks[start:start + MAX_BLOCKS_PER_REQUEST]
+            response = self.client.append_block_children(page_id, batch, after=after)
+            stats['inserted'] += len(batch)
+            stats['requests'] += 1
+            results = response.get('results') or []
+            if results:
+                after = results[-1]['id']
+        return after
+
+    def _existing_signature(self, block):
+        children = None
+        if block.get('has_children') and block['type'] in ('bulleted_list_item', 'numbered_list_item', 'to_do'):
+            children = tuple(self._existing_signature(child) for child in self.client.list_block_children(block['id']))
+        elif block.get('has_children'):
+            return (block['type'], block['id'])
+        return block_signature(block, children=children)
+
+    @staticmethod
+    def _updatable(old_block, new_block):
+        # La actualización en sitio solo cambia el contenido propio: mismo tipo y sin hijos en ninguno de los dos
+        return (old_block['type'] == new_block['type'] and not old_block.get('has_children')
+                and not new_block[new_block['type']].get('children') and old_block['type'] != 'divider')
+
+    @staticmethod
+    def _new_stats():
+        return {'inserted': 0, 'updated': 0, 'deleted': 0, 'requests': 0, 'full_rewrite': False}
@@ -0,0 +1,137 @@
+import json as jsonlib
+
+NOTION_API_URL = 'https://api.notion.com/v1'
+NOTION_VERSION = '2022-06-28'
+
+
+class NotionAPIError(Exception):
+    """Error devuelto por la API de Notion (status HTTP, código de Notion y Retry-After si lo hay)."""
+
+    def __init__(self, status, code, message, retry_after=None):
+        super().__init__(f'[{status} {code}] {message}')
+        self.status = status
+        self.code = code
+        self.retry_after = retry_after
+
+
+class NotionRestClient:
+    """
+    Cliente mínimo de la API REST de Notion sobre una requests.Session (conexiones reutilizadas).
+
+    Cubre las operaciones que NotionIO no expone con el detalle necesario: consultas de database
+    filtradas y paginadas (p.ej. por last_edited_time), metadatos de página y operaciones por bloque.
+    Los listados paginados se devuelven como generadores que recorren todos los cursores.
+    Con `scheduler` (NotionRequestScheduler) las peticiones respetan el rate limit compartido y las
+    lecturas idénticas concurrentes se agrupan.
+    """
+
+    def __init__(self, auth_token, session=None, notion_version=NOTION_VERSION, timeout=30, scheduler=None):
+        if session is None:
+            import requests
+            session = requests.Session()
+        self.session = session
+        self.session.headers.update({
+            'Authorization': f'Bearer {auth_token}',
+            'Notion-Version': notion_version,
+            'Content-Type': 'application/json',
+        })
+        self.timeout = timeout
+        self.scheduler = scheduler
+
+    def request(self, method, path, json=None, params=None, idempotent=None):
+        if self.scheduler is None:
+            return self._send(method, path, json, params)
+        # GET y las consultas de database son lecturas: se pueden agrupar
+        is_read = method == 'GET' or (method == 'POST' and path.endswith('/query'))
+        read_key = (method, path, jsonlib.dumps(json, sort_keys=True), jsonlib.dumps(params, sort_keys=True)) if is_read else None
+        if idempotent is None:
+            # Las demás POST crean recursos; PATCH y DELETE sobrescriben o archivan y se pueden repetir
+            idempotent = is_read or method != 'POST'
+        return self.scheduler.call(self._send, method, path, json, params, read_key=read_key, idempotent=idempotent)
+
+    def _send(self, method, path, json, params):
+        response = self.session.request(method, NOTION_API_URL + path, json=json, params=params, timeout=self.timeout)
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            retry_after = response.headers.get('Retry-After')
+            raise NotionAPIError(response.status_code, body.get('code', 'http_error'), body.get('message', response.text[:200]),
+                                 retry_after=float(retry_after) if retry_after else None)
+        return response.json() if response.content else {}
+
+    def query_database(self, database_id, filter=None, sorts=None, page_size=100):
+        """Genera todas las páginas de la database que cumplen `filter`."""
+        body = {'page_size': page_size}
+        if filter is not None:
+            body['filter'] = filter
+        if sorts is not None:
+            body['sorts'] = sorts
+        while True:
+            data = self.request('POST', f'/databases/{database_id}/query', json=body)
+            yield from data.get('results', [])
+            if not data.get('has_more'):
+                return
+            body['start_cursor'] = data['next_cursor']
+
+    def retrieve_page(self, page_id):
+        return self.request('GET', f'/pages/{page_id}')
+
+    def list_block_children(self, block_id, page_size=100):
+        """Genera los bloques hijos directos de `block_id`."""
+        params = {'page_size': page_size}
+        while True:
+            data = self.request('GET', f'/blocks/{block_id}/children', params=params)
+            yield from data.get('results', [])
+            if not data.get('has_more'):
+                return
+            params['start_cursor'] = data['next_cursor']
+
+    def append_block_children(self, block_id, children, after=None):
+        body = {'children': children}
+        if after is not None:
+            body['after'] = after
+        # Añadir bloques no es idempotente: repetirlo tras un 5xx podría duplicarlos
+        return self.request('PATCH', f'/blocks/{block_id}/children', json=body, idempotent=False)
+
+    def update_block(self, block_id, block):
+        return self.request('PATCH', f'/blocks/{block_id}', json=block)
+
+    def delete_block(self, block_id):
+        return self.request('DELETE', f'/blocks/{block_id}')
+
+
+def plain_text(rich_text):
+    """Texto plano de una lista rich_text de Notion."""
+    return ''.join(part.get('plain_text', part.get('text', {}).get('content', '')) for part in rich_text or [])
+
+
+def flatten_properties(properties):
+    """Convierte las propiedades tipadas de una página de Notion en valores simples (str, list, número...)."""
+    flat = {}
+    for name, prop in properties.items():
+        kind = prop.get('type')
+        value = prop.get(kind)
+        if kind in ('title', 'rich_text'):
+            value = plain_text(value)
+        elif kind in ('select', 'status'):
+            value = value.get('name') if value else None
+        elif kind == 'multi_select':
+            value = [option['name'] for option in value or []]
+        elif kind == 'date':
+            value = value.get('start') if value else None
+        elif kind == 'people':
+            value = [person.get('name') or person.get('id') for person in value or []]
+        elif kind == 'relation':
+            value = [relation['id'] for relation in value or []]
+        elif kind == 'formula':
+            value = value.get(value.get('type')) if value else None
+        elif kind == 'rollup':
+            value = value.get(value.get('type')) if value else None
+        elif kind == 'files':
+            value = [f.get('name') for f in value or []]
+        elif kind in ('created_by', 'last_edited_by'):
+            value = value.get('name') or value.get('id') if value else None
+        flat[name] = value
+    return flat
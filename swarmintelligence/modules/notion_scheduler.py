@@ -0,0 +1,146 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+from swarmintelligence.modules.token_bucket import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {409, 429, 500, 502, 503, 504}
+# Un 429 llega antes de procesar la petición: es lo único que se puede reintentar en escrituras no idempotentes
+NON_IDEMPOTENT_RETRYABLE_STATUS = {429}
+
+
+class NotionRequestScheduler:
+    """
+    Planificador compartido de peticiones a Notion (límite por integración: ~3 peticiones/s).
+
+    - Todas las peticiones pasan por un TokenBucket común (`rate` por segundo, ráfagas de `burst`).
+    - Los errores de rate limit y los transitorios se reintentan hasta `max_retries` veces; en las
+      escrituras no idempotentes (`idempotent=False`) solo se reintenta el 429. Se respeta el Retry-After si viene y, si no, se usa backoff exponencial con jitter. La espera pausa el bucket
+      para todos los hilos, de modo que el resto de peticiones no sigue golpeando la API.
+    - Las lecturas idénticas concurrentes (mismo `read_key`) se agrupan en una sola petición.
+    - `metrics()` expone el estado de la cola y los contadores.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, rate=3, burst=3, max_retries=5, backoff_base=0.5, backoff_max=30):
+        self.bucket = TokenBucket(rate=rate, capacity=burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._in_flight_reads = {}
+        self._lock = threading.Lock()
+        self._metrics = {'queued': 0, 'in_flight': 0, 'completed': 0, 'failed': 0, 'retries': 0, 'rate_limited': 0,
+                         'coalesced': 0, 'wait_seconds': 0.0, 'latency_seconds': 0.0}
+
+    @classmethod
+    def shared(cls):
+        """Devuelve el planificador global del proceso (se crea en el primer uso)."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def call(self, fn, *args, read_key=None, idempotent=True, **kwargs):
+        """
+        Ejecuta `fn(*args, **kwargs)` respetando el límite de peticiones.
+
+        Si se indica `read_key` (solo para lecturas), las llamadas concurrentes con la misma clave
+        comparten el resultado de una única petición. Con `idempotent=False` (p. ej. crear una página)
+        un 409 o un 5xx no se reintenta: la escritura puede haberse aplicado y repetirla la duplicaría.
+        """
+        retryable = RETRYABLE_STATUS if idempotent else NON_IDEMPOTENT_RETRYABLE_STATUS
+        if read_key is None:
+            return self._execute(fn, args, kwargs, retryable)
+        with self._lock:
+            future = self._in_flight_reads.get(read_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight_reads[read_key] = future
+            else:
+                self._metrics['coalesced'] += 1
+        if not owner:
+            return future.result()
+        try:
+            result = self._execute(fn, args, kwargs, retryable)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight_reads[read_key]
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        finished = metrics['completed'] + metrics['failed']
+        metrics['avg_latency_seconds'] = metrics['latency_seconds'] / finished if finished else 0.0
+        metrics['tokens_available'] = self.bucket.available
+        return metrics
+
+    def _execute(self, fn, args, kwargs, retryable=RETRYABLE_STATUS):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            self._count('queued', 1)
+            wait_start = time.monotonic()
+            self.bucket.acquire()
+            self._count('queued', -1)
+            self._count('wait_seconds', time.monotonic() - wait_start)
+            self._count('in_flight', 1)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                status, retry_after = self._classify(e)
+                if status not in retryable or attempt >= self.max_retries:
+                    self._count('failed', 1)
+                    self._count('latency_seconds', time.monotonic() - start)
+                    raise
+                if status == 429:
+                    self._count('rate_limited', 1)
+                wait = retry_after if retry_after is not None else min(self.backoff_max, self.backoff_base * 2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"Notion {status}: reintento {attempt + 1}/{self.max_retries} en {wait:.1f}s")
+                # Pausa global: el resto de peticiones también espera a que pase la ventana
+                self.bucket.pause(wait)
+                self._count('retries', 1)
+                attempt += 1
+            else:
+                self._count('completed', 1)
+                self._count('latency_seconds', time.monotonic() - start)
+                return result
+            finally:
+                self._count('in_flight', -1)
+
+    def _count(self, key, value):
+        with self._lock:
+            self._metrics[key] += value
+
+    @staticmethod
+    def _classify(error):
+        """
+        Devuelve (status HTTP, retry_after) a partir de la excepción (NotionAPIError, requests o NotionIO).
+
+        Solo se usan el status y el código de error tipados; el texto del mensaje no se interpreta.
+        """
+        status = getattr(error, 'status', None) or getattr(error, 'status_code', None)
+        retry_after = getattr(error, 'retry_after', None)
+        response = getattr(error, 'response', None)
+        if response is not None:
+            status = status or getattr(response, 'status_code', None)
+            header = (getattr(response, 'headers', None) or {}).get('Retry-After')
+            if retry_after is None and header:
+                try:
+                    retry_after = float(header)
+                except ValueError:
+                    pass
+        if status is None and getattr(error, 'code', None) == 'rate_limited':
+            status = 429
+        return status, retry_after
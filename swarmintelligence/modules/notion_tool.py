@@ -2,6 +2,12 @@ import json
 import os
 from typing import Any, Dict, List, Optional
 from eigenlib.utils.notion_io import NotionIO
+from swarmintelligence.modules.notion_mirror import NotionMirror
+from swarmintelligence.modules.notion_page_cache import NotionPageCache
+from swarmintelligence.modules.notion_page_writer import NotionPageWriter
+from swarmintelligence.modules.notion_rest_client import NotionRestClient
+from swarmintelligence.modules.notion_scheduler import NotionRequestScheduler
+import threading
 import types
 
 ALLOWED_PROJECTS = ['jedi', 'test_project']
@@ -14,18 +20,30 @@ class NotionTool:
     dentro de un agente OpenAI, siguiendo la interfaz del framework.
 
     Operaciones implementadas:
-    - get_database_pages
+    - get_database_pages (servida desde una réplica local SQLite sincronizada de forma incremental;
+      admite filtros por status/project/fechas/nombre, proyección de columnas y paginación)
     - create_database_page (usa los argumentos fijos: name, project, status, target_date, content)
     - read_page_as_markdown
     - update_page_properties (usa los argumentos fijos: name, project, status, target_date)
     - delete_page
-    - write_page_content (reemplaza write_text, con soporte para Markdown y clear_existing)
+    - write_page_content (reemplaza write_text, con soporte para Markdown y clear_existing; con
+      clear_existing=True solo se envían los bloques que cambian respecto al contenido actual)
     """
 
-    def __init__(self, auth_token: str, database_id="2262a599-e985-8017-9faf-dd11b3b8df8b"):
+    def __init__(self, auth_token: str, database_id="2262a599-e985-8017-9faf-dd11b3b8df8b",
+                 mirror_path="./data/curated/notion_mirror.sqlite", mirror_sync_interval=30):
         self.tool_name = "notion_tool"
         self.tool_description = "Gestiona bases de datos y páginas en Notion (leer, crear, actualizar, borrar, escribir contenido Markdown)."
         self.notion = NotionIO(auth_token=auth_token)
+        # Todas las peticiones a Notion (NotionIO y REST) comparten el planificador del proceso
+        self.scheduler = NotionRequestScheduler.shared()
+        self.rest = NotionRestClient(auth_token=auth_token, scheduler=self.scheduler)
+        self.writer = NotionPageWriter(self.rest)
+        self.page_cache = NotionPageCache(self.rest)
+        self.mirror_path = mirror_path
+        self.mirror_sync_interval = mirror_sync_interval
+        self._mirrors = {}
+        self._mirrors_lock = threading.Lock()
         # ID por defecto de la database (la usaré automáticamente)
         self.database_id = database_id
 
@@ -71,6 +89,32 @@ class NotionTool:
                 "type": "string",
                 "description": "Contenido Markdown a escribir en la página. Soporta encabezados, listas, código, citas, etc."
             },
+            # Filtros y paginación de get_database_pages
+            "date_from": {
+                "type": "string",
+                "description": "Para get_database_pages: Target Date mínima (YYYY-MM-DD, inclusiva)."
+            },
+            "date_to": {
+                "type": "string",
+                "description": "Para get_database_pages: Target Date máxima (YYYY-MM-DD, inclusiva)."
+            },
+            "name_contains": {
+                "type": "string",
+                "description": "Para get_database_pages: texto que debe contener el nombre de la página."
+            },
+            "columns": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Para get_database_pages: propiedades a devolver (p.ej. ['Name', 'Status']). Por defecto todas."
+            },
+            "page": {
+                "type": "integer",
+                "description": "Para get_database_pages: número de página de resultados (empieza en 1). Default: 1"
+            },
+            "page_size": {
+                "type": "integer",
+                "description": "Para get_database_pages: resultados por página. Default: 20"
+            },
             "clear_existing": {
                 "type": "boolean",
                 "description": "Para write_page_content: si True, limpia el contenido existente antes de escribir. Default: false",
@@ -81,8 +125,17 @@ class NotionTool:
         # Solo operation es estrictamente requerido en el schema general.
         # (Las demás son requeridas condicionalmente según la operación.)
         self.required = ["operation"]
+        self._schema = None
 
     # ---------- Helpers ----------
+    def _mirror(self, database_id: str) -> NotionMirror:
+        """Réplica local de la database (una por database_id, creada en el primer uso)."""
+        with self._mirrors_lock:
+            if database_id not in self._mirrors:
+                self._mirrors[database_id] = NotionMirror(self.rest, database_id, path=self.mirror_path,
+                                                          min_sync_interval=self.mirror_sync_interval)
+            return self._mirrors[database_id]
+
     def _build_properties_from_fixed_args(
             self,
             name: Optional[str],
@@ -129,16 +182,29 @@ class NotionTool:
         database_id = kwargs.get("database_id", self.database_id)
 
         if operation == "get_database_pages":
+            mirror = self._mirror(database_id)
+            stale = False
             try:
-                pages = self.notion.get_database_pages(database_id=database_id)
-                # NotionIO retorna un DataFrame en tu implementación; convertir a lista de records si es DataFrame
-                try:
-                    return pages.to_dict(orient="records")
-                except Exception:
-                    return pages  # si ya es lista, devolver tal cual
+                mirror.sync()
             except Exception as e:
-                self.notion.logger.error(f"Error en get_database_pages: {e}")
-                return {"error": str(e)}
+                # Sin conexión con Notion se sirve la réplica local si tiene datos
+                self.notion.logger.error(f"Error sincronizando la réplica de Notion: {e}")
+                if not len(mirror):
+                    return {"error": str(e)}
+                stale = True
+            result = mirror.query(
+                status=kwargs.get("status"),
+                project=kwargs.get("project"),
+                date_from=kwargs.get("date_from"),
+                date_to=kwargs.get("date_to"),
+                name_contains=kwargs.get("name_contains"),
+                columns=kwargs.get("columns"),
+                page=kwargs.get("page", 1),
+                page_size=kwargs.get("page_size", 20),
+            )
+            if stale:
+                result["stale"] = True
+            return result
 
         elif operation == "create_database_page":
             name = kwargs.get("name")
@@ -162,8 +228,9 @@ class NotionTool:
 
             properties = self._build_properties_from_fixed_args(name, project, status, target_date)
             try:
-                page_id = self.notion.create_database_page(database_id=database_id, properties=properties,
-                                                           content=content)
+                page_id = self.scheduler.call(self.notion.create_database_page, database_id=database_id,
+                                              properties=properties, content=content, idempotent=False)
+                self._mirror(database_id).invalidate()
                 return {"page_id": page_id}
             except Exception as e:
                 self.notion.logger.error(f"Error creando página: {e}")
@@ -174,7 +241,8 @@ class NotionTool:
             if not page_id:
                 return {"error": "page_id requerido para read_page_as_markdown"}
             try:
-                md = self.notion.read_page_as_markdown(page_id=page_id)
+                # Solo se descarga el árbol de bloques si la página ha cambiado desde la última lectura
+                md = self.page_cache.read_markdown(page_id)
                 return {"markdown": md}
             except Exception as e:
                 self.notion.logger.error(f"Error leyendo página: {e}")
@@ -196,7 +264,8 @@ class NotionTool:
 
             properties = self._build_properties_from_fixed_args(name, project, status, target_date)
             try:
-                ok = self.notion.update_page_properties(page_id=page_id, properties=properties)
+                ok = self.scheduler.call(self.notion.update_page_properties, page_id=page_id, properties=properties)
+                self._mirror(database_id).invalidate()
                 return {"ok": ok}
             except Exception as e:
                 self.notion.logger.error(f"Error actualizando propiedades: {e}")
@@ -207,7 +276,9 @@ class NotionTool:
             if not page_id:
                 return {"error": "page_id requerido para delete_page"}
             try:
-                ok = self.notion.delete_page(page_id=page_id)
+                ok = self.scheduler.call(self.notion.delete_page, page_id=page_id)
+                self._mirror(database_id).remove(page_id)
+                self.page_cache.invalidate(page_id)
                 return {"ok": ok}
             except Exception as e:
                 self.notion.logger.error(f"Error borrando (archivando) página: {e}")
@@ -225,19 +296,20 @@ class NotionTool:
                 return {"error": "content requerido para write_page_content"}
 
             try:
-                # Usar el método write_page_content de NotionIO que soporta Markdown y clear_existing
-                ok = self.notion.write_page_content(
-                    page_id=page_id,
-                    markdown_content=content,
-                    clear_existing=clear_existing
-                )
+                # Reemplazo por diferencias (solo se envían inserts/updates/deletes) o append en lotes de 100 bloques
+                if clear_existing:
+                    stats = self.writer.replace(page_id=page_id, markdown=content)
+                else:
+                    stats = self.writer.append(page_id=page_id, markdown=content)
+                self.page_cache.invalidate(page_id)
 
                 action = "reemplazado" if clear_existing else "añadido"
                 return {
-                    "ok": ok,
+                    "ok": True,
                     "message": f"Contenido Markdown {action} exitosamente en la página",
                     "clear_existing": clear_existing,
-                    "content_length": len(content)
+                    "content_length": len(content),
+                    "changes": stats
                 }
             except Exception as e:
                 self.notion.logger.error(f"Error escribiendo contenido Markdown: {e}")
@@ -249,9 +321,11 @@ class NotionTool:
     # ---------- Interfaz para OpenAI ----------
     def initialize(self) -> Dict[str, Any]:
         """
-        Devuelve la definición de la tool en formato JSON Schema para OpenAI.
+        Devuelve la definición de la tool en formato JSON Schema para OpenAI (calculada una sola vez).
         """
-        cfg = {
+        if self._schema is not None:
+            return self._schema
+        self._schema = {
             "type": "function",
             "function": {
                 "name": self.tool_name,
@@ -263,7 +337,7 @@ class NotionTool:
                 }
             }
         }
-        return cfg
+        return self._schema
 
     def call(self, payload):
         """
@@ -0,0 +1,101 @@
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from swarmintelligence.modules.chat_session_manager import clone_agent
+
+logger = logging.getLogger(__name__)
+
+
+class ParallelSimulator:
+    """
+    Ejecuta los episodios de evaluación de BaseSimulator en paralelo.
+
+    Cada episodio (episode_id) se simula de forma independiente sobre una copia del usuario y del
+    agente (ver `clone_agent`: cliente LLM, ContextWindowManager y memoria propios), de modo que
+    ningún estado mutable se comparte entre episodios simultáneos. Los resultados se concatenan
+    en el orden original del dataset, independientemente del orden en que terminen.
+    Los errores de rate limit del proveedor se reintentan con backoff exponencial con jitter,
+    respetando `retry_after` cuando la excepción lo informa.
+    Con un `checkpoint` (EvaluationCheckpoint) cada episodio terminado se guarda de forma incremental
+    y, al relanzar, los episode_id ya completados se saltan.
+    """
+
+    def __init__(self, user, agent, experiment_id, n_workers=1, max_retries=5, backoff_base=2.0, backoff_max=60.0, checkpoint=None):
+        self.user = user
+        self.agent = agent
+        self.experiment_id = experiment_id
+        self.n_workers = n_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.checkpoint = checkpoint
+
+    def generate(self, env_config, env_history):
+        """Misma interfaz que BaseSimulator.generate: devuelve (env_history, env_config)."""
+        if self.n_workers <= 1 and self.checkpoint is None:
+            return self._simulate(env_config, env_history, self.user, self.agent)
+        if len(env_history) and 'episode_id' not in env_history.columns:
+            # Sin episode_id no se puede repartir el historial: cada episodio recibiría el historial completo
+            raise ValueError("env_history debe tener la columna 'episode_id' para simular episodios en paralelo")
+        episode_ids = list(dict.fromkeys(env_config['episode_id']))
+        pending_ids = episode_ids
+        if self.checkpoint is not None:
+            completed_ids = self.checkpoint.completed_ids()
+            pending_ids = [episode_id for episode_id in episode_ids if episode_id not in completed_ids]
+            logger.info(f"Checkpoint: {len(episode_ids) - len(pending_ids)} episodios completados, {len(pending_ids)} pendientes")
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.n_workers)) as executor:
+                results = list(executor.map(lambda episode_id: self._run_episode(episode_id, env_config, env_history), pending_ids))
+        finally:
+            # Aunque falle un episodio, los que ya terminaron quedan guardados para la siguiente ejecución
+            if self.checkpoint is not None:
+                self.checkpoint.flush()
+        if self.checkpoint is None:
+            histories = [history for history, _ in results]
+            configs = [config for _, config in results]
+            return pd.concat(histories, ignore_index=True), pd.concat(configs)
+        history, config = self.checkpoint.load()
+        return self._sort_by_episode(history, episode_ids), self._sort_by_episode(config, episode_ids)
+
+    def _run_episode(self, episode_id, env_config, env_history):
+        episode_config = env_config[env_config['episode_id'] == episode_id]
+        if len(env_history):
+            env_history = env_history[env_history['episode_id'] == episode_id]
+        for attempt in range(self.max_retries + 1):
+            try:
+                result_history, result_config = self._simulate(episode_config, env_history, clone_agent(self.user), clone_agent(self.agent))
+                if self.checkpoint is not None:
+                    self.checkpoint.add(result_history, result_config)
+                return result_history, result_config
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_rate_limit(e):
+                    raise
+                wait = self._backoff(attempt, e)
+                logger.warning(f"Rate limit en episodio {episode_id} (intento {attempt + 1}). Reintentando en {wait:.1f}s")
+                time.sleep(wait)
+
+    def _simulate(self, env_config, env_history, user, agent):
+        from eigenlib.genai.base_simulator import BaseSimulator
+        from eigenlib.genai.base_environment import BaseEnvironment
+        return BaseSimulator(env=BaseEnvironment(), user=user, agent=agent, experiment_id=self.experiment_id).generate(env_config=env_config, env_history=env_history)
+
+    @staticmethod
+    def _sort_by_episode(df, episode_ids):
+        if 'episode_id' not in df.columns:
+            return df
+        order = {episode_id: i for i, episode_id in enumerate(episode_ids)}
+        return df.sort_values('episode_id', key=lambda s: s.map(order), kind='stable').reset_index(drop=True)
+
+    def _backoff(self, attempt, error):
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after:
+            return float(retry_after)
+        return min(self.backoff_max, self.backoff_base ** (attempt + 1)) * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _is_rate_limit(error):
+        status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+        text = f"{type(error).__name__} {error}".lower()
+        return status == 429 or 'ratelimit' in text or 'rate limit' in text or 'rate_limit' in text
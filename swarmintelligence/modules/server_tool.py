@@ -1,6 +1,6 @@
 import json
 import os
-from eigenlib.utils.network_io import NetworkIO
+from swarmintelligence.modules.tool_result_cache import ToolResultCache
 
 class ServerTool:
     """
@@ -13,15 +13,22 @@ class ServerTool:
         {
           "config": { ... }   # parámetros específicos para el método
         }
+    Caché de resultados (cache_policy):
+      None (por defecto) -> la tool no se cachea (tools con efectos secundarios).
+      {"ttl": 3600, "key_args": ["query"]} -> los resultados sin error se guardan `ttl` segundos
+        (None = sin caducidad) en la caché compartida del proceso, con clave method + key_args
+        (None = todos los argumentos).
     """
 
-    def __init__(self, method, default_config, tool_name, tool_description, tool_args, max_output_length=1000):
+    def __init__(self, method, default_config, tool_name, tool_description, tool_args, max_output_length=1000, cache_policy=None):
         self.method = method
         self.tool_name = tool_name
         self.tool_description = tool_description
         self.tool_args = tool_args
         self.default_config = default_config
         self.max_output_length = max_output_length
+        self.cache_policy = cache_policy
+        self.cfg = None
 
         # Configuración de servidor MCP
         self.server_config = {
@@ -34,7 +41,9 @@ class ServerTool:
         }
 
     def initialize(self):
-        """Devuelve la especificación de la tool (schema para function-calling)."""
+        """Devuelve la especificación de la tool (schema para function-calling), calculada una sola vez."""
+        if self.cfg is not None:
+            return self.cfg
         args_schema = {}
         required = []
         for arg in self.tool_args:
@@ -85,25 +94,23 @@ class ServerTool:
         return text
 
     def _call_MCP_server(self, config):
-        """Lógica para llamar al servidor MCP."""
-        MASTER_ADDRESS = config['master_address']
-        client_name = config['client_name']
-        delay = config['delay']
-        password = config['password']
-        target_node = config['target_node']
-        payload = config['payload']
-
-        client = NetworkIO()
-        client.launch_node(node_name=client_name, master_address=MASTER_ADDRESS, node_method=lambda: "OK", delay=delay, password=password)
-        resultado = client.call(target_node=target_node, payload=payload)
-        client.stop()
-        config['result'] = resultado
+        """Lógica para llamar al servidor MCP a través del pool de clientes compartido del proceso."""
+        from swarmintelligence.modules.mcp_client_pool import MCPClientPool
+        config['result'] = MCPClientPool.shared().call(config)
         return config
 
     def call(self, payload):
         """Ejecuta la llamada al MCP server con los argumentos recibidos en el payload."""
         config = payload | self.default_config
-
+        if self.cache_policy is None:
+            return self._run(config)[0]
+        key_args = self.cache_policy.get('key_args')
+        key_config = config if key_args is None else {k: config.get(k) for k in key_args}
+        key = json.dumps([self.method, key_config], sort_keys=True, default=str)
+        return ToolResultCache.shared().get_or_call(key, lambda: self._run(config), ttl=self.cache_policy.get('ttl'))
+
+    def _run(self, config):
+        """Devuelve (respuesta, ok); solo las respuestas sin error son cacheables."""
         try:
             server_config = self.server_config.copy()
             server_config['payload'] = {'method': self.method, 'config': config}
@@ -113,7 +120,7 @@ class ServerTool:
                 "name": self.tool_name,
                 "content": json.dumps({"result": results})
             }
-            return self._limit_output(json.dumps(response))
+            return self._limit_output(json.dumps(response)), True
 
         except Exception as e:
             err = {"error": str(e) + ' -> The tool server failed. Stop the execution and inform the user.'}
@@ -122,7 +129,7 @@ class ServerTool:
                 "name": self.tool_name,
                 "content": json.dumps(err)
             }
-            return self._limit_output(json.dumps(response))
+            return self._limit_output(json.dumps(response)), False
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+import os
+import re
+import subprocess
+import sys
+import time
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+# Importaciones que dispara cada punto de entrada (sin llamadas de red ni arranque de servidores)
+ENTRY_POINTS = {
+    'predict': (
+        'from swarmintelligence.main import Main\n'
+        'from swarmintelligence.configs.base_config import Config\n'
+        'Config().agent\n'
+        'import swarmintelligence.modules.columnar_memory'
+    ),
+    'evaluation': (
+        'from swarmintelligence.main import Main\n'
+        'from swarmintelligence.configs.base_config import Config\n'
+        'cfg = Config(); cfg.agent; cfg.user\n'
+        'import swarmintelligence.modules.parallel_simulator\n'
+        'import swarmintelligence.modules.evaluation_checkpoint\n'
+        'import swarmintelligence.modules.dataset_store'
+    ),
+    'validation_split': (
+        'from swarmintelligence.main import Main\n'
+        'from swarmintelligence.configs.base_config import Config\n'
+        'Config().validation_split()\n'
+        'import swarmintelligence.modules.dataset_store'
+    ),
+    'train': (
+        'from swarmintelligence.main import Main\n'
+        'from swarmintelligence.configs.base_config import Config\n'
+        'Config().train()\n'
+        'import swarmintelligence.modules.dataset_store'
+    ),
+    'frontend': 'import swarmintelligence.modules.frontend',
+    'telegram': (
+        'from swarmintelligence.main import Main\n'
+        'import swarmintelligence.modules.telegram_chatbot\n'
+        'import swarmintelligence.modules.chat_session_manager\n'
+        'import swarmintelligence.configs.notion_agent_config'
+    ),
+}
+
+
+class StartupProfiler:
+    """
+    Mide el tiempo de arranque de cada punto de entrada con `python -X importtime`.
+
+    Cada entrada se ejecuta en un subproceso limpio (sin módulos ya importados) y se devuelve,
+    por entrada, el tiempo total, el tiempo de import de cada módulo (propio y acumulado, en ms)
+    y el error si la entrada no llega a importarse (p.ej. por una dependencia no instalada).
+    """
+
+    def __init__(self, entry_points=None, python=None, cwd=None, repeat=1):
+        self.entry_points = entry_points or ENTRY_POINTS
+        self.python = python or sys.executable
+        self.cwd = cwd
+        self.repeat = repeat
+
+    def run(self, names=None):
+        """Perfila las entradas indicadas (todas por defecto) y devuelve {nombre: informe}."""
+        return {name: self.profile(name) for name in (names or self.entry_points)}
+
+    def profile(self, name):
+        """Ejecuta la entrada `repeat` veces y se queda con la ejecución más rápida."""
+        runs = [self._profile_once(self.entry_points[name]) for _ in range(self.repeat)]
+        return min(runs, key=lambda r: r['wall_ms'])
+
+    def report(self, results, top=15):
+        """Texto con el resumen por entrada y los `top` módulos con más tiempo acumulado."""
+        lines = []
+        for name, result in results.items():
+            status = 'OK' if result['error'] is None else 'ERROR: ' + result['error']
+            lines.append(f"== {name}: {result['wall_ms']:.0f} ms total, {result['import_ms']:.0f} ms en imports ({status})")
+            for module in sorted(result['modules'], key=lambda m: m['cumulative_ms'], reverse=True)[:top]:
+                lines.append(f"   {module['cumulative_ms']:9.1f} ms acumulado {module['self_ms']:9.1f} ms propio  {'  ' * module['depth']}{module['module']}")
+        return '\n'.join(lines)
+
+    def _profile_once(self, code):
+        env = os.environ.copy()
+        if self.cwd is not None:
+            env['PYTHONPATH'] = os.pathsep.join(p for p in [self.cwd, env.get('PYTHONPATH')] if p)
+        start = time.perf_counter()
+        process = subprocess.run([self.python, '-X', 'importtime', '-c', code], cwd=self.cwd, env=env, capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - start) * 1000
+        modules, other = self._parse(process.stderr)
+        error = None
+        if process.returncode != 0:
+            error = other[-1] if other else f'exit code {process.returncode}'
+        return {
+            'wall_ms': wall_ms,
+            # Solo los módulos de primer nivel, para no contar dos veces los anidados
+            'import_ms': sum(m['cumulative_ms'] for m in modules if m['depth'] == 0),
+            'modules': modules,
+            'error': error,
+        }
+
+    @staticmethod
+    def _parse(stderr):
+        modules, other = [], []
+        for line in stderr.splitlines():
+            match = _IMPORTTIME_LINE.match(line)
+            if match is None:
+                if line.strip() and not line.startswith('import time:'):
+                    other.append(line.strip())
+                continue
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append({'module': module, 'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000, 'depth': (len(indent) - 1) // 2})
+        return modules, other
+
+
+if __name__ == '__main__':
+    profiler = StartupProfiler(cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    print(profiler.report(profiler.run(sys.argv[1:] or None)))
@@ -1,8 +1,17 @@
 import asyncio
+import contextlib
+import functools
+import inspect
+import io
 import logging
-from typing import Callable, Any, Optional, List
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Any, Optional, List, Dict
 from telegram import Update
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from swarmintelligence.modules.message_splitter import MessageSplitter
+from swarmintelligence.modules.token_bucket import TokenBucket
 
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,131 +27,361 @@ class TelegramChatbotClass:
         chat_function (Callable): Función que procesará los mensajes
         application (Application): Aplicación de telegram
         max_message_length (int): Longitud máxima por mensaje (límite de Telegram: 4096)
+        executor (Executor): Executor donde se ejecutan las chat_function síncronas
+        max_concurrent_per_chat (int): Mensajes procesados a la vez por chat
+        max_concurrent_total (int): Mensajes procesados a la vez en todo el bot
+        stream_edit_interval (float): Segundos mínimos entre ediciones de un mensaje en streaming
+        parse_mode (str): Formato de los mensajes enviados (None, 'HTML' o 'MarkdownV2')
+        splitter (MessageSplitter): Divisor de mensajes largos
+        document_threshold (int): Longitud a partir de la cual la respuesta se envía como fichero .md
     """
 
-    def __init__(self, token: str, chat_function: Optional[Callable[[str, dict], str]] = None,
-                 max_message_length: int = 4096):
+    def __init__(self, token: str, chat_function: Optional[Callable[[str, dict], Any]] = None,
+                 max_message_length: int = 4096, executor: Optional[Executor] = None, max_workers: int = 8,
+                 max_concurrent_per_chat: int = 1, max_concurrent_total: int = 8, stream_edit_interval: float = 1.0,
+                 parse_mode: Optional[str] = None, global_send_rate: float = 30, chat_send_rate: float = 1,
+                 group_send_rate: float = 20 / 60, chat_send_burst: int = 3, max_send_retries: int = 3,
+                 document_threshold: Optional[int] = None, send_bucket_ttl: float = 600):
         """
         Inicializa el chatbot.
 
         Args:
             token (str): Token del bot de Telegram obtenido de @BotFather
             chat_function (Callable): Función que procesará los mensajes.
-                                    Debe recibir (mensaje: str, context: dict) y retornar str
+                                    Debe recibir (mensaje: str, context: dict) y retornar str.
+                                    Puede ser síncrona o una corrutina (async def), y puede retornar
+                                    un iterador (o async iterator) de fragmentos de texto para streaming.
             max_message_length (int): Longitud máxima por mensaje (por defecto 4096, límite de Telegram)
+            executor (Executor): Executor para las chat_function síncronas. Por defecto un ThreadPoolExecutor
+                                 de `max_workers` hilos.
+            max_workers (int): Hilos del executor por defecto
+            max_concurrent_per_chat (int): Límite de mensajes procesándose a la vez en un mismo chat
+            max_concurrent_total (int): Límite global de mensajes procesándose a la vez
+            stream_edit_interval (float): Segundos mínimos entre ediciones del mensaje en streaming
+            parse_mode (str): None (texto plano), 'HTML' o 'MarkdownV2'. Con formato, el Markdown de la
+                              respuesta (bloques de código, `código`, **negrita**) se convierte y escapa.
+            global_send_rate (float): Mensajes/s que puede enviar el bot en total (límite de Telegram: ~30)
+            chat_send_rate (float): Mensajes/s por chat privado (límite de Telegram: ~1, con ráfagas cortas)
+            group_send_rate (float): Mensajes/s por grupo (límite de Telegram: 20 por minuto)
+            chat_send_burst (int): Mensajes seguidos que se permiten en un chat antes de aplicar el ritmo
+            max_send_retries (int): Reintentos de un envío tras un RetryAfter de Telegram
+            document_threshold (int): Si se indica, las respuestas más largas se envían como un único
+                                      documento Markdown en lugar de varios mensajes
+            send_bucket_ttl (float): Segundos sin envíos tras los que se olvida el ritmo de un chat
+
+        Los límites por chat se aplican desde el primer mensaje: `chat_send_burst` mensajes salen en
+        ráfaga y el resto al ritmo del chat, así que una respuesta de 20 partes tarda ~17 s en un chat
+        privado (usar `document_threshold` para las respuestas muy largas). Cada RetryAfter de Telegram
+        pausa el chat y reduce su ritmo a la mitad hasta que pasa `send_bucket_ttl` sin enviarle nada.
         """
         self.token = token
         self.chat_function = chat_function or self._default_chat_function
         self.application = None
         self.max_message_length = max_message_length
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chat_function')
+        self.max_concurrent_per_chat = max_concurrent_per_chat
+        self.max_concurrent_total = max_concurrent_total
+        self.stream_edit_interval = stream_edit_interval
+        self.parse_mode = parse_mode
+        self.splitter = MessageSplitter(max_length=max_message_length, parse_mode=parse_mode)
+        self.chat_send_rate = chat_send_rate
+        self.group_send_rate = group_send_rate
+        self.chat_send_burst = chat_send_burst
+        self.max_send_retries = max_send_retries
+        self.document_threshold = document_threshold
+        self.send_bucket_ttl = send_bucket_ttl
+        self._global_send_bucket = TokenBucket(rate=global_send_rate, capacity=global_send_rate)
+        self._chat_send_buckets: Dict[int, TokenBucket] = {}
+        self._chat_send_last_used: Dict[int, float] = {}
+        self._global_semaphore = None
+        self._chat_semaphores: Dict[int, asyncio.Semaphore] = {}
+        self._chat_pending: Dict[int, int] = {}
         self._setup_application()
 
     def _setup_application(self):
         """Configura la aplicación de Telegram."""
-        self.application = Application.builder().token(self.token).build()
+        # concurrent_updates permite atender varios chats a la vez; los límites se aplican en _chat_slot
+        self.application = Application.builder().token(self.token).concurrent_updates(True).build()
 
         # Manejadores
         self.application.add_handler(CommandHandler("start", self._start_command))
         self.application.add_handler(CommandHandler("help", self._help_command))
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self._handle_message))
 
-    def set_chat_function(self, chat_function: Callable[[str, dict], str]):
+    def set_chat_function(self, chat_function: Callable[[str, dict], Any]):
         """
         Establece o cambia la función de procesamiento de chat.
 
         Args:
             chat_function (Callable): Función que procesará los mensajes.
-                                    Debe recibir (mensaje: str, context: dict) y retornar str
+                                    Debe recibir (mensaje: str, context: dict) y retornar str.
+                                    Puede ser síncrona o una corrutina (async def).
         """
         self.chat_function = chat_function
 
+    @contextlib.asynccontextmanager
+    async def _chat_slot(self, chat_id: int):
+        """
+        Reserva un hueco de procesamiento respetando el límite por chat y el límite global.
+
+        Args:
+            chat_id (int): Chat que envía el mensaje
+        """
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrent_total)
+        chat_semaphore = self._chat_semaphores.setdefault(chat_id, asyncio.Semaphore(self.max_concurrent_per_chat))
+        self._chat_pending[chat_id] = self._chat_pending.get(chat_id, 0) + 1
+        try:
+            async with chat_semaphore, self._global_semaphore:
+                yield
+        finally:
+            # Liberar el semáforo del chat cuando no quedan mensajes pendientes
+            self._chat_pending[chat_id] -= 1
+            if not self._chat_pending[chat_id]:
+                del self._chat_pending[chat_id]
+                del self._chat_semaphores[chat_id]
+
+    async def _dispatch_chat_function(self, message_text: str, chat_context: dict) -> Any:
+        """
+        Ejecuta la chat_function sin bloquear el event loop.
+
+        Las corrutinas se esperan directamente y las funciones síncronas se envían al executor.
+
+        Args:
+            message_text (str): Mensaje recibido
+            chat_context (dict): Contexto del mensaje
+
+        Returns:
+            Any: Respuesta de la chat_function (str, o un iterador síncrono/asíncrono de fragmentos de texto)
+        """
+        if inspect.iscoroutinefunction(self.chat_function):
+            return await self.chat_function(message_text, chat_context)
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(self.executor, functools.partial(self.chat_function, message_text, chat_context))
+        if inspect.isawaitable(response):
+            response = await response
+        return response
+
+    async def _iterate_stream(self, stream):
+        """Recorre un iterador de fragmentos; los síncronos avanzan en el executor para no bloquear el loop."""
+        if hasattr(stream, '__aiter__'):
+            async for chunk in stream:
+                yield chunk
+            return
+        iterator = iter(stream)
+        loop = asyncio.get_running_loop()
+        done = object()
+        while True:
+            chunk = await loop.run_in_executor(self.executor, next, iterator, done)
+            if chunk is done:
+                return
+            yield chunk
+
+    async def _stream_message(self, update: Update, stream) -> str:
+        """
+        Muestra una respuesta en streaming editando progresivamente un mensaje provisional.
+
+        Las ediciones se espacian al menos `stream_edit_interval` segundos y se omiten si el chat no
+        tiene cupo de envío (ver `_try_call_telegram`). Si la respuesta final
+        supera el límite de un mensaje, el provisional se sustituye por el envío dividido habitual.
+        Los eventos {'type': 'status', 'text'} (p.ej. una tool en curso) se muestran bajo el texto
+        hasta el siguiente fragmento, pero no forman parte de la respuesta.
+
+        Args:
+            update (Update): Objeto de actualización de Telegram
+            stream: Iterador (síncrono o asíncrono) de fragmentos de texto y eventos de estado
+
+        Returns:
+            str: Texto completo de la respuesta
+        """
+        chat_id = update.effective_chat.id
+        placeholder = await self._call_telegram(chat_id, update.message.reply_text, "✍️ ...")
+        text = ''
+        shown = ''
+        last_edit = time.monotonic()
+        status = ''
+        async for chunk in self._iterate_stream(stream):
+            if isinstance(chunk, dict):
+                status = chunk.get('text', '')
+            else:
+                text += chunk
+                status = ''
+            display = f"{text}\n\n{status}".strip() if status else text
+            if len(display) <= self.max_message_length and display.strip() and display != shown and time.monotonic() - last_edit >= self.stream_edit_interval:
+                try:
+                    if await self._try_call_telegram(chat_id, placeholder.edit_text, display):
+                        shown = display
+                except Exception as e:
+                    logger.warning(f"Error editando mensaje en streaming: {e}")
+                last_edit = time.monotonic()
+
+        parts = self.splitter.split_pairs(text) if text.strip() else []
+        if len(parts) == 1:
+            raw, rendered = parts[0]
+            # Editar con el mismo contenido haría que Telegram respondiera "Message is not modified"
+            if rendered != shown:
+                try:
+                    await self._call_telegram(chat_id, placeholder.edit_text, rendered, parse_mode=self.parse_mode)
+                except BadRequest as e:
+                    if not self.parse_mode:
+                        raise
+                    logger.warning(f"Formato rechazado por Telegram, se deja la respuesta sin formato: {e}")
+                    if raw != shown:
+                        await self._call_telegram(chat_id, placeholder.edit_text, raw)
+        else:
+            await self._call_telegram(chat_id, placeholder.delete)
+            await self._send_message_parts(update, text or "(respuesta vacía)")
+        return text
+
     def _split_message(self, text: str) -> List[str]:
         """
         Divide un mensaje largo en múltiples mensajes respetando el límite de caracteres.
-        Intenta dividir por párrafos, luego por frases, y finalmente por caracteres.
+        Prefiere cortar por párrafos, luego por líneas, frases y palabras, sin dejar bloques de
+        código abiertos (ver MessageSplitter).
 
         Args:
             text (str): Texto a dividir
 
         Returns:
-            List[str]: Lista de mensajes divididos
+            List[str]: Lista de mensajes divididos (ya formateados según parse_mode)
         """
-        if len(text) <= self.max_message_length:
-            return [text]
-
-        messages = []
-        remaining_text = text
-
-        while remaining_text:
-            if len(remaining_text) <= self.max_message_length:
-                messages.append(remaining_text)
-                break
-
-            # Intentar dividir por párrafos (doble salto de línea)
-            chunk = remaining_text[:self.max_message_length]
-
-            # Buscar el mejor punto de división
-            split_points = [
-                chunk.rfind('\n\n'),  # Párrafos
-                chunk.rfind('\n'),  # Líneas
-                chunk.rfind('. '),  # Frases
-                chunk.rfind('? '),  # Preguntas
-                chunk.rfind('! '),  # Exclamaciones
-                chunk.rfind(', '),  # Comas
-                chunk.rfind(' ')  # Espacios
-            ]
-
-            # Encontrar el mejor punto de división (el más lejano que no sea -1)
-            split_point = -1
-            for point in split_points:
-                if point > split_point:
-                    split_point = point
-
-            if split_point == -1:
-                # Si no hay buen punto de división, cortar por caracteres
-                split_point = self.max_message_length - 3
-                messages.append(chunk[:split_point] + '...')
-                remaining_text = '...' + remaining_text[split_point:]
-            else:
-                # Ajustar el punto de división según el tipo de separador encontrado
-                if remaining_text[split_point:split_point + 2] in ['\n\n', '. ', '? ', '! ', ', ']:
-                    split_point += 2
-                elif remaining_text[split_point] in ['\n', ' ']:
-                    split_point += 1
+        return self.splitter.split(text)
+
+    def _chat_send_bucket(self, chat_id: int) -> TokenBucket:
+        """Token bucket de envíos del chat (los grupos, con id negativo, tienen un límite menor)."""
+        now = time.monotonic()
+        bucket = self._chat_send_buckets.get(chat_id)
+        if bucket is None:
+            # Descartar los buckets sin envíos en `send_bucket_ttl` para no acumular uno por chat visto
+            for idle_chat_id, last_used in list(self._chat_send_last_used.items()):
+                if now - last_used > self.send_bucket_ttl:
+                    del self._chat_send_last_used[idle_chat_id]
+                    del self._chat_send_buckets[idle_chat_id]
+            rate = self.group_send_rate if chat_id < 0 else self.chat_send_rate
+            bucket = TokenBucket(rate=rate, capacity=self.chat_send_burst)
+            self._chat_send_buckets[chat_id] = bucket
+        self._chat_send_last_used[chat_id] = now
+        return bucket
+
+    def _back_off(self, chat_id: int, bucket: TokenBucket, error: RetryAfter) -> float:
+        """
+        Aplica un RetryAfter de Telegram: pausa el bucket del chat y reduce su ritmo a la mitad.
 
-                messages.append(remaining_text[:split_point].rstrip())
-                remaining_text = remaining_text[split_point:].lstrip()
+        Returns:
+            float: Segundos de espera indicados por Telegram
+        """
+        retry_after = error.retry_after
+        retry_after = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+        logger.warning(f"Límite de Telegram en el chat {chat_id}: pausa de {retry_after:.1f}s")
+        bucket.pause(retry_after)
+        bucket.rate /= 2
+        return retry_after
+
+    async def _call_telegram(self, chat_id: int, method: Callable, *args, **kwargs):
+        """
+        Ejecuta una llamada de envío a Telegram respetando los límites de salida por chat y globales.
 
-        return messages
+        Si Telegram responde con RetryAfter, se pausa el bucket del chat durante el tiempo indicado,
+        se baja su ritmo (ver `_back_off`) y se reintenta (hasta `max_send_retries` veces).
+
+        Args:
+            chat_id (int): Chat al que va dirigido el envío
+            method (Callable): Corrutina de la API (reply_text, edit_text, ...)
+
+        Returns:
+            Any: Resultado de la llamada
+        """
+        bucket = self._chat_send_bucket(chat_id)
+        for attempt in range(self.max_send_retries + 1):
+            await bucket.aacquire()
+            await self._global_send_bucket.aacquire()
+            try:
+                return await method(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt >= self.max_send_retries:
+                    raise
+                self._back_off(chat_id, bucket, e)
+
+    async def _try_call_telegram(self, chat_id: int, method: Callable, *args, **kwargs) -> bool:
+        """
+        Variante sin espera de `_call_telegram` para envíos prescindibles (ediciones intermedias del streaming).
+
+        Si el chat o el bot no tienen cupo, o Telegram responde con RetryAfter, la llamada se omite sin
+        reintentar: la siguiente edición ya llevará el texto acumulado.
+
+        Returns:
+            bool: True si la llamada se ha hecho
+        """
+        bucket = self._chat_send_bucket(chat_id)
+        # Comprobar ambos buckets antes de consumir para no gastar el token del chat si el global está vacío
+        if bucket.wait_time() or self._global_send_bucket.wait_time():
+            return False
+        bucket.try_acquire()
+        self._global_send_bucket.try_acquire()
+        try:
+            await method(*args, **kwargs)
+        except RetryAfter as e:
+            self._back_off(chat_id, bucket, e)
+            return False
+        return True
+
+    async def _send_document(self, update: Update, text: str):
+        """
+        Envía el texto como un único documento Markdown, con el principio del texto como descripción.
+
+        Args:
+            update (Update): Objeto de actualización de Telegram
+            text (str): Texto completo a enviar
+        """
+        document = io.BytesIO(text.encode('utf-8'))
+        preview = text[:200].rstrip() + ('…' if len(text) > 200 else '')
+        caption = f"{preview}\n\n📎 Respuesta completa ({len(text)} caracteres) en el documento adjunto"
+        await self._call_telegram(update.effective_chat.id, update.message.reply_document,
+                                  document=document, filename='respuesta.md', caption=caption)
 
     async def _send_message_parts(self, update: Update, text: str):
         """
         Envía un mensaje dividiéndolo en partes si es necesario.
 
+        Las partes se envían tan rápido como permiten los límites de Telegram (ver `_call_telegram`).
+        Si el texto supera `document_threshold`, se envía como documento adjunto.
+
         Args:
             update (Update): Objeto de actualización de Telegram
             text (str): Texto completo a enviar
         """
-        message_parts = self._split_message(text)
+        chat_id = update.effective_chat.id
+        if self.document_threshold is not None and len(text) > self.document_threshold:
+            try:
+                await self._send_document(update, text)
+                return
+            except Exception as e:
+                logger.error(f"Error enviando la respuesta como documento, se envía por partes: {e}")
 
-        for i, part in enumerate(message_parts):
+        message_parts = self.splitter.split_pairs(text)
+
+        for i, (raw, part) in enumerate(message_parts):
             try:
                 if len(message_parts) > 1:
                     # Agregar indicador de parte si hay múltiples mensajes
                     part_indicator = f" ({i + 1}/{len(message_parts)})"
                     # Verificar que el indicador no cause que se supere el límite
-                    if len(part) + len(part_indicator) <= self.max_message_length:
-                        part += part_indicator
-
-                await update.message.reply_text(part)
-
-                # Pequeña pausa entre mensajes para evitar spam
-                if i < len(message_parts) - 1:
-                    await asyncio.sleep(0.5)
+                    if len(part) + len(self.splitter.escape(part_indicator)) <= self.max_message_length:
+                        part += self.splitter.escape(part_indicator)
+                        raw += part_indicator
+
+                try:
+                    await self._call_telegram(chat_id, update.message.reply_text, part, parse_mode=self.parse_mode)
+                except BadRequest as e:
+                    if not self.parse_mode:
+                        raise
+                    # Entidades que Telegram no acepta: se reenvía el trozo original como texto plano
+                    logger.warning(f"Formato rechazado por Telegram, reenviando sin formato: {e}")
+                    await self._call_telegram(chat_id, update.message.reply_text, raw)
 
             except Exception as e:
                 logger.error(f"Error enviando parte {i + 1} del mensaje: {e}")
-                await update.message.reply_text("Error enviando parte del mensaje.")
+                await self._call_telegram(chat_id, update.message.reply_text, "Error enviando parte del mensaje.")
 
     def _default_chat_function(self, message: str, context: dict) -> str:
         """
@@ -209,11 +448,16 @@ class TelegramChatbotClass:
                 'chat_type': update.effective_chat.type
             }
 
-            # Procesar el mensaje con la función de chat personalizada
-            response = self.chat_function(message_text, chat_context)
+            async with self._chat_slot(chat_id):
+                # Procesar el mensaje con la función de chat personalizada sin bloquear al resto de chats
+                response = await self._dispatch_chat_function(message_text, chat_context)
 
-            # Enviar respuesta (con división automática si es necesario)
-            await self._send_message_parts(update, response)
+                if isinstance(response, str):
+                    # Enviar respuesta (con división automática si es necesario)
+                    await self._send_message_parts(update, response)
+                else:
+                    # Respuesta en streaming: edición progresiva de un mensaje provisional
+                    response = await self._stream_message(update, response)
 
             # Log de la interacción
             logger.info(f"Usuario {user.first_name} ({user.id}): {message_text}")
@@ -259,4 +503,5 @@ class TelegramChatbotClass:
         if self.application:
             logger.info("🛑 Deteniendo el bot...")
             self.application.stop()
+        self.executor.shutdown(wait=False)
 
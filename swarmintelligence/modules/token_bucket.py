@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe con espera síncrona (`acquire`) y asíncrona (`aacquire`).
+
+    Se rellenan `rate` tokens por segundo hasta un máximo de `capacity` (ráfaga permitida).
+    `pause(seconds)` bloquea el bucket para todos los consumidores, p.ej. al recibir un Retry-After.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens=1):
+        """Consume `tokens` si están disponibles y devuelve 0; si no, devuelve los segundos de espera estimados."""
+        with self._lock:
+            wait = self._wait(tokens)
+            if wait == 0:
+                self._tokens -= tokens
+            return wait
+
+    def wait_time(self, tokens=1):
+        """Segundos de espera estimados para obtener `tokens` (0 si están disponibles), sin consumirlos."""
+        with self._lock:
+            return self._wait(tokens)
+
+    def acquire(self, tokens=1, timeout=None):
+        """Espera (bloqueando el hilo) hasta obtener `tokens`. Devuelve False si vence `timeout`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, tokens=1, timeout=None):
+        """Versión asíncrona de `acquire`: espera con asyncio.sleep sin bloquear el event loop."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """Impide consumir tokens durante `seconds` segundos (se conserva la pausa más larga)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    @property
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def _wait(self, tokens):
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    def _refill(self, now):
+        # Durante una pausa no se acumulan tokens
+        start = max(self._updated, self._paused_until)
+        if now > start:
+            self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+        self._updated = max(self._updated, now)
@@ -0,0 +1,85 @@
+import functools
+import importlib
+import threading
+
+
+class LazyTool:
+    """
+    Proxy de una tool declarada en un ToolRegistry.
+
+    Expone `tool_name` sin construir la tool; el primer acceso a cualquier otro atributo
+    (initialize, call, acall...) la materializa a través del registro.
+    """
+
+    def __init__(self, registry, tool_name):
+        self._registry = registry
+        self.tool_name = tool_name
+
+    @property
+    def instance(self):
+        return self._registry.materialize(self.tool_name)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.instance, name)
+
+    def __repr__(self):
+        return f'LazyTool({self.tool_name!r})'
+
+
+class ToolRegistry:
+    """
+    Registro de tools declaradas de forma barata y construidas en su primer uso.
+
+    `register` guarda un functools.partial con la fábrica y sus argumentos, de modo que declarar
+    una tool no importa su módulo ni crea clientes. La fábrica puede ser un callable o la ruta
+    'paquete.modulo.Clase', que solo se importa al materializar.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def register(self, tool_name, factory, /, *args, **kwargs):
+        """Declara una tool y devuelve su LazyTool (args y kwargs se pasan a la fábrica)."""
+        self._factories[tool_name] = functools.partial(self._resolve, factory, args, kwargs)
+        self._instances.pop(tool_name, None)
+        return LazyTool(self, tool_name)
+
+    def get(self, tool_name):
+        if tool_name not in self._factories:
+            raise KeyError(f'Tool no registrada: {tool_name}')
+        return LazyTool(self, tool_name)
+
+    def tools(self, tool_names=None):
+        """LazyTools de las tools indicadas (todas por defecto), en orden de registro."""
+        return [self.get(name) for name in (tool_names if tool_names is not None else self._factories)]
+
+    def materialize(self, tool_name):
+        """Construye la tool la primera vez y devuelve siempre la misma instancia."""
+        instance = self._instances.get(tool_name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(tool_name)
+                if instance is None:
+                    instance = self._factories[tool_name]()
+                    self._instances[tool_name] = instance
+        return instance
+
+    def is_materialized(self, tool_name):
+        return tool_name in self._instances
+
+    def __contains__(self, tool_name):
+        return tool_name in self._factories
+
+    def __len__(self):
+        return len(self._factories)
+
+    @staticmethod
+    def _resolve(factory, args, kwargs):
+        if isinstance(factory, str):
+            module_name, attr = factory.rsplit('.', 1)
+            factory = getattr(importlib.import_module(module_name), attr)
+        return factory(*args, **kwargs)
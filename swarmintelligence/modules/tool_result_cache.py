@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ToolResultCache:
+    """
+    Caché LRU con TTL para resultados de tools, compartida por todo el proceso.
+
+    `get_or_call` deduplica las peticiones en vuelo: si varias llamadas con la misma clave llegan
+    a la vez, solo la primera ejecuta la tool y el resto espera su resultado.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """Devuelve la caché global del proceso (se crea en el primer uso)."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def get_or_call(self, key, fn, ttl=None):
+        """
+        Devuelve el valor cacheado para `key` o ejecuta `fn`.
+
+        `fn` debe devolver (valor, cacheable); solo se guardan los valores con cacheable=True
+        (p.ej. las respuestas sin error).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value, cacheable = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            if cacheable:
+                self._entries[key] = (time.monotonic() + ttl if ttl is not None else None, value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key=None):
+        """Elimina una clave o, sin argumentos, toda la caché."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,71 @@
+from swarmintelligence.modules.chat_session_manager import ChatSessionManager
+import unittest
+
+class FakeContextManager:
+    def initialize(self, llm=None, model=None):
+        self.LLM = llm
+
+class EchoAgent:
+    id = 'ECHO'
+
+    def __init__(self):
+        self.context_manager = FakeContextManager()
+
+    def initialize(self):
+        self.LLM = object()
+        self.context_manager.initialize(llm=self.LLM)
+
+    def call(self, memory=None, user_message=None, **kwargs):
+        memory.log(role='user', modality='text', content=user_message, channel=self.id)
+        memory.log(role='assistant', modality='text', content='echo ' + user_message, channel=self.id)
+        return memory, 'echo ' + user_message
+
+    def stream(self, memory=None, user_message=None, **kwargs):
+        memory, answer = self.call(memory=memory, user_message=user_message)
+        if user_message == 'tool':
+            yield {'type': 'tool_call_start', 'tool_call': {'id': '1', 'function': {'name': 'get_files_map', 'arguments': '{}'}}}
+        for word in answer.split(' '):
+            yield {'type': 'text_delta', 'delta': word + ' '}
+        yield {'type': 'final', 'memory': memory, 'answer': answer}
+
+class TestChatSessionManager(unittest.TestCase):
+    def setUp(self):
+        base_history = [{'role': 'system', 'modality': 'text', 'content': 'system', 'channel': 'ECHO', 'steering': False}]
+        self.sessions = ChatSessionManager(agent=EchoAgent(), base_history=base_history, pool_size=2, max_sessions=2, max_history=5)
+
+    def test_isolation_and_trim(self):
+        self.assertEqual(self.sessions.chat(1, 'a'), 'echo a')
+        self.sessions.chat(2, 'b')
+        for message in ['c', 'd', 'e']:
+            self.sessions.chat(1, message)
+        records = self.sessions._sessions[1]['memory'].to_records()
+        self.assertEqual(records[0]['content'], 'system')
+        self.assertEqual([r['content'] for r in records[1:]], ['d', 'echo d', 'e', 'echo e'])
+        self.assertNotIn('b', [r['content'] for r in records])
+
+    def test_pooled_agents_do_not_share_context_manager(self):
+        agents = list(self.sessions._agents.queue)
+        self.assertIsNot(agents[0].context_manager, agents[1].context_manager)
+        for agent in agents:
+            self.assertIs(agent.context_manager.LLM, agent.LLM)
+
+    def test_lru_eviction(self):
+        for chat_id in [1, 2, 3]:
+            self.sessions.chat(chat_id, 'hola')
+        self.assertEqual(list(self.sessions._sessions), [2, 3])
+
+    def test_stream(self):
+        self.assertEqual(list(self.sessions.stream(1, 'hola')), ['echo ', 'hola '])
+        records = self.sessions._sessions[1]['memory'].to_records()
+        self.assertEqual(records[-1]['content'], 'echo hola')
+        self.assertEqual(self.sessions._agents.qsize(), 2)
+
+    def test_stream_tool_status(self):
+        self.assertEqual(list(self.sessions.stream(1, 'tool')), [{'type': 'status', 'text': '🔧 get_files_map...'}, 'echo ', 'tool '])
+
+    def test_abandoned_stream_releases_session_and_agent(self):
+        stream = self.sessions.stream(1, 'hola')
+        self.assertEqual(next(stream), 'echo ')
+        # El turno termina en su hilo aunque nadie consuma el resto del generador (que sigue vivo)
+        self.assertEqual(self.sessions.chat(1, 'otra'), 'echo otra')
+        self.assertEqual(self.sessions._agents.qsize(), 2)
@@ -0,0 +1,72 @@
+from swarmintelligence.modules.chat_store import ChatStore
+import datetime
+import numpy as np
+import pandas as pd
+import pickle
+import tempfile
+import unittest
+
+def row(role, content):
+    return {'role': role, 'modality': 'text', 'content': content, 'channel': 'AGENT', 'steering': False}
+
+class TestChatStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ChatStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_append_only(self):
+        history = [row('system', 'system'), row('user', 'hola'), row('assistant', 'buenas')]
+        self.store.save('chat_1', history)
+        history = history + [row('user', 'adios'), row('assistant', {'tool': 'x'})]
+        self.store.save('chat_1', history)
+        with open(self.store._chat_path('chat_1')) as f:
+            self.assertEqual(len(f.readlines()), 5)
+        self.assertEqual(ChatStore(self.tmp.name).load('chat_1'), history)
+        (chat_id, meta), = self.store.list_chats()
+        self.assertEqual((chat_id, meta['title'], meta['n_messages']), ('chat_1', 'hola', 5))
+
+    def test_timestamps_round_trip(self):
+        history = [dict(row('user', 'hola'), timestamp=datetime.datetime(2024, 5, 1, 12, 30, 15, 123456)),
+                   dict(row('assistant', 'buenas'), timestamp=pd.Timestamp('2024-05-01 12:30:16.5'))]
+        self.store.save('chat_1', history)
+        loaded = ChatStore(self.tmp.name).load('chat_1')
+        self.assertEqual([r['timestamp'] for r in loaded], [r['timestamp'] for r in history])
+        self.assertIsInstance(loaded[0]['timestamp'], datetime.datetime)
+
+    def test_dates_and_numpy_values_round_trip(self):
+        history = [dict(row('user', 'hola'), day=datetime.date(2024, 5, 1), score=np.float64(0.5), n=np.int64(3))]
+        self.store.save('chat_1', history)
+        loaded = ChatStore(self.tmp.name).load('chat_1')
+        self.assertEqual(loaded, history)
+        self.assertIsInstance(loaded[0]['day'], datetime.date)
+
+    def test_unknown_types_raise_without_writing(self):
+        history = [row('user', 'hola')]
+        self.store.save('chat_1', history)
+        with self.assertRaises(TypeError):
+            self.store.save('chat_1', history + [row('assistant', object())])
+        self.assertEqual(ChatStore(self.tmp.name).load('chat_1'), history)
+        self.assertEqual(self.store.list_chats()[0][1]['n_messages'], 1)
+
+    def test_new_chat_ids_are_unique(self):
+        self.assertEqual(len({ChatStore.new_chat_id() for _ in range(100)}), 100)
+
+    def test_shrunk_history_is_rewritten(self):
+        self.store.save('chat_1', [row('user', 'a'), row('assistant', 'b'), row('user', 'c')])
+        self.store.save('chat_1', [row('user', 'c')])
+        self.assertEqual(self.store.load('chat_1'), [row('user', 'c')])
+
+    def test_legacy_pickle_migration(self):
+        history = [row('user', 'antiguo')]
+        with open(f'{self.tmp.name}/chat_old.pkl', 'wb') as f:
+            pickle.dump(history, f)
+        store = ChatStore(self.tmp.name)
+        self.assertEqual([chat_id for chat_id, _ in store.list_chats()], ['chat_old'])
+        self.assertEqual(store.load('chat_old'), history)
+        self.assertEqual(store.list_chats()[0][1]['title'], 'antiguo')
+        self.assertTrue(store._chat_path('chat_old').exists())
+        store.delete('chat_old')
+        self.assertEqual(store.list_chats(), [])
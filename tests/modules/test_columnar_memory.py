@@ -0,0 +1,48 @@
+from swarmintelligence.modules.columnar_memory import ColumnarMemory
+import unittest
+
+class TestColumnarMemory(unittest.TestCase):
+    def setUp(self):
+        self.memory = ColumnarMemory()
+        self.memory.log(role='system', modality='text', content='system A', channel='A')
+        self.memory.log(role='system', modality='text', content=None, steering=True, channel='A')
+        self.memory.log(role='system', modality='text', content='hint A', steering=True, channel='A')
+        self.memory.log(role='user', modality='text', content='hola B', channel='B')
+        self.memory.log(role='user', modality='text', content='hola A', channel='A')
+
+    def test_channel_history(self):
+        history = self.memory.channel_history('A')
+        self.assertEqual(list(history['content'].fillna('')), ['system A', '', 'hint A', 'hola A'])
+        history = self.memory.channel_history('A', use_steering=False)
+        self.assertEqual(list(history['content']), ['system A', 'hola A'])
+
+    def test_history_round_trip(self):
+        self.assertEqual(len(self.memory.history), 5)
+        self.assertIsNone(self.memory.to_records()[1]['content'])
+        restored = ColumnarMemory(history=self.memory.to_records())
+        self.assertEqual(restored.to_records(), self.memory.to_records())
+        self.assertEqual(list(restored.channel_history('B')['content']), ['hola B'])
+
+    def test_incremental_view(self):
+        first = self.memory.channel_history('A', use_steering=False)
+        self.assertIs(self.memory.channel_history('A', use_steering=False), first)
+        self.memory.log(role='system', modality='text', content='hint 2', steering=True, channel='A')
+        self.assertIs(self.memory.channel_history('A', use_steering=False), first)
+        self.memory.log(role='assistant', modality='text', content='respuesta A', channel='A', extra='x')
+        history = self.memory.channel_history('A', use_steering=False)
+        self.assertEqual(list(history['content']), ['system A', 'hola A', 'respuesta A'])
+        self.assertEqual(list(history['extra'].isna()), [True, True, False])
+
+    def test_view_grows_without_rebuilding_rows(self):
+        calls = [{'id': '1', 'function': {'name': 'f', 'arguments': '{}'}}]
+        before = self.memory.channel_history('B')
+        for i in range(40):
+            self.memory.log(role='assistant', modality='tool_call', content=calls, channel='B')
+            self.memory.log(role='tool', modality='text', content=f'r{i}', channel='B')
+        history = self.memory.channel_history('B')
+        # Los DataFrame anteriores no cambian y las listas se guardan como valores, no como dimensiones
+        self.assertEqual(list(before['content']), ['hola B'])
+        self.assertEqual(len(history), 81)
+        self.assertEqual(history['content'].iloc[1], calls)
+        self.assertEqual(history['content'].iloc[-1], 'r39')
+        self.assertEqual(self.memory.to_records()[-1]['content'], 'r39')
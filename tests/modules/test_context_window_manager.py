@@ -0,0 +1,50 @@
+from swarmintelligence.modules.context_window_manager import ContextWindowManager
+import pandas as pd
+import unittest
+
+class SummaryLLM:
+    def __init__(self):
+        self.n_calls = 0
+
+    def run(self, history, **kwargs):
+        self.n_calls += 1
+        self.kwargs = kwargs
+        return 'resumen'
+
+class TestContextWindowManager(unittest.TestCase):
+    def setUp(self):
+        self.llm = SummaryLLM()
+        self.manager = ContextWindowManager(token_budget=300, keep_last_turns=1, tool_stub_length=10).initialize(llm=self.llm, model='dummy')
+        self.records = [{'role': 'system', 'modality': 'text', 'content': 'system', 'channel': 'A', 'steering': False}]
+
+    def add_turn(self, i, tool_result='x' * 800):
+        self.records += [
+            {'role': 'user', 'modality': 'text', 'content': f'pregunta {i}', 'channel': 'A', 'steering': False},
+            {'role': 'assistant', 'modality': 'tool_call', 'content': {'id': str(i)}, 'channel': 'A', 'steering': False},
+            {'role': 'tool', 'modality': 'tool_result', 'content': {'tool_call_id': str(i), 'tool_call_result': tool_result}, 'channel': 'A', 'steering': False},
+            {'role': 'assistant', 'modality': 'text', 'content': f'respuesta {i}', 'channel': 'A', 'steering': False},
+        ]
+
+    def test_within_budget(self):
+        self.add_turn(0, tool_result='ok')
+        history = pd.DataFrame(self.records)
+        self.assertIs(self.manager.run(history), history)
+
+    def test_stub_old_tool_results(self):
+        self.add_turn(0)
+        self.add_turn(1)
+        history = self.manager.run(pd.DataFrame(self.records)).to_dict(orient='records')
+        self.assertEqual(self.llm.n_calls, 0)
+        self.assertTrue(history[3]['content']['tool_call_result'].startswith('[RESULTADO OMITIDO'))
+        self.assertEqual(history[-2]['content']['tool_call_result'], 'x' * 800)
+
+    def test_rolling_summary(self):
+        for i in range(12):
+            self.add_turn(i)
+        history = self.manager.run(pd.DataFrame(self.records)).to_dict(orient='records')
+        self.assertEqual(self.llm.n_calls, 1)
+        self.assertEqual(self.llm.kwargs['temperature'], 0)
+        self.assertEqual(history[1]['content'], 'Resumen de la conversación anterior: resumen')
+        self.assertEqual(history[2]['content'], 'pregunta 11')
+        self.manager.run(pd.DataFrame(self.records))
+        self.assertEqual(self.llm.n_calls, 1)
@@ -0,0 +1,41 @@
+from swarmintelligence.modules.dataset_store import DatasetStore
+from unittest import mock
+import os
+import pandas as pd
+import tempfile
+import types
+import unittest
+
+class FakeDatasetIO:
+    """DatasetIO mínimo (xlsx) para no depender de eigenlib en el test."""
+
+    def create(self, path, dataframe, partition_format, overwrite):
+        os.makedirs(path, exist_ok=True)
+        dataframe.to_pickle(os.path.join(path, f'data.{partition_format}'))
+
+    def read(self, path):
+        return pd.read_pickle(os.path.join(path, 'data.xlsx'))
+
+class TestDatasetStore(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'episode_id': [0, 0, 1],
+            'content': ['hola', {'tool_call_id': 'a', 'tool_call_result': 'ok'}, None],
+            'score': [1.0, 2.5, 3.0],
+        })
+
+    def test_round_trip(self):
+        for partition_format in ['parquet', 'feather']:
+            with tempfile.TemporaryDirectory() as path:
+                DatasetStore().create(path=path, dataframe=self.df, partition_format=partition_format, overwrite=True)
+                df = DatasetStore().read(path=path)
+                self.assertEqual(df.to_dict(orient='records'), self.df.to_dict(orient='records'))
+
+    def test_switch_from_parquet_to_xlsx(self):
+        dataset_io = types.SimpleNamespace(DatasetIO=FakeDatasetIO)
+        with tempfile.TemporaryDirectory() as path, mock.patch.dict('sys.modules', {'eigenlib.utils.dataset_io': dataset_io}):
+            DatasetStore().create(path=path, dataframe=self.df, partition_format='parquet', overwrite=True)
+            new_df = pd.DataFrame({'episode_id': [7], 'content': ['nuevo'], 'score': [0.0]})
+            DatasetStore().create(path=path, dataframe=new_df, partition_format='xlsx', overwrite=True)
+            self.assertFalse(os.path.exists(os.path.join(path, 'data.parquet')))
+            self.assertEqual(DatasetStore().read(path=path).to_dict(orient='records'), new_df.to_dict(orient='records'))
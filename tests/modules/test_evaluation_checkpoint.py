@@ -0,0 +1,51 @@
+from swarmintelligence.modules.evaluation_checkpoint import EvaluationCheckpoint
+from swarmintelligence.modules.parallel_simulator import ParallelSimulator
+import pandas as pd
+import tempfile
+import unittest
+
+class FlakySimulator(ParallelSimulator):
+    def __init__(self, fail_on=None, **kwargs):
+        super().__init__(user=None, agent=None, experiment_id='test', **kwargs)
+        self.fail_on = fail_on
+        self.simulated = []
+
+    def _simulate(self, env_config, env_history, user, agent):
+        episode_id = env_config['episode_id'].iloc[0]
+        if episode_id == self.fail_on:
+            raise RuntimeError('LLM endpoint caído')
+        self.simulated.append(episode_id)
+        history = pd.DataFrame({'episode_id': [episode_id], 'content': [f'episodio {episode_id}']})
+        return history, env_config.assign(score=episode_id * 10)
+
+class TestEvaluationCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.env_config = pd.DataFrame({'episode_id': [3, 1, 2, 0], 'step': 0})
+        self.env_history = pd.DataFrame()
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as path:
+            simulator = FlakySimulator(fail_on=2, checkpoint=EvaluationCheckpoint(path, flush_every=100))
+            with self.assertRaises(RuntimeError):
+                simulator.generate(self.env_config, self.env_history)
+            self.assertEqual(EvaluationCheckpoint(path).completed_ids(), {3, 1, 0})
+
+            simulator = FlakySimulator(n_workers=2, checkpoint=EvaluationCheckpoint(path, flush_every=1))
+            history, config = simulator.generate(self.env_config, self.env_history)
+            self.assertEqual(simulator.simulated, [2])
+            self.assertEqual(list(config['episode_id']), [3, 1, 2, 0])
+            self.assertEqual(list(config['score']), [30, 10, 20, 0])
+            self.assertEqual(list(history['episode_id']), [3, 1, 2, 0])
+
+    def test_refuses_to_resume_with_other_inputs(self):
+        fingerprint = EvaluationCheckpoint.fingerprint(self.env_config, self.env_history)
+        with tempfile.TemporaryDirectory() as path:
+            simulator = FlakySimulator(fail_on=2, checkpoint=EvaluationCheckpoint(path, flush_every=100, fingerprint=fingerprint))
+            with self.assertRaises(RuntimeError):
+                simulator.generate(self.env_config, self.env_history)
+            self.assertEqual(EvaluationCheckpoint(path, fingerprint=fingerprint).completed_ids(), {3, 1, 0})
+
+            other_config = self.env_config.assign(step=1)
+            other = EvaluationCheckpoint(path, fingerprint=EvaluationCheckpoint.fingerprint(other_config, self.env_history))
+            with self.assertRaises(ValueError):
+                FlakySimulator(checkpoint=other).generate(other_config, self.env_history)
@@ -0,0 +1,146 @@
+from swarmintelligence.modules.general_agent import GeneralAgent, tool_calls_of
+import asyncio
+import json
+import threading
+import unittest
+
+class FakeLLM:
+    def __init__(self, answers):
+        self.answers = list(answers)
+
+    def run(self, history, **kwargs):
+        return self.answers.pop(0)
+
+class SlowTool:
+    tool_name = 'slow'
+
+    def __init__(self, n_calls):
+        self.barrier = threading.Barrier(n_calls, timeout=5)
+
+    def call(self, payload):
+        # Solo termina si todas las llamadas están en curso a la vez
+        self.barrier.wait()
+        return 'result ' + payload['x']
+
+class FlakyTool:
+    """Tool que falla para x == 'boom' y registra las llamadas que terminan."""
+    tool_name = 'slow'
+
+    def __init__(self):
+        self.finished = []
+        self._lock = threading.Lock()
+
+    def call(self, payload):
+        if payload['x'] == 'boom':
+            raise RuntimeError('la tool ha fallado')
+        threading.Event().wait(0.05)
+        with self._lock:
+            self.finished.append(payload['x'])
+        return 'result ' + payload['x']
+
+class StreamingLLM(FakeLLM):
+    def stream(self, history, **kwargs):
+        answer = self.answers.pop(0)
+        if tool_calls_of(answer) is not None:
+            yield answer
+        else:
+            yield from answer.partition(' ')
+
+def tool_call(i):
+    return {'id': f'call_{i}', 'function': {'name': 'slow', 'arguments': json.dumps({'x': str(i)})}}
+
+class TestGeneralAgentToolCalls(unittest.TestCase):
+    def _run(self, answers, tool, llm=FakeLLM):
+        agent = GeneralAgent(system_prompt='system', tools=[tool], max_tool_workers=3)
+        memory = agent.initialize()
+        agent.LLM = llm(answers)
+        return agent.call(memory=memory, user_message='hola')
+
+    @staticmethod
+    def _tool_rounds(memory):
+        return [(r['role'], r['content']['id'] if r['role'] == 'assistant' else r['content']['tool_call_result'])
+                for r in memory.to_records() if r['modality'] in ('tool_call', 'tool_result')]
+
+    def test_call_runs_tools_in_parallel_and_keeps_order(self):
+        memory, answer = self._run([[tool_call(0), tool_call(1), tool_call(2)], 'done'], SlowTool(3))
+        self.assertEqual(answer, 'done')
+        self.assertEqual(self._tool_rounds(memory), [('assistant', 'call_0'), ('tool', 'result 0'), ('assistant', 'call_1'),
+                                                     ('tool', 'result 1'), ('assistant', 'call_2'), ('tool', 'result 2')])
+
+    def test_failing_tool_propagates_without_logging_the_round(self):
+        tool = FlakyTool()
+        boom = {'id': 'call_boom', 'function': {'name': 'slow', 'arguments': json.dumps({'x': 'boom'})}}
+        agent = GeneralAgent(system_prompt='system', tools=[tool], max_tool_workers=3)
+        memory = agent.initialize()
+        agent.LLM = FakeLLM([[tool_call(0), boom, tool_call(2)]])
+        with self.assertRaises(RuntimeError):
+            agent.call(memory=memory, user_message='hola')
+        # El resto de tools termina (no quedan hilos sueltos) y la memoria no tiene la ronda a medias
+        self.assertEqual(sorted(tool.finished), ['0', '2'])
+        self.assertEqual(self._tool_rounds(memory), [])
+
+    def test_single_and_list_tool_call_shapes(self):
+        for llm in (FakeLLM, StreamingLLM):
+            single, _ = self._run([tool_call(0), 'fin de turno'], SlowTool(1), llm)
+            listed, answer = self._run([[tool_call(0)], 'fin de turno'], SlowTool(1), llm)
+            self.assertEqual(answer, 'fin de turno')
+            self.assertEqual(self._tool_rounds(single), [('assistant', 'call_0'), ('tool', 'result 0')])
+            self.assertEqual(self._tool_rounds(listed), self._tool_rounds(single))
+
+    def test_tool_calls_of(self):
+        self.assertEqual(tool_calls_of(tool_call(0)), [tool_call(0)])
+        self.assertEqual(tool_calls_of((tool_call(0), tool_call(1))), [tool_call(0), tool_call(1)])
+        self.assertIsNone(tool_calls_of('texto'))
+        self.assertIsNone(tool_calls_of([]))
+
+class TestGeneralAgentAsync(unittest.TestCase):
+    def setUp(self):
+        self.agent = GeneralAgent(system_prompt='system', tools=[SlowTool(3)], max_tool_workers=3)
+        self.memory = self.agent.initialize()
+
+    def test_acall_runs_tools_concurrently_in_order(self):
+        self.agent.LLM = FakeLLM([[tool_call(0), tool_call(1), tool_call(2)], 'done'])
+        memory, answer = asyncio.run(self.agent.acall(memory=self.memory, user_message='hola'))
+        self.assertEqual(answer, 'done')
+        results = [r['content']['tool_call_result'] for r in memory.to_records() if r['role'] == 'tool']
+        self.assertEqual(results, ['result 0', 'result 1', 'result 2'])
+
+    def test_sync_call(self):
+        self.agent.LLM = FakeLLM(['hola'])
+        memory, answer = self.agent.call(memory=self.memory, user_message='hola')
+        self.assertEqual(answer, 'hola')
+        self.assertEqual([r['role'] for r in memory.to_records()], ['system', 'system', 'user', 'assistant'])
+
+    def test_cancellation(self):
+        async def run():
+            started = asyncio.Event()
+            async def slow_llm(history, **kwargs):
+                started.set()
+                await asyncio.sleep(10)
+            self.agent.LLM = type('AsyncLLM', (), {'arun': staticmethod(slow_llm)})()
+            task = asyncio.create_task(self.agent.acall(memory=self.memory, user_message='hola'))
+            await started.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        asyncio.run(run())
+        self.assertNotIn('assistant', [r['role'] for r in self.memory.to_records()])
+
+    def test_memory_manager_does_not_block_other_conversations(self):
+        release = threading.Event()
+        blocked = GeneralAgent(system_prompt='system')
+        blocked_memory = blocked.initialize()
+        blocked.LLM = FakeLLM(['lento'])
+        manage = blocked._memory_manager
+        blocked._memory_manager = lambda memory: (release.wait(5), manage(memory))[1]
+        self.agent.LLM = FakeLLM(['rápido'])
+
+        async def run():
+            slow = asyncio.create_task(blocked.acall(memory=blocked_memory, user_message='hola'))
+            await asyncio.sleep(0)
+            _, answer = await asyncio.wait_for(self.agent.acall(memory=self.memory, user_message='hola'), 2)
+            finished_first = not slow.done()
+            release.set()
+            await slow
+            return answer, finished_first
+        self.assertEqual(asyncio.run(run()), ('rápido', True))
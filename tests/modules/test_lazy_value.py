@@ -0,0 +1,23 @@
+from swarmintelligence.modules.lazy_value import LazyValue, resolve
+from swarmintelligence.configs.notion_agent_config import Config
+import unittest
+
+class TestLazyValue(unittest.TestCase):
+    def test_resolve(self):
+        calls = []
+        value = LazyValue(lambda: calls.append(1) or 'agente')
+        self.assertEqual(calls, [])
+        self.assertEqual(resolve(value), 'agente')
+        self.assertEqual(resolve('otro'), 'otro')
+
+    def test_stage_configs_do_not_build_agent_or_user(self):
+        cfg = Config()
+        for stage in (cfg.initialize, cfg.train_evaluation, cfg.test_evaluation):
+            stage_cfg = stage()
+            self.assertIsInstance(stage_cfg['agent'], LazyValue)
+        # cached_property guarda el valor en __dict__ al construirlo
+        self.assertNotIn('agent', vars(cfg))
+        self.assertNotIn('user', vars(cfg))
+
+if __name__ == '__main__':
+    unittest.main()
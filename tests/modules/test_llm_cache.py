@@ -0,0 +1,77 @@
+from swarmintelligence.modules.llm_cache import LLMResponseCache, CachedLLMClient
+import asyncio
+import os
+import tempfile
+import unittest
+
+class CountingLLM:
+    def __init__(self):
+        self.n_calls = 0
+
+    def run(self, history, **kwargs):
+        self.n_calls += 1
+        return f"respuesta {self.n_calls}"
+
+class StreamingLLM(CountingLLM):
+    def stream(self, history, **kwargs):
+        self.n_calls += 1
+        if history[-1]['content'] == 'usa una tool':
+            yield {'id': 'call_1', 'function': {'name': 'tool', 'arguments': '{}'}}
+            return
+        yield 'respuesta '
+        yield str(self.n_calls)
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.history = [
+            {'role': 'system', 'modality': 'text', 'content': 'Eres un asistente.'},
+            {'role': 'user', 'modality': 'text', 'content': 'hola'},
+        ]
+        self.params = {'model': 'o3', 'temperature': 1, 'tools_dict': None, 'response_format': None, 'tool_choice': 'auto'}
+
+    def test_exact_tier_and_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'llm_cache.sqlite')
+            llm = CountingLLM()
+            client = CachedLLMClient(llm, LLMResponseCache(path=path))
+            self.assertEqual(client.run(self.history, **self.params), 'respuesta 1')
+            self.assertEqual(client.run(self.history, **self.params), 'respuesta 1')
+            self.assertEqual(client.run(self.history, **(self.params | {'model': 'gpt-4.1'})), 'respuesta 2')
+            self.assertEqual(client.cache.stats()['hits_exact'], 1)
+
+            client = CachedLLMClient(llm, LLMResponseCache(path=path))
+            self.assertEqual(client.run(self.history, **self.params), 'respuesta 1')
+            self.assertEqual(llm.n_calls, 2)
+
+    def test_semantic_tier(self):
+        embeddings = {'hola': [1.0, 0.0], 'hola!': [0.99, 0.01], 'adios': [0.0, 1.0]}
+        cache = LLMResponseCache(embedding_function=lambda text: embeddings[text], similarity_threshold=0.95)
+        client = CachedLLMClient(CountingLLM(), cache)
+        client.run(self.history, **self.params)
+        similar = self.history[:-1] + [{'role': 'user', 'modality': 'text', 'content': 'hola!'}]
+        different = self.history[:-1] + [{'role': 'user', 'modality': 'text', 'content': 'adios'}]
+        self.assertEqual(client.run(similar, **self.params), 'respuesta 1')
+        self.assertEqual(client.run(different, **self.params), 'respuesta 2')
+        self.assertEqual(cache.stats()['hits_semantic'], 1)
+
+    def test_lru_eviction(self):
+        cache = LLMResponseCache(max_entries=1)
+        cache.set(self.history, 'a', **self.params)
+        cache.set(self.history, 'b', **(self.params | {'model': 'otro'}))
+        self.assertEqual(cache.stats()['size'], 1)
+
+    def test_stream_and_arun_use_the_cache(self):
+        llm = StreamingLLM()
+        client = CachedLLMClient(llm, LLMResponseCache())
+        self.assertEqual(list(client.stream(self.history, **self.params)), ['respuesta ', '1'])
+        self.assertEqual(list(client.stream(self.history, **self.params)), ['respuesta 1'])
+        self.assertEqual(asyncio.run(client.arun(self.history, **self.params)), 'respuesta 1')
+        tool_history = self.history[:-1] + [{'role': 'user', 'modality': 'text', 'content': 'usa una tool'}]
+        first = next(iter(client.stream(tool_history, **self.params)))
+        self.assertEqual(list(client.stream(tool_history, **self.params)), [first])
+        self.assertEqual(llm.n_calls, 2)
+
+    def test_non_json_answers_are_not_cached(self):
+        cache = LLMResponseCache()
+        self.assertFalse(cache.set(self.history, object(), **self.params))
+        self.assertEqual(cache.stats()['size'], 0)
@@ -0,0 +1,106 @@
+from swarmintelligence.modules.mcp_client_pool import MCPClientPool
+import time
+import unittest
+import zmq
+
+class FakeClient:
+    def __init__(self, node_name, error=None):
+        self.node_name = node_name
+        self.error = error
+        self.calls = 0
+        self.pings = 0
+        self.alive = True
+        self.stopped = False
+
+    def call(self, target_node, payload):
+        if target_node == self.node_name:
+            self.pings += 1
+            if not self.alive:
+                raise zmq.Again('timeout')
+            return 'OK'
+        self.calls += 1
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return {'target_node': target_node, 'payload': payload}
+
+    def stop(self):
+        self.stopped = True
+
+class FakePool(MCPClientPool):
+    """Pool que lanza FakeClient en lugar de nodos NetworkIO."""
+
+    def __init__(self, errors=(), **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+        self.launched = []
+
+    def _launch(self, config):
+        client = FakeClient(f'client_{len(self.launched)}', self.errors.pop(0) if self.errors else None)
+        self._node_names[client] = client.node_name
+        self.launched.append(client)
+        return client
+
+class TestMCPClientPool(unittest.TestCase):
+    def setUp(self):
+        self.config = {'master_address': 'localhost:5000', 'target_node': 'mcp', 'payload': {'x': 1},
+                       'client_name': 'client', 'delay': 0, 'password': ''}
+
+    def test_clients_are_reused_per_key(self):
+        pool = FakePool()
+        pool.call(self.config)
+        pool.call(self.config)
+        self.assertEqual(len(pool.launched), 1)
+        self.assertEqual(pool.launched[0].calls, 2)
+        pool.call({**self.config, 'target_node': 'otro'})
+        self.assertEqual(len(pool.launched), 2)
+
+    def test_idle_clients_are_replaced(self):
+        pool = FakePool(max_idle=0.01)
+        pool.call(self.config)
+        time.sleep(0.05)
+        pool.call(self.config)
+        self.assertEqual(len(pool.launched), 2)
+        self.assertTrue(pool.launched[0].stopped)
+        self.assertEqual(pool._n_clients[('localhost:5000', 'mcp')], 1)
+
+    def test_transport_errors_are_retried_on_a_new_client(self):
+        pool = FakePool(errors=[ConnectionRefusedError('caído')])
+        self.assertEqual(pool.call(self.config)['payload'], {'x': 1})
+        self.assertEqual(len(pool.launched), 2)
+        self.assertTrue(pool.launched[0].stopped)
+
+    def test_client_errors_are_not_retried_and_drop_the_client(self):
+        for error in (RuntimeError('error del cliente'), zmq.Again('timeout esperando respuesta')):
+            pool = FakePool(errors=[error])
+            with self.assertRaises(type(error)):
+                pool.call(self.config)
+            # Una sola ejecución, y el cliente no vuelve al pool
+            self.assertEqual(len(pool.launched), 1)
+            self.assertEqual(pool.launched[0].calls, 1)
+            self.assertTrue(pool.launched[0].stopped)
+            pool.call(self.config)
+            self.assertEqual(len(pool.launched), 2)
+
+    def test_zmq_transport_errors_are_retried(self):
+        pool = FakePool(errors=[zmq.ZMQError('socket cerrado')])
+        self.assertEqual(pool.call(self.config)['payload'], {'x': 1})
+        self.assertEqual(len(pool.launched), 2)
+
+    def test_idle_clients_are_pinged_before_reuse(self):
+        pool = FakePool(ping_interval=0.01)
+        pool.call(self.config)
+        pool.call(self.config)
+        self.assertEqual(pool.launched[0].pings, 0)
+        time.sleep(0.03)
+        pool.call(self.config)
+        self.assertEqual((pool.launched[0].pings, len(pool.launched)), (1, 1))
+        time.sleep(0.03)
+        pool.launched[0].alive = False
+        pool.call(self.config)
+        self.assertEqual(len(pool.launched), 2)
+        self.assertTrue(pool.launched[0].stopped)
+        self.assertEqual(pool._n_clients[('localhost:5000', 'mcp')], 1)
+
+if __name__ == '__main__':
+    unittest.main()
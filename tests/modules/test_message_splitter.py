@@ -0,0 +1,58 @@
+from swarmintelligence.modules.message_splitter import MessageSplitter
+import unittest
+
+class TestMessageSplitter(unittest.TestCase):
+    def setUp(self):
+        self.splitter = MessageSplitter(max_length=100)
+
+    def test_short_text_is_not_split(self):
+        self.assertEqual(self.splitter.split('hola'), ['hola'])
+
+    def test_prefers_paragraph_then_word_boundaries(self):
+        text = 'a' * 60 + '\n\n' + 'b' * 60 + ' ' + 'c' * 40
+        self.assertEqual(self.splitter.split(text), ['a' * 60, 'b' * 60, 'c' * 40])
+
+    def test_parts_respect_limit_and_keep_content(self):
+        text = ' '.join(f'palabra{i}.' for i in range(500))
+        parts = self.splitter.split(text)
+        self.assertTrue(all(len(part) <= 100 for part in parts))
+        self.assertEqual(' '.join(parts), text)
+
+    def test_hard_cut_without_boundaries(self):
+        parts = self.splitter.split('x' * 250)
+        self.assertEqual(''.join(parts), 'x' * 250)
+        self.assertTrue(all(len(part) <= 100 for part in parts))
+
+    def test_code_blocks_stay_balanced(self):
+        code = '\n'.join(f'print({i})' for i in range(30))
+        parts = self.splitter.split(f'Código:\n\n```python\n{code}\n```\nFin')
+        self.assertGreater(len(parts), 1)
+        for part in parts:
+            self.assertEqual(part.count('```') % 2, 0, part)
+        self.assertTrue(parts[1].startswith('```python\n'))
+        self.assertEqual(''.join(parts).count('print('), 30)
+
+    def test_html_mode_escapes_and_formats(self):
+        splitter = MessageSplitter(max_length=100, parse_mode='HTML')
+        text = 'a < b y **c** con `x<y`\n```py\nif a < b: pass\n```'
+        self.assertEqual(MessageSplitter(max_length=200, parse_mode='HTML').split(text),
+                         ['a &lt; b y <b>c</b> con <code>x&lt;y</code>\n<pre><code class="language-py">if a &lt; b: pass</code></pre>'])
+        # Las etiquetas no caben en un solo mensaje: el corte se hace antes del bloque, no dentro
+        self.assertEqual(splitter.split(text), ['a &lt; b y <b>c</b> con <code>x&lt;y</code>',
+                                                '<pre><code class="language-py">if a &lt; b: pass</code></pre>'])
+        parts = splitter.split('<' * 150)
+        self.assertTrue(all(len(part) <= 100 for part in parts))
+        self.assertEqual(''.join(parts), '&lt;' * 150)
+
+    def test_markdown_v2_mode_escapes_special_characters(self):
+        splitter = MessageSplitter(max_length=100, parse_mode='MarkdownV2')
+        self.assertEqual(splitter.split('Total: 3.5 (aprox) **ok** `a_b`'), ['Total: 3\\.5 \\(aprox\\) *ok* `a_b`'])
+
+    def test_split_pairs_keep_raw_chunk(self):
+        splitter = MessageSplitter(max_length=100, parse_mode='HTML')
+        text = '**a** < b ' + 'x' * 95
+        self.assertEqual(splitter.split_pairs(text), [('**a** < b', '<b>a</b> &lt; b'), ('x' * 95, 'x' * 95)])
+        self.assertEqual(splitter.split(text), [rendered for _, rendered in splitter.split_pairs(text)])
+
+if __name__ == '__main__':
+    unittest.main()
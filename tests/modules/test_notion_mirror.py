@@ -0,0 +1,53 @@
+from swarmintelligence.modules.notion_mirror import NotionMirror
+import unittest
+
+def notion_page(page_id, name, status, projects, date, edited):
+    return {
+        'id': page_id, 'url': f'https://notion.so/{page_id}', 'last_edited_time': edited, 'archived': False,
+        'properties': {
+            'Name': {'type': 'title', 'title': [{'plain_text': name}]},
+            'Status': {'type': 'status', 'status': {'name': status}},
+            'Project': {'type': 'multi_select', 'multi_select': [{'name': p} for p in projects]},
+            'Target Date': {'type': 'date', 'date': {'start': date}},
+        },
+    }
+
+class FakeClient:
+    def __init__(self, pages):
+        self.pages = pages
+        self.filters = []
+
+    def query_database(self, database_id, filter=None):
+        self.filters.append(filter)
+        if filter is None:
+            return iter(self.pages)
+        since = filter['last_edited_time']['on_or_after']
+        return iter([p for p in self.pages if p['last_edited_time'] >= since])
+
+class TestNotionMirror(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient([
+            notion_page('a', 'Contar falanges', 'Active', ['jedi'], '2025-01-01', '2025-01-01T10:00:00.000Z'),
+            notion_page('b', 'Docs', 'Fixed', ['jedi', 'test_project'], '2025-02-01', '2025-01-02T10:00:00.000Z'),
+            notion_page('c', 'Archivo', 'Done', ['test_project'], '2025-03-01', '2025-01-03T10:00:00.000Z'),
+        ])
+        self.mirror = NotionMirror(self.client, 'db', min_sync_interval=0)
+
+    def test_filters_projection_and_pagination(self):
+        self.mirror.sync()
+        result = self.mirror.query(project='jedi', columns=['Name'])
+        self.assertEqual(result['total'], 2)
+        self.assertEqual([p['Name'] for p in result['pages']], ['Docs', 'Contar falanges'])
+        self.assertNotIn('Status', result['pages'][0])
+        self.assertEqual(self.mirror.query(status=['Active', 'Done'], date_from='2025-02-15')['total'], 1)
+        self.assertEqual(self.mirror.query(name_contains='FALANGES')['pages'][0]['id'], 'a')
+        second = self.mirror.query(page=2, page_size=2)
+        self.assertEqual((second['total'], [p['id'] for p in second['pages']]), (3, ['a']))
+
+    def test_incremental_sync(self):
+        self.mirror.sync()
+        self.client.pages[0] = notion_page('a', 'Contar falanges', 'Done', ['jedi'], '2025-01-01', '2025-01-04T10:00:00.000Z')
+        # on_or_after vuelve a traer la página de la marca ('c') además de la editada
+        self.assertEqual(self.mirror.sync(), 2)
+        self.assertEqual(self.client.filters[-1]['last_edited_time']['on_or_after'], '2025-01-03T10:00:00.000Z')
+        self.assertEqual(self.mirror.query(status='Done')['total'], 2)
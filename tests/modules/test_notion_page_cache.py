@@ -0,0 +1,102 @@
+from swarmintelligence.modules.notion_page_cache import NotionPageCache, render_markdown
+import threading
+import time
+import unittest
+
+def _text(content, **annotations):
+    return {'type': 'text', 'text': {'content': content, 'link': None}, 'plain_text': content, 'annotations': annotations}
+
+def _block(block_id, kind, content='', has_children=False, **extra):
+    return {'id': block_id, 'type': kind, 'has_children': has_children, kind: {'rich_text': [_text(content)], **extra}}
+
+class FakeClient:
+    """Cliente con una página de dos niveles; registra las peticiones y el máximo de peticiones simultáneas."""
+
+    def __init__(self, last_edited_time='2020-01-01T10:00:00.000Z'):
+        self.last_edited_time = last_edited_time
+        self.children = {
+            'page': [_block('h', 'heading_1', 'Titulo'), _block('a', 'bulleted_list_item', 'a', has_children=True),
+                     _block('b', 'bulleted_list_item', 'b', has_children=True), _block('sub', 'child_page', has_children=True, title='Sub')],
+            'a': [_block('a1', 'bulleted_list_item', 'a1')],
+            'b': [_block('b1', 'bulleted_list_item', 'b1')],
+        }
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def retrieve_page(self, page_id):
+        self.calls.append(('retrieve', page_id))
+        return {'id': page_id, 'last_edited_time': self.last_edited_time}
+
+    def list_block_children(self, block_id):
+        with self._lock:
+            self.calls.append(('children', block_id))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return iter([dict(block) for block in self.children[block_id]])
+
+    def count(self, kind):
+        return sum(1 for call in self.calls if call[0] == kind)
+
+class TestNotionPageCache(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        self.cache = NotionPageCache(self.client)
+
+    def test_read_renders_tree_and_fetches_children_in_parallel(self):
+        markdown = self.cache.read_markdown('page')
+        self.assertEqual(markdown, '# Titulo\n\n- a\n  - a1\n- b\n  - b1\n\n📄 Sub')
+        # Las subpáginas no se descargan y los hijos de un mismo nivel se piden a la vez
+        self.assertNotIn(('children', 'sub'), self.client.calls)
+        self.assertEqual(self.client.max_active, 2)
+
+    def test_unchanged_page_is_served_from_cache(self):
+        first = self.cache.read_markdown('page')
+        fetched = self.client.count('children')
+        self.assertEqual(self.cache.read_markdown('page'), first)
+        self.assertEqual(self.client.count('children'), fetched)
+        self.assertEqual(self.client.count('retrieve'), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_edited_page_is_refetched(self):
+        self.cache.read_markdown('page')
+        self.client.last_edited_time = '2020-01-01T10:05:00.000Z'
+        self.client.children['a'][0][self.client.children['a'][0]['type']]['rich_text'] = [_text('nuevo')]
+        self.assertIn('  - nuevo', self.cache.read_markdown('page'))
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_recently_edited_page_is_not_trusted(self):
+        # La marca tiene resolución de minuto: una edición en el mismo minuto no la cambiaría
+        now = time.strftime('%Y-%m-%dT%H:%M:00.000Z', time.gmtime())
+        self.client.last_edited_time = now
+        self.cache.read_markdown('page')
+        self.cache.read_markdown('page')
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+
+    def test_invalidate_and_lru(self):
+        cache = NotionPageCache(self.client, max_pages=1)
+        self.client.children['other'] = [_block('p', 'paragraph', 'otra')]
+        cache.read_markdown('page')
+        cache.read_markdown('other')
+        self.assertEqual(list(cache._pages), ['other'])
+        cache.invalidate('other')
+        cache.read_markdown('other')
+        self.assertEqual(cache.misses, 3)
+
+    def test_render_markdown_blocks(self):
+        blocks = [
+            {'type': 'paragraph', 'paragraph': {'rich_text': [_text('hola '), _text('mundo', bold=True)]}},
+            {'type': 'code', 'code': {'rich_text': [_text('x = 1')], 'language': 'python'}},
+            {'type': 'numbered_list_item', 'numbered_list_item': {'rich_text': [_text('uno')]}},
+            {'type': 'numbered_list_item', 'numbered_list_item': {'rich_text': [_text('dos')]}},
+            {'type': 'to_do', 'to_do': {'rich_text': [_text('hecho')], 'checked': True}},
+            {'type': 'divider', 'divider': {}},
+        ]
+        self.assertEqual(render_markdown(blocks), 'hola **mundo**\n\n```python\nx = 1\n```\n\n1. uno\n2. dos\n- [x] hecho\n\n---')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+from swarmintelligence.modules.notion_markdown import markdown_to_blocks
+from swarmintelligence.modules.notion_page_writer import NotionPageWriter
+import itertools
+import unittest
+
+class FakePage:
+    """Página en memoria con la semántica de la API de bloques (append con `after`, update y delete)."""
+
+    def __init__(self):
+        self.blocks = []
+        self.ids = itertools.count()
+        self.calls = []
+
+    def list_block_children(self, block_id):
+        return iter([{**b, 'has_children': False} for b in self.blocks])
+
+    def append_block_children(self, block_id, children, after=None):
+        self.calls.append(('append', len(children)))
+        position = len(self.blocks) if after is None else [b['id'] for b in self.blocks].index(after) + 1
+        created = [{**child, 'id': f'b{next(self.ids)}'} for child in children]
+        self.blocks[position:position] = created
+        return {'results': created}
+
+    def update_block(self, block_id, block):
+        self.calls.append(('update', block_id))
+        target = next(b for b in self.blocks if b['id'] == block_id)
+        target.update(block)
+
+    def delete_block(self, block_id):
+        self.calls.append(('delete', block_id))
+        self.blocks = [b for b in self.blocks if b['id'] != block_id]
+
+    def text(self):
+        return [''.join(p['text']['content'] for p in b[b['type']].get('rich_text', [])) for b in self.blocks]
+
+class TestNotionPageWriter(unittest.TestCase):
+    def setUp(self):
+        self.page = FakePage()
+        self.writer = NotionPageWriter(self.page)
+        self.markdown = '# Titulo\n\n' + '\n'.join(f'- tarea {i}' for i in range(250)) + '\n\nFin **importante**'
+
+    def test_batched_append(self):
+        stats = self.writer.append('page', self.markdown)
+        self.assertEqual(self.page.calls, [('append', 100), ('append', 100), ('append', 52)])
+        self.assertEqual(stats['inserted'], 252)
+
+    def test_diffed_replace(self):
+        self.writer.append('page', self.markdown)
+        self.page.calls.clear()
+        edited = self.markdown.replace('- tarea 10\n', '- tarea 10 editada\n').replace('- tarea 200\n', '- tarea 200\n- nueva\n').replace('- tarea 50\n', '')
+        stats = self.writer.replace('page', edited)
+        self.assertEqual((stats['updated'], stats['inserted'], stats['deleted'], stats['requests']), (1, 1, 1, 3))
+        expected = FakePage()
+        expected.append_block_children('page', markdown_to_blocks(edited))
+        self.assertEqual(self.page.text(), expected.text())
+
+    def test_insert_at_start_rewrites(self):
+        self.writer.append('page', 'a\n\nb')
+        stats = self.writer.replace('page', '---\n\na\n\nb')
+        self.assertTrue(stats['full_rewrite'])
+        self.assertEqual(self.page.text(), ['', 'a', 'b'])
+
+    def test_markdown_to_blocks(self):
+        blocks = markdown_to_blocks('- padre\n  - hijo\n- [x] hecho\n```py\nx = 1\n```\n> cita')
+        self.assertEqual([b['type'] for b in blocks], ['bulleted_list_item', 'to_do', 'code', 'quote'])
+        self.assertEqual(blocks[0]['bulleted_list_item']['children'][0]['type'], 'bulleted_list_item')
+        self.assertTrue(blocks[1]['to_do']['checked'])
+        self.assertEqual(blocks[2]['code']['language'], 'python')
@@ -0,0 +1,69 @@
+from swarmintelligence.modules.notion_rest_client import NotionAPIError
+from swarmintelligence.modules.notion_scheduler import NotionRequestScheduler
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import unittest
+
+class TestNotionRequestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = NotionRequestScheduler(rate=1000, burst=10, backoff_base=0.01)
+
+    def test_retry_after(self):
+        calls = []
+        def flaky():
+            calls.append(time.monotonic())
+            if len(calls) < 3:
+                raise NotionAPIError(429, 'rate_limited', 'slow down', retry_after=0.05)
+            return 'ok'
+        self.assertEqual(self.scheduler.call(flaky), 'ok')
+        self.assertGreaterEqual(calls[2] - calls[1], 0.045)
+        metrics = self.scheduler.metrics()
+        self.assertEqual((metrics['rate_limited'], metrics['retries'], metrics['completed']), (2, 2, 1))
+
+    def test_non_retryable_error(self):
+        def broken():
+            raise NotionAPIError(400, 'validation_error', 'bad request')
+        with self.assertRaises(NotionAPIError):
+            self.scheduler.call(broken)
+        self.assertEqual(self.scheduler.metrics()['failed'], 1)
+
+    def test_coalesced_reads(self):
+        calls = []
+        release = threading.Event()
+        def read(page_id):
+            calls.append(page_id)
+            release.wait(1)
+            return page_id.upper()
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(self.scheduler.call, read, 'abc', read_key=('read', 'abc')) for _ in range(4)]
+            time.sleep(0.1)
+            release.set()
+            results = [f.result() for f in futures]
+        self.assertEqual(results, ['ABC'] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.scheduler.metrics()['coalesced'], 3)
+
+    def test_non_idempotent_writes_only_retry_rate_limits(self):
+        calls = []
+        def create(status):
+            calls.append(status)
+            if len(calls) == 1:
+                raise NotionAPIError(status, 'error', 'fallo')
+            return 'page'
+        with self.assertRaises(NotionAPIError):
+            self.scheduler.call(create, 502, idempotent=False)
+        self.assertEqual(len(calls), 1)
+        calls.clear()
+        self.assertEqual(self.scheduler.call(create, 429, idempotent=False), 'page')
+        calls.clear()
+        self.assertEqual(self.scheduler.call(create, 502), 'page')
+        self.assertEqual(len(calls), 2)
+
+    def test_classify_ignores_message_text(self):
+        self.assertEqual(self.scheduler._classify(ValueError('page 429abc not found')), (None, None))
+        self.assertEqual(self.scheduler._classify(NotionAPIError(429, 'rate_limited', 'x', retry_after=2)), (429, 2))
+
+        class CodedError(Exception):
+            code = 'rate_limited'
+        self.assertEqual(self.scheduler._classify(CodedError('slow down'))[0], 429)
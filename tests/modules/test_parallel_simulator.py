@@ -0,0 +1,96 @@
+from swarmintelligence.modules.parallel_simulator import ParallelSimulator
+import pandas as pd
+import threading
+import time
+import unittest
+
+class RateLimitError(Exception):
+    status_code = 429
+
+class FakeSimulator(ParallelSimulator):
+    """Simula cada episodio devolviendo una fila; los primeros episodios tardan más en terminar."""
+
+    def __init__(self, *args, failures=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failures = failures
+        self.seen = []
+        self._lock = threading.Lock()
+
+    def _simulate(self, env_config, env_history, user, agent):
+        episode_id = env_config['episode_id'].iloc[0]
+        with self._lock:
+            self.seen.append((episode_id, user, agent, len(env_history)))
+            if self.failures:
+                self.failures -= 1
+                raise RateLimitError('rate limit')
+        time.sleep(0.05 * (3 - episode_id))
+        return pd.DataFrame({'episode_id': [episode_id], 'answer': [f'r{episode_id}']}), env_config
+
+class StatefulAgent:
+    """Agente con ContextWindowManager y memoria propios que el episodio modifica."""
+
+    def __init__(self):
+        self.context_manager = type('ContextManager', (), {'state': None})()
+        self.memory = []
+
+    def initialize(self):
+        self.LLM = object()
+
+class ConcurrentSimulator(ParallelSimulator):
+    """Los dos episodios escriben su estado, esperan al otro y comprueban que el suyo no ha cambiado."""
+
+    barrier = threading.Barrier(2, timeout=2)
+
+    def _simulate(self, env_config, env_history, user, agent):
+        episode_id = env_config['episode_id'].iloc[0]
+        agent.context_manager.state = episode_id
+        agent.memory.append(episode_id)
+        self.barrier.wait()
+        isolated = agent.context_manager.state == episode_id and agent.memory == [episode_id]
+        return pd.DataFrame({'episode_id': [episode_id], 'isolated': [isolated], 'llm': [id(agent.LLM)]}), env_config
+
+class TestParallelSimulator(unittest.TestCase):
+    def setUp(self):
+        self.user, self.agent = object(), type('Agent', (), {})()
+        self.env_config = pd.DataFrame({'episode_id': [0, 1, 2]})
+        self.env_history = pd.DataFrame({'episode_id': [0, 0, 1, 2], 'content': ['a', 'b', 'c', 'd']})
+
+    def test_results_keep_dataset_order(self):
+        simulator = FakeSimulator(self.user, self.agent, 'exp', n_workers=3)
+        history, config = simulator.generate(self.env_config, self.env_history)
+        self.assertEqual(list(history['answer']), ['r0', 'r1', 'r2'])
+        self.assertEqual(list(config['episode_id']), [0, 1, 2])
+        # Cada episodio recibe solo su parte del historial
+        self.assertEqual(sorted((e, n) for e, _, _, n in simulator.seen), [(0, 2), (1, 1), (2, 1)])
+
+    def test_rate_limit_is_retried(self):
+        simulator = FakeSimulator(self.user, self.agent, 'exp', n_workers=3, failures=2, backoff_base=0.01)
+        history, _ = simulator.generate(self.env_config, self.env_history)
+        self.assertEqual(list(history['answer']), ['r0', 'r1', 'r2'])
+        self.assertEqual(len(simulator.seen), 5)
+
+    def test_episodes_use_copies_of_user_and_agent(self):
+        simulator = FakeSimulator(self.user, self.agent, 'exp', n_workers=3)
+        simulator.generate(self.env_config, self.env_history)
+        agents = [agent for _, _, agent, _ in simulator.seen]
+        self.assertEqual(len({id(agent) for agent in agents}), 3)
+        self.assertNotIn(self.agent, agents)
+
+    def test_concurrent_episodes_do_not_share_agent_state(self):
+        agent = StatefulAgent()
+        simulator = ConcurrentSimulator(self.user, agent, 'exp', n_workers=2)
+        history, _ = simulator.generate(pd.DataFrame({'episode_id': [0, 1]}), pd.DataFrame())
+        self.assertEqual(list(history['isolated']), [True, True])
+        self.assertEqual(history['llm'].nunique(), 2)
+        self.assertIsNone(agent.context_manager.state)
+        self.assertEqual(agent.memory, [])
+
+    def test_history_without_episode_id_is_rejected(self):
+        simulator = FakeSimulator(self.user, self.agent, 'exp', n_workers=3)
+        with self.assertRaises(ValueError):
+            simulator.generate(self.env_config, pd.DataFrame({'content': ['a']}))
+        history, _ = simulator.generate(self.env_config, pd.DataFrame())
+        self.assertEqual(len(history), 3)
+
+if __name__ == '__main__':
+    unittest.main()
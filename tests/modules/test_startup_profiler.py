@@ -0,0 +1,19 @@
+from swarmintelligence.modules.startup_profiler import StartupProfiler
+import unittest
+
+class TestStartupProfiler(unittest.TestCase):
+    def test_parse(self):
+        stderr = ('import time: self [us] | cumulative | imported package\n'
+                  'import time:       120 |        120 |   json.decoder\n'
+                  'import time:       300 |        420 | json\n'
+                  'ModuleNotFoundError: No module named x\n')
+        modules, other = StartupProfiler._parse(stderr)
+        self.assertEqual([(m['module'], m['depth'], m['cumulative_ms']) for m in modules], [('json.decoder', 1, 0.12), ('json', 0, 0.42)])
+        self.assertEqual(other, ['ModuleNotFoundError: No module named x'])
+
+    def test_profile(self):
+        profiler = StartupProfiler(entry_points={'json': 'import json', 'missing': 'import module_that_does_not_exist'})
+        results = profiler.run()
+        self.assertIsNone(results['json']['error'])
+        self.assertIn('ModuleNotFoundError', results['missing']['error'])
+        self.assertIn('== json', profiler.report(results))
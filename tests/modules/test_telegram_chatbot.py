@@ -1,9 +1,153 @@
 from swarmintelligence.modules.telegram_chatbot import TelegramChatbotClass
+from telegram.error import BadRequest, RetryAfter
+from types import SimpleNamespace
+from unittest import mock
+import asyncio
+import time
 import unittest
 
+class FakeMessage:
+    """Mensaje de Telegram falso: registra envíos y ediciones y, si se pide, rechaza los mensajes con formato."""
+
+    def __init__(self, log=None, reject_formatted=False, rate_limits=None):
+        self.log = log if log is not None else []
+        self.reject_formatted = reject_formatted
+        # Llamadas que responden RetryAfter: {'send'|'edit'|'document': [segundos, ...]}
+        self.rate_limits = rate_limits if rate_limits is not None else {}
+        self.fail_documents = False
+
+    def _check(self, kind, parse_mode=None):
+        if self.rate_limits.get(kind):
+            raise RetryAfter(self.rate_limits[kind].pop(0))
+        if parse_mode and self.reject_formatted:
+            raise BadRequest("Can't parse entities")
+
+    async def reply_text(self, text, parse_mode=None):
+        self._check('send', parse_mode)
+        self.log.append(('send', text, parse_mode))
+        return FakeMessage(self.log, self.reject_formatted, self.rate_limits)
+
+    async def reply_document(self, document, filename, caption):
+        if self.fail_documents:
+            raise RuntimeError('document rejected')
+        self.log.append(('document', filename, document.read().decode('utf-8')))
+
+    async def edit_text(self, text, parse_mode=None):
+        self._check('edit', parse_mode)
+        self.log.append(('edit', text, parse_mode))
+
+    async def delete(self):
+        self.log.append(('delete',))
+
+def _update(message, chat_id=1):
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id), message=message)
+
+async def _stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
 class TestTelegramChatbotClass(unittest.TestCase):
     def setUp(self):
         pass
 
     def test_telegram_chatbot(self):
         print('Already tested')
+
+    def _bot(self, **kwargs):
+        kwargs.setdefault('global_send_rate', 1000)
+        kwargs.setdefault('chat_send_rate', 1000)
+        with mock.patch.object(TelegramChatbotClass, '_setup_application'):
+            bot = TelegramChatbotClass('token', **kwargs)
+        self.addCleanup(bot.stop)
+        return bot
+
+    def test_rejected_format_resends_raw_part(self):
+        bot = self._bot(parse_mode='HTML', max_message_length=100)
+        message = FakeMessage(reject_formatted=True)
+        text = '**a** < b ' + 'x' * 90
+        asyncio.run(bot._send_message_parts(_update(message), text))
+        self.assertEqual(message.log, [('send', '**a** < b (1/2)', None), ('send', 'x' * 90 + ' (2/2)', None)])
+
+    def test_stream_skips_unmodified_final_edit(self):
+        bot = self._bot(stream_edit_interval=0)
+        message = FakeMessage()
+        asyncio.run(bot._stream_message(_update(message), _stream(['hola', ' mundo'])))
+        self.assertEqual([entry[1] for entry in message.log], ['✍️ ...', 'hola', 'hola mundo'])
+
+    def test_stream_final_edit_falls_back_to_plain_text(self):
+        bot = self._bot(parse_mode='HTML', stream_edit_interval=0)
+        message = FakeMessage(reject_formatted=True)
+        # El texto sin formato ya se mostró durante el streaming: no hace falta volver a editarlo
+        asyncio.run(bot._stream_message(_update(message), _stream(['**a** < b'])))
+        self.assertEqual(message.log, [('send', '✍️ ...', None), ('edit', '**a** < b', None)])
+        message.log.clear()
+        bot.stream_edit_interval = 60
+        asyncio.run(bot._stream_message(_update(message), _stream(['**a** < b'])))
+        self.assertEqual(message.log, [('send', '✍️ ...', None), ('edit', '**a** < b', None)])
+
+    def test_sends_are_paced_per_chat(self):
+        bot = self._bot(chat_send_rate=20, group_send_rate=10, chat_send_burst=1, max_message_length=100)
+        message = FakeMessage()
+        start = time.monotonic()
+        asyncio.run(bot._send_message_parts(_update(message), ' '.join(['x' * 90] * 5)))
+        self.assertEqual(len(message.log), 5)
+        # Un envío inmediato y cuatro a 20 msg/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+        self.assertEqual(bot._chat_send_bucket(-1).rate, 10)
+
+    def test_retry_after_pauses_retries_and_backs_off(self):
+        bot = self._bot(chat_send_rate=50)
+        message = FakeMessage(rate_limits={'send': [0.1]})
+        start = time.monotonic()
+        asyncio.run(bot._send_message_parts(_update(message), 'hola'))
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(message.log, [('send', 'hola', None)])
+        self.assertEqual(bot._chat_send_bucket(1).rate, 25)
+        # El ritmo reducido se conserva aunque aparezcan otros chats
+        bot._chat_send_bucket(2)
+        self.assertEqual(bot._chat_send_bucket(1).rate, 25)
+
+    def test_long_answers_are_sent_as_document(self):
+        bot = self._bot(document_threshold=50)
+        message = FakeMessage()
+        text = 'y' * 150
+        asyncio.run(bot._send_message_parts(_update(message), text))
+        self.assertEqual(message.log, [('document', 'respuesta.md', text)])
+        message.log.clear()
+        message.fail_documents = True
+        asyncio.run(bot._send_message_parts(_update(message), text))
+        self.assertEqual(''.join(entry[1].split(' (')[0] for entry in message.log), text)
+
+    def test_stream_skips_edits_without_send_quota(self):
+        bot = self._bot(chat_send_rate=5, chat_send_burst=1, stream_edit_interval=0)
+        message = FakeMessage()
+        asyncio.run(bot._stream_message(_update(message), _stream(['a', 'b', 'c', 'd'])))
+        # Tras el mensaje provisional no queda cupo: las ediciones intermedias se omiten sin esperar
+        self.assertEqual(message.log, [('send', '✍️ ...', None), ('edit', 'abcd', None)])
+
+    def test_skipped_edit_does_not_spend_chat_quota(self):
+        bot = self._bot(global_send_rate=1, chat_send_burst=1)
+        bot._global_send_bucket.pause(60)
+        message = FakeMessage()
+        self.assertFalse(asyncio.run(bot._try_call_telegram(1, message.edit_text, 'a')))
+        self.assertEqual(bot._chat_send_bucket(1).wait_time(), 0)
+        self.assertEqual(message.log, [])
+
+    def test_stream_does_not_retry_rate_limited_edits(self):
+        bot = self._bot(chat_send_rate=1000, stream_edit_interval=0)
+        message = FakeMessage(rate_limits={'edit': [0.01]})
+        asyncio.run(bot._stream_message(_update(message), _stream(['a', 'b'])))
+        self.assertEqual([entry[1] for entry in message.log], ['✍️ ...', 'ab'])
+
+    def test_idle_send_buckets_are_pruned(self):
+        bot = self._bot(send_bucket_ttl=0.05)
+        message = FakeMessage()
+        for chat_id in range(3):
+            asyncio.run(bot._send_message_parts(_update(message, chat_id), 'hola'))
+        self.assertEqual(list(bot._chat_send_buckets), [0, 1, 2])
+        time.sleep(0.1)
+        asyncio.run(bot._send_message_parts(_update(message, 3), 'hola'))
+        self.assertEqual(list(bot._chat_send_buckets), [3])
+
+if __name__ == '__main__':
+    unittest.main()
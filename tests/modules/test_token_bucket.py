@@ -0,0 +1,33 @@
+from swarmintelligence.modules.token_bucket import TokenBucket
+import asyncio
+import time
+import unittest
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=50, capacity=5)
+        start = time.monotonic()
+        for _ in range(10):
+            bucket.acquire()
+        # 5 de ráfaga + 5 a 50/s ≈ 0.1 s
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+
+    def test_wait_time_does_not_consume(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        self.assertEqual(bucket.wait_time(), 0)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertGreater(bucket.wait_time(), 0)
+
+    def test_pause_and_timeout(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        bucket.pause(0.2)
+        self.assertFalse(bucket.acquire(timeout=0.05))
+        self.assertGreater(bucket.try_acquire(), 0)
+
+    def test_async_acquire(self):
+        bucket = TokenBucket(rate=100, capacity=2)
+        async def run():
+            await asyncio.gather(*[bucket.aacquire() for _ in range(4)])
+        start = time.monotonic()
+        asyncio.run(run())
+        self.assertGreaterEqual(time.monotonic() - start, 0.015)
@@ -0,0 +1,32 @@
+from swarmintelligence.modules.tool_registry import ToolRegistry
+import unittest
+
+class CountingTool:
+    built = 0
+
+    def __init__(self, tool_name, description):
+        CountingTool.built += 1
+        self.tool_name = tool_name
+        self.description = description
+
+    def initialize(self):
+        return {'type': 'function', 'function': {'name': self.tool_name, 'description': self.description}}
+
+class TestToolRegistry(unittest.TestCase):
+    def setUp(self):
+        CountingTool.built = 0
+        self.registry = ToolRegistry()
+
+    def test_lazy_materialization(self):
+        tools = [self.registry.register(name, CountingTool, tool_name=name, description=name.upper()) for name in ['a', 'b']]
+        self.assertEqual({t.tool_name: t for t in tools}.keys(), {'a', 'b'})
+        self.assertEqual(CountingTool.built, 0)
+        self.assertEqual(tools[1].initialize()['function']['description'], 'B')
+        self.assertEqual(tools[1].description, 'B')
+        self.assertEqual(CountingTool.built, 1)
+        self.assertFalse(self.registry.is_materialized('a'))
+
+    def test_dotted_path_factory(self):
+        tool = self.registry.register('counter', f'{__name__}.CountingTool', 'counter', description='x')
+        self.assertIs(tool.instance, self.registry.materialize('counter'))
+        self.assertIsInstance(tool.instance, CountingTool)
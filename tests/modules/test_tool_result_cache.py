@@ -0,0 +1,33 @@
+from swarmintelligence.modules.tool_result_cache import ToolResultCache
+from concurrent.futures import ThreadPoolExecutor
+import time
+import unittest
+
+class TestToolResultCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ToolResultCache(max_entries=2)
+        self.n_calls = 0
+
+    def slow_tool(self, ok=True):
+        self.n_calls += 1
+        time.sleep(0.05)
+        return f"resultado {self.n_calls}", ok
+
+    def test_in_flight_deduplication(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: self.cache.get_or_call('k', self.slow_tool), range(4)))
+        self.assertEqual(results, ['resultado 1'] * 4)
+        self.assertEqual(self.n_calls, 1)
+
+    def test_ttl_and_errors(self):
+        self.cache.get_or_call('k', self.slow_tool, ttl=0)
+        self.cache.get_or_call('k', self.slow_tool, ttl=0)
+        self.assertEqual(self.n_calls, 2)
+        self.cache.get_or_call('err', lambda: self.slow_tool(ok=False))
+        self.cache.get_or_call('err', lambda: self.slow_tool(ok=False))
+        self.assertEqual(self.n_calls, 4)
+
+    def test_lru_eviction(self):
+        for key in ['a', 'b', 'a', 'c']:
+            self.cache.get_or_call(key, self.slow_tool)
+        self.assertEqual(list(self.cache._entries), ['a', 'c'])